@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import hashlib
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -91,7 +92,7 @@ DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
     # Production: PostgreSQL via DATABASE_URL
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, conn_health_checks=True)
     }
 else:
     # Fallback: SQLite for local development
@@ -103,6 +104,40 @@ else:
     }
 
 
+# Threads (and so database connections) the bot uses for ORM calls, see
+# bot/db.py. Keep BOT_DB_POOL_SIZE + web workers under the database's
+# connection limit. SQLite allows one writer at a time, so it gets one thread.
+BOT_DB_POOL_SIZE = int(os.environ.get(
+    'BOT_DB_POOL_SIZE',
+    1 if DATABASES['default']['ENGINE'].endswith('sqlite3') else 8
+))
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+# Shared by the gunicorn workers and the bot process. Uses Redis when
+# REDIS_URL is set, otherwise a database table (run `createcachetable`).
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -162,6 +197,16 @@ else:
     MEDIA_ROOT = BASE_DIR / 'media'
 
 
+# News images are re-encoded for Telegram after upload (bot/services/images.py):
+# longest side of the rendition and thumbnail, format (JPEG or WEBP), quality,
+# and processes used for the resizing
+NEWS_IMAGE_MAX_SIDE = int(os.environ.get('NEWS_IMAGE_MAX_SIDE', 1280))
+NEWS_THUMBNAIL_SIDE = int(os.environ.get('NEWS_THUMBNAIL_SIDE', 320))
+NEWS_IMAGE_FORMAT = os.environ.get('NEWS_IMAGE_FORMAT', 'JPEG').upper()
+NEWS_IMAGE_QUALITY = int(os.environ.get('NEWS_IMAGE_QUALITY', 85))
+NEWS_IMAGE_WORKERS = int(os.environ.get('NEWS_IMAGE_WORKERS', 2))
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -175,6 +220,89 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
 TELEGRAM_BOT_USERNAME = 'eaglesvieweaglebot'
 
+# 'polling': `runbot` long-polls in its own process.
+# 'webhook': the ASGI app receives updates at TELEGRAM_WEBHOOK_PATH
+# (`runbot --mode webhook` registers the URL with Telegram).
+BOT_MODE = os.environ.get('BOT_MODE', 'polling')
+TELEGRAM_WEBHOOK_PATH = 'telegram/webhook/'
+TELEGRAM_WEBHOOK_URL = os.environ.get(
+    'TELEGRAM_WEBHOOK_URL',
+    f"{os.environ.get('RENDER_EXTERNAL_URL', '').rstrip('/')}/{TELEGRAM_WEBHOOK_PATH}"
+)
+# Telegram sends this back in X-Telegram-Bot-Api-Secret-Token (A-Z, a-z, 0-9, _ and -)
+TELEGRAM_WEBHOOK_SECRET = os.environ.get(
+    'TELEGRAM_WEBHOOK_SECRET',
+    hashlib.sha256(f"webhook:{TELEGRAM_BOT_TOKEN}".encode()).hexdigest()
+)
+
+
+# Inline mode: seconds Telegram may cache inline results, and how long to
+# wait for the user to stop typing before searching
+INLINE_CACHE_TIME = int(os.environ.get('INLINE_CACHE_TIME', 300))
+INLINE_DEBOUNCE_SECONDS = float(os.environ.get('INLINE_DEBOUNCE_SECONDS', 0.4))
+
+# Updates from different chats are handled concurrently, up to this many at
+# once (updates from one chat always run in order). Up to UPDATE_MAX_PENDING
+# updates may be waiting for a slot or for their chat.
+UPDATE_CONCURRENCY = int(os.environ.get('UPDATE_CONCURRENCY', 16))
+UPDATE_MAX_PENDING = int(os.environ.get('UPDATE_MAX_PENDING', 256))
+
+# Outbound Bot API limits (bot/rate_limiter.py): messages per second overall,
+# per second in a private chat and per minute in a group, and how many times
+# a call is retried after a 429 RetryAfter
+TELEGRAM_GLOBAL_RATE = float(os.environ.get('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.environ.get('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_GROUP_RATE = float(os.environ.get('TELEGRAM_GROUP_RATE', 20))
+TELEGRAM_MAX_RETRIES = int(os.environ.get('TELEGRAM_MAX_RETRIES', 2))
+
+# Telegram user ids allowed to use admin commands such as /profile
+BOT_ADMIN_IDS = [int(i) for i in os.environ.get('BOT_ADMIN_IDS', '').split(',') if i.strip()]
+
+# Sampling profiler (`runbot --profile N`, /profile N): output directory,
+# sampling interval and longest allowed run
+PROFILE_DIR = os.environ.get('PROFILE_DIR', str(BASE_DIR / 'profiles'))
+PROFILE_INTERVAL_MS = int(os.environ.get('PROFILE_INTERVAL_MS', 5))
+PROFILE_MAX_SECONDS = int(os.environ.get('PROFILE_MAX_SECONDS', 300))
+
+# Prometheus metrics at /metrics/ (bot/metrics.py). When set, scrapers must
+# send "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Polling mode: `runbot` serves its metrics on 127.0.0.1:<port> and /metrics/
+# relays them (0 disables)
+BOT_METRICS_PORT = int(os.environ.get('BOT_METRICS_PORT', 9101))
+
+# user_data and conversation persistence (bot/persistence.py): seconds
+# between batched writes, idle seconds before a user's data is dropped from
+# memory, and age after which an abandoned conversation is forgotten
+BOT_PERSISTENCE_INTERVAL = int(os.environ.get('BOT_PERSISTENCE_INTERVAL', 10))
+BOT_USER_DATA_IDLE_SECONDS = int(os.environ.get('BOT_USER_DATA_IDLE_SECONDS', 3600))
+BOT_CONVERSATION_TTL = int(os.environ.get('BOT_CONVERSATION_TTL', 86400))
+
+
+# =============================================================================
+# PURPLE BOARD SEARCH
+# =============================================================================
+
+# Seconds before the bot's in-memory search index is rebuilt from the database
+# (picks up admin changes made from the web process)
+SEARCH_INDEX_MAX_AGE = int(os.environ.get('SEARCH_INDEX_MAX_AGE', 300))
+
+# Result counts above this are shown as "500+" (all results can still be paged)
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 500))
+
+# Typo-tolerant matching, used when a search has fewer hits than one page
+SEARCH_FUZZY_THRESHOLD = float(os.environ.get('SEARCH_FUZZY_THRESHOLD', 0.3))
+SEARCH_FUZZY_BUDGET_MS = int(os.environ.get('SEARCH_FUZZY_BUDGET_MS', 50))
+
+# Shared cache of search/category result id lists
+SEARCH_CACHE_ALIAS = 'default'
+SEARCH_CACHE_TIMEOUT = int(os.environ.get('SEARCH_CACHE_TIMEOUT', 300))
+SEARCH_CACHE_LOCAL_SIZE = int(os.environ.get('SEARCH_CACHE_LOCAL_SIZE', 256))
+
+# Pre-rendered provider cards (dropped on save, so this is only a backstop)
+CARD_CACHE_TIMEOUT = int(os.environ.get('CARD_CACHE_TIMEOUT', 86400))
+
 
 # =============================================================================
 # PAYSTACK SETTINGS
@@ -182,6 +310,43 @@ TELEGRAM_BOT_USERNAME = 'eaglesvieweaglebot'
 
 PAYSTACK_SECRET_KEY = os.environ.get('PAYSTACK_SECRET_KEY')
 PAYSTACK_PUBLIC_KEY = os.environ.get('PAYSTACK_PUBLIC_KEY')
+PAYSTACK_BASE_URL = os.environ.get('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+
+# Shared Paystack client (bot/services/paystack.py): seconds to connect,
+# seconds to wait for a response, and open connections kept to Paystack
+PAYSTACK_CONNECT_TIMEOUT = float(os.environ.get('PAYSTACK_CONNECT_TIMEOUT', 5))
+PAYSTACK_READ_TIMEOUT = float(os.environ.get('PAYSTACK_READ_TIMEOUT', 20))
+PAYSTACK_MAX_CONNECTIONS = int(os.environ.get('PAYSTACK_MAX_CONNECTIONS', 20))
+
+# Retries after a timeout/connection error/429/5xx, with jittered backoff
+# between PAYSTACK_RETRY_BASE and PAYSTACK_RETRY_CAP seconds; failed calls in a
+# row before calls fail fast, and seconds before trying Paystack again
+PAYSTACK_RETRIES = int(os.environ.get('PAYSTACK_RETRIES', 2))
+PAYSTACK_RETRY_BASE = float(os.environ.get('PAYSTACK_RETRY_BASE', 0.5))
+PAYSTACK_RETRY_CAP = float(os.environ.get('PAYSTACK_RETRY_CAP', 4))
+PAYSTACK_BREAKER_FAILURES = int(os.environ.get('PAYSTACK_BREAKER_FAILURES', 5))
+PAYSTACK_BREAKER_COOLDOWN = float(os.environ.get('PAYSTACK_BREAKER_COOLDOWN', 30))
+
+# Set the dashboard's webhook URL to <site>/paystack/webhook/ (charge.success
+# events confirm payments without the user tapping Verify)
+PAYSTACK_WEBHOOK_PATH = 'paystack/webhook/'
+
+# Pending payments are re-checked with Paystack in the background
+# (bot/services/reconciler.py): seconds between runs (0 turns it off),
+# seconds before a new payment is first checked, longest gap between checks,
+# payments per run, checks at once and seconds per run
+RECONCILE_INTERVAL = int(os.environ.get('RECONCILE_INTERVAL', 60))
+RECONCILE_FIRST_CHECK = int(os.environ.get('RECONCILE_FIRST_CHECK', 120))
+RECONCILE_MAX_BACKOFF = int(os.environ.get('RECONCILE_MAX_BACKOFF', 6 * 3600))
+RECONCILE_BATCH = int(os.environ.get('RECONCILE_BATCH', 50))
+RECONCILE_CONCURRENCY = int(os.environ.get('RECONCILE_CONCURRENCY', 4))
+RECONCILE_BUDGET = int(os.environ.get('RECONCILE_BUDGET', 30))
+
+# Unpaid payments older than this (seconds) are marked ABANDONED
+PAYMENT_ABANDON_AFTER = int(os.environ.get('PAYMENT_ABANDON_AFTER', 24 * 3600))
+
+# Seconds a payment lookup or Paystack verify result answers repeat taps
+PAYMENT_STATUS_CACHE_SECONDS = float(os.environ.get('PAYMENT_STATUS_CACHE_SECONDS', 3))
 
 # Plan prices in Kobo (100 kobo = ₦1)
 PLAN_PRICES = {
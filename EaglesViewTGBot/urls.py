@@ -19,8 +19,13 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from bot.views import metrics, paystack_webhook, telegram_webhook
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path(settings.TELEGRAM_WEBHOOK_PATH, telegram_webhook, name='telegram_webhook'),
+    path(settings.PAYSTACK_WEBHOOK_PATH, paystack_webhook, name='paystack_webhook'),
+    path('metrics/', metrics, name='metrics'),
 ]
 
 # Serve media files in development
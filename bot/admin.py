@@ -3,16 +3,20 @@ from django.utils.html import format_html
 from .models import (
     Category, ServiceProvider, News, Advertisement,
     Fixture, Result, FantasyLeaderboard, Announcement,
-    Payment
+    Payment, BotUserData, BotConversation, TelegramFile
 )
+from .services.cards import drop_cards
+from .services.directory import refresh_category_counts
+from .services.images import schedule_news_image
+from .services.search import invalidate_search_results
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug', 'provider_count', 'created_at']
+    list_display = ['name', 'slug', 'active_provider_count', 'provider_count', 'created_at']
     search_fields = ['name']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['created_at']
+    readonly_fields = ['active_provider_count', 'created_at']
 
     def provider_count(self, obj):
         return obj.providers.count()
@@ -62,30 +66,54 @@ class ServiceProviderAdmin(admin.ModelAdmin):
 
     @admin.action(description='Approve selected providers')
     def approve_providers(self, request, queryset):
+        provider_ids = list(queryset.values_list('id', flat=True))
+        category_ids = list(queryset.values_list('category_id', flat=True))
         updated = queryset.update(is_approved=True)
+        refresh_category_counts(category_ids)
+        # queryset.update() skips the signals that keep the index current
+        invalidate_search_results(index_current=False)
+        drop_cards(provider_ids)
         self.message_user(request, f'{updated} provider(s) approved.')
 
     @admin.action(description='Reject selected providers')
     def reject_providers(self, request, queryset):
+        provider_ids = list(queryset.values_list('id', flat=True))
+        category_ids = list(queryset.values_list('category_id', flat=True))
         updated = queryset.update(is_approved=False)
+        refresh_category_counts(category_ids)
+        # queryset.update() skips the signals that keep the index current
+        invalidate_search_results(index_current=False)
+        drop_cards(provider_ids)
         self.message_user(request, f'{updated} provider(s) rejected.')
 
     @admin.action(description='Set as Verified (badge + approved)')
     def verify_providers(self, request, queryset):
+        provider_ids = list(queryset.values_list('id', flat=True))
+        category_ids = list(queryset.values_list('category_id', flat=True))
         updated = queryset.update(
             is_verified=True, 
             badge_type='VERIFIED', 
             is_approved=True
         )
+        refresh_category_counts(category_ids)
+        # queryset.update() skips the signals that keep the index current
+        invalidate_search_results(index_current=False)
+        drop_cards(provider_ids)
         self.message_user(request, f'{updated} provider(s) verified.')
 
     @admin.action(description='Set as Premium (badge + approved)')
     def set_premium(self, request, queryset):
+        provider_ids = list(queryset.values_list('id', flat=True))
+        category_ids = list(queryset.values_list('category_id', flat=True))
         updated = queryset.update(
             badge_type='PREMIUM', 
             plan_type='PREMIUM',
             is_approved=True
         )
+        refresh_category_counts(category_ids)
+        # queryset.update() skips the signals that keep the index current
+        invalidate_search_results(index_current=False)
+        drop_cards(provider_ids)
         self.message_user(request, f'{updated} provider(s) set to Premium.')
 
 
@@ -96,6 +124,25 @@ class NewsAdmin(admin.ModelAdmin):
     search_fields = ['title', 'content']
     list_editable = ['is_published']
     date_hierarchy = 'created_at'
+    readonly_fields = ['image_preview', 'image_width', 'image_height']
+    actions = ['render_images']
+
+    def image_preview(self, obj):
+        if obj.image_thumbnail:
+            return format_html('<img src="{}" style="max-height: 160px;">', obj.image_thumbnail.url)
+        if obj.image:
+            return "Processing..."
+        return "-"
+    image_preview.short_description = 'Telegram rendition'
+
+    @admin.action(description='Regenerate Telegram images')
+    def render_images(self, request, queryset):
+        rows = queryset.exclude(image='').exclude(image__isnull=True).values_list(
+            'id', 'image_rendition', 'image_thumbnail'
+        )
+        for news_id, *old_files in rows:
+            schedule_news_image(news_id, [name for name in old_files if name])
+        self.message_user(request, f'{len(rows)} image(s) queued for processing.')
 
 
 @admin.register(Advertisement)
@@ -167,3 +214,25 @@ class PaymentAdmin(admin.ModelAdmin):
     def display_amount(self, obj):
         return f"₦{obj.amount_naira:,.0f}"
     display_amount.short_description = 'Amount'
+
+
+@admin.register(BotUserData)
+class BotUserDataAdmin(admin.ModelAdmin):
+    list_display = ['user_id', 'updated_at']
+    search_fields = ['user_id']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(BotConversation)
+class BotConversationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'key', 'state', 'updated_at']
+    list_filter = ['name']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(TelegramFile)
+class TelegramFileAdmin(admin.ModelAdmin):
+    list_display = ['storage_path', 'kind', 'content_hash', 'created_at']
+    list_filter = ['kind']
+    search_fields = ['storage_path', 'content_hash']
+    readonly_fields = ['created_at']
@@ -5,3 +5,7 @@ class BotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bot'
     verbose_name = 'Eagles View Bot'
+
+    def ready(self):
+        # Register model signal handlers
+        from bot import signals  # noqa: F401
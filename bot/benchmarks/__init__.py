@@ -0,0 +1,15 @@
+"""
+Purple Board benchmarks
+Synthetic provider corpus and handler-level search benchmarks, run with
+`python manage.py benchsearch`.
+"""
+
+# Benchmarks and fake runs use a process-local cache instead of the shared
+# CACHES, so they never touch the real search generation or provider cards
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmarks',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+}
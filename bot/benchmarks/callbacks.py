@@ -0,0 +1,158 @@
+"""
+Callback routing benchmarks
+Compares finding the handler for a button press with the callback router
+(bot/router.py) against the CallbackQueryHandler chain it replaced, where
+PTB tries each handler's regex in turn until one matches.
+
+Both sides get the bot's real routes, padded with synthetic ones up to the
+requested handler count, and are fed the same mix of callback_data on real
+Update objects. Only matching is timed; no handler runs.
+"""
+import random
+import time
+from datetime import datetime, timezone
+
+from telegram import CallbackQuery, Chat, Message, Update, User
+from telegram.ext import CallbackQueryHandler
+
+from bot.benchmarks.fakes import BENCH_CHAT_ID, BENCH_USER_ID
+from bot.benchmarks.search import percentile
+
+
+# The handler chain before the router, in the order it was registered
+LEGACY_PATTERNS = [
+    r"^verify_payment_",
+    "^main_menu$",
+    "^section_home$",
+    "^ad_(prev|next|count)$",
+    "^section_news$",
+    r"^news_view_\d+$",
+    "^news_page_(prev|next|info)$",
+    "^section_purple$",
+    r"^purple_cats_\d+$",
+    r"^provider_\d+$",
+    r"^catalogue_\d+$",
+    r"^cat_\d+$",
+    r"^search_(info|page_\d+_[fb]_[0-9a-z.]*)$",
+    "^search_back$",
+    "^suggest_",
+    "^section_chancellors$",
+    "^chancellors_fixtures$",
+    "^chancellors_results$",
+    "^chancellors_leaderboard$",
+    "^chancellors_announcements$",
+]
+
+# Button presses in rough proportion to how often they happen
+SAMPLE_DATA = [
+    "main_menu", "main_menu",
+    "section_purple", "purple_cats_1",
+    "cat_12", "cat_7", "provider_431", "provider_88", "catalogue_431",
+    "search_page_1_f_k3x9.1", "search_page_2_f_a0b1", "search_back",
+    "suggest_phone_case",
+    "section_news", "news_view_17", "news_page_next",
+    "section_home", "ad_next", "ad_prev",
+    "chancellors_fixtures",
+    "verify_payment_EV-AB12CD34",
+]
+
+
+async def _noop(update, context, **kwargs):
+    return None
+
+
+def _synthetic(count):
+    """(regex, route) pairs for `count` extra handlers, shaped like the real ones."""
+    pairs = []
+    for i in range(count):
+        if i % 2:
+            pairs.append((rf"^extra{i}_item_\d+$", f"extra{i}_item_<int:item_id>"))
+        else:
+            pairs.append((f"^extra{i}_section$", f"extra{i}_section"))
+    return pairs
+
+
+def legacy_chain(handler_count):
+    """The regex handler chain, padded to `handler_count` handlers."""
+    # Padding goes first, so real buttons pay for every handler as they
+    # would for sections registered ahead of them
+    patterns = [regex for regex, _ in _synthetic(handler_count - len(LEGACY_PATTERNS))] + LEGACY_PATTERNS
+    return [CallbackQueryHandler(_noop, pattern=pattern) for pattern in patterns]
+
+
+def router(handler_count):
+    """The bot's callback router, padded to `handler_count` routes."""
+    from bot.bot import create_callback_router
+
+    callback_router = create_callback_router()
+    extra = handler_count - len(callback_router.routes)
+    callback_router.add_routes((route, _noop) for _, route in _synthetic(extra))
+    return callback_router
+
+
+def callback_update(data, update_id=1):
+    """A real PTB Update carrying a callback query (no bot attached)."""
+    user = User(id=BENCH_USER_ID, first_name='Bench', is_bot=False)
+    chat = Chat(id=BENCH_CHAT_ID, type=Chat.PRIVATE)
+    message = Message(message_id=1, date=datetime.now(timezone.utc), chat=chat)
+    query = CallbackQuery(id=str(update_id), from_user=user, chat_instance='bench', message=message, data=data)
+    return Update(update_id=update_id, callback_query=query)
+
+
+def legacy_check(handlers, update):
+    for handler in handlers:
+        check = handler.check_update(update)
+        if check is not None and check is not False:
+            return handler
+    return None
+
+
+def router_check(callback_router, update):
+    return callback_router.check_update(update)
+
+
+class CallbackRoutingBenchmark:
+    """Times handler lookup for each handler count, on both implementations."""
+
+    def __init__(self, iterations=20000, seed=0):
+        self.iterations = iterations
+        rng = random.Random(seed)
+        self.updates = [callback_update(rng.choice(SAMPLE_DATA), i) for i in range(iterations)]
+
+    def run(self, handler_counts):
+        results = []
+        for count in handler_counts:
+            count = max(count, len(LEGACY_PATTERNS))
+            chain = legacy_chain(count)
+            callback_router = router(count)
+            self._check_same(chain, callback_router)
+            for name, check, target in (
+                ('regex chain', legacy_check, chain),
+                ('router', router_check, callback_router),
+            ):
+                timings = self._measure(check, target)
+                results.append({
+                    'handlers': count,
+                    'implementation': name,
+                    'p50_us': percentile(timings, 0.50) * 1e6,
+                    'p95_us': percentile(timings, 0.95) * 1e6,
+                    'mean_us': sum(timings) / len(timings) * 1e6,
+                })
+        return results
+
+    def _check_same(self, chain, callback_router):
+        for data in SAMPLE_DATA:
+            update = callback_update(data)
+            if (legacy_check(chain, update) is None) != (router_check(callback_router, update) is None):
+                raise AssertionError(f"Router and regex chain disagree on {data!r}")
+
+    def _measure(self, check, target):
+        # One untimed pass warms the regex cache
+        for update in self.updates[:1000]:
+            check(target, update)
+        timings = []
+        for update in self.updates:
+            started = time.perf_counter()
+            check(target, update)
+            timings.append(time.perf_counter() - started)
+        return timings
@@ -0,0 +1,181 @@
+"""
+Synthetic provider corpus
+Seeds categories and providers that look like real Purple Board sign-ups:
+campus services with overlapping keywords, mostly Basic plans and a few
+unapproved or inactive listings. Also seeds pending payments for
+`reconcilepayments --fake-paystack`.
+"""
+import random
+
+from django.db import transaction
+
+
+# Category -> keywords providers in it tend to use
+CATEGORY_KEYWORDS = {
+    'Beauty': ['lash', 'lashes', 'makeup', 'nails', 'pedicure', 'manicure', 'brows', 'facials'],
+    'Hair': ['braids', 'wig', 'wigs', 'barber', 'haircut', 'dreadlocks', 'weave', 'hair'],
+    'Fashion': ['tailor', 'fashion', 'thrift', 'sneakers', 'ankara', 'aso-ebi', 'clothes'],
+    'Photography': ['photography', 'photoshoot', 'portraits', 'videography', 'editing', 'drone'],
+    'Tech': ['frontend', 'backend', 'website', 'react', 'django', 'python', 'laptop', 'repairs'],
+    'Design': ['design', 'logo', 'branding', 'flyers', 'illustration', 'figma', 'ui'],
+    'Food': ['catering', 'cakes', 'small-chops', 'jollof', 'pastries', 'smoothies', 'shawarma'],
+    'Tutoring': ['tutor', 'mathematics', 'physics', 'chemistry', 'jamb', 'coding', 'lessons'],
+    'Printing': ['printing', 'typing', 'binding', 'lamination', 'photocopy', 'scanning'],
+    'Events': ['events', 'decor', 'dj', 'mc', 'ushers', 'rentals', 'planning'],
+    'Logistics': ['delivery', 'errands', 'dispatch', 'moving', 'laundry', 'cleaning'],
+    'Phones': ['phones', 'gadgets', 'accessories', 'chargers', 'screen', 'unlocking'],
+}
+
+NAME_PREFIXES = [
+    'Eagle', 'Purple', 'Campus', 'Royal', 'Golden', 'Swift', 'Prime', 'Bright',
+    'Luxe', 'Urban', 'Classic', 'Elite', 'Sunny', 'Bold', 'Crown', 'Nova',
+]
+NAME_SUFFIXES = ['Studio', 'Hub', 'Works', 'Place', 'Touch', 'Co', 'Express', 'Lab', 'Corner', 'Spot']
+
+HALLS = ['Daniel Hall', 'Joseph Hall', 'Esther Hall', 'Mary Hall', 'Peter Hall', 'Paul Hall']
+
+# Offset so synthetic telegram ids never collide with real users
+TELEGRAM_ID_BASE = 9_000_000_000
+
+
+def seed_categories():
+    """Create (or fetch) the synthetic categories."""
+    from bot.models import Category
+
+    categories = []
+    for name in CATEGORY_KEYWORDS:
+        category, _ = Category.objects.get_or_create(name=name)
+        categories.append(category)
+    return categories
+
+
+def build_provider(number, categories, rng):
+    """Return an unsaved synthetic ServiceProvider."""
+    from bot.models import ServiceProvider
+
+    # Skewed category sizes, like real sign-ups
+    category = rng.choices(categories, weights=range(len(categories), 0, -1))[0]
+    vocabulary = CATEGORY_KEYWORDS[category.name]
+    keywords = rng.sample(vocabulary, rng.randint(2, 4))
+    if rng.random() < 0.2:
+        # Some providers cross-list in a second category
+        other = CATEGORY_KEYWORDS[rng.choice(categories).name]
+        keywords.append(rng.choice(other))
+
+    plan_type = rng.choices(['BASIC', 'VERIFIED', 'PREMIUM'], weights=[70, 20, 10])[0]
+    name = f"{rng.choice(NAME_PREFIXES)} {keywords[0].title()} {rng.choice(NAME_SUFFIXES)} {number}"
+    description = (
+        f"{keywords[0].title()} and {', '.join(keywords[1:])} on campus. "
+        f"Fast, affordable {category.name.lower()} services for students."
+    )
+
+    return ServiceProvider(
+        telegram_user_id=TELEGRAM_ID_BASE + number,
+        name=name,
+        description=description,
+        keywords=keywords,
+        category=category,
+        plan_type=plan_type,
+        badge_type={'BASIC': 'NONE', 'VERIFIED': 'VERIFIED', 'PREMIUM': 'PREMIUM'}[plan_type],
+        is_verified=plan_type != 'BASIC',
+        phone=f"080{rng.randint(10_000_000, 99_999_999)}",
+        telegram_handle=f"@provider{number}",
+        instagram_handle=f"@provider{number}" if rng.random() < 0.5 else '',
+        hall_of_residence=rng.choice(HALLS) if plan_type == 'PREMIUM' else '',
+        is_approved=rng.random() < 0.9,
+        is_active=rng.random() < 0.95,
+    )
+
+
+def seed_providers(total, seed=0, batch_size=1000):
+    """
+    Grow the synthetic corpus to `total` providers.
+
+    bulk_create skips model signals, so category counts and cached search
+    results are refreshed afterwards (the FTS triggers still fire).
+    """
+    from bot.models import ServiceProvider
+    from bot.services.directory import refresh_category_counts
+    from bot.services.search import invalidate_search_results
+
+    categories = seed_categories()
+    existing = ServiceProvider.objects.filter(telegram_user_id__gte=TELEGRAM_ID_BASE).count()
+    rng = random.Random(seed + existing)
+
+    for start in range(existing, total, batch_size):
+        batch = [
+            build_provider(number, categories, rng)
+            for number in range(start, min(start + batch_size, total))
+        ]
+        with transaction.atomic():
+            ServiceProvider.objects.bulk_create(batch, batch_size=batch_size)
+
+    refresh_category_counts()
+    invalidate_search_results(index_current=False)
+    return categories
+
+
+def seed_pending_payments(count, seed=0):
+    """
+    Create `count` synthetic PENDING payments, each with its own provider.
+
+    Ages run from RECONCILE_FIRST_CHECK to twice PAYMENT_ABANDON_AFTER, so
+    every payment is due for a check and the oldest can be abandoned; one
+    in ten is still waiting for its checkout link.
+    """
+    from datetime import timedelta
+
+    from django.conf import settings
+    from django.utils import timezone
+
+    from bot.models import Payment, ServiceProvider
+
+    rng = random.Random(seed)
+    categories = seed_categories()
+    providers = ServiceProvider.objects.bulk_create(
+        [build_provider(number, categories, rng) for number in range(count)]
+    )
+    payments = Payment.objects.bulk_create([
+        Payment(
+            provider=provider,
+            reference=f"EV-FAKE{number:07d}",
+            amount=settings.PLAN_PRICES.get(provider.plan_type, 150000),
+            plan_type=provider.plan_type,
+            authorization_url='' if number % 10 == 9 else f"https://checkout.paystack.com/fake{number}",
+        )
+        for number, provider in enumerate(providers)
+    ])
+
+    # created_at is auto_now_add, so backdate after the insert
+    now = timezone.now()
+    for payment in payments:
+        age = rng.uniform(settings.RECONCILE_FIRST_CHECK, 2 * settings.PAYMENT_ABANDON_AFTER)
+        Payment.objects.filter(id=payment.id).update(created_at=now - timedelta(seconds=age))
+    return payments
+
+
+def sample_queries(rng, count=20):
+    """
+    Return a mix of benchmark queries: exact keywords, category names,
+    prefixes, multi-word queries, typos and misses.
+    """
+    keywords = sorted({k for words in CATEGORY_KEYWORDS.values() for k in words})
+    queries = []
+    for i in range(count):
+        keyword = rng.choice(keywords)
+        kind = i % 6
+        if kind == 0:
+            queries.append(keyword)
+        elif kind == 1:
+            queries.append(rng.choice(list(CATEGORY_KEYWORDS)).lower())
+        elif kind == 2:
+            queries.append(keyword[:max(3, len(keyword) - 2)])
+        elif kind == 3:
+            queries.append(f"{keyword} {rng.choice(keywords)}")
+        elif kind == 4 and len(keyword) > 4:
+            # Drop one inner letter
+            cut = rng.randint(1, len(keyword) - 2)
+            queries.append(keyword[:cut] + keyword[cut + 1:])
+        else:
+            queries.append(f"zq{rng.randint(100, 999)}x")
+    return queries
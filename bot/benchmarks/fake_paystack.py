@@ -0,0 +1,184 @@
+"""
+Fake Paystack API
+A local HTTP server answering the two Paystack endpoints the bot uses, so
+payment code can be exercised without a Paystack account or network:
+
+- POST /transaction/initialize records a transaction (status "abandoned",
+  as Paystack reports unpaid ones) and returns a checkout URL
+- GET /transaction/verify/<reference> returns the transaction, or Paystack's
+  "Transaction reference not found" error
+
+Set a transaction's outcome with set_status(reference, 'success').
+
+Trouble can be injected: every response waits `latency` seconds (a number
+or a (low, high) range), a `failure_rate` share of requests get an HTTP
+`failure_status`, and fail_next(n) fails the next n requests.
+
+    with FakePaystack(latency=(0.05, 0.3), failure_rate=0.2) as paystack:
+        with override_settings(PAYSTACK_BASE_URL=paystack.url):
+            ...
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'FakePaystack/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._reply(400, {'status': False, 'message': 'Invalid JSON'})
+        failure = self.server.fake.trouble()
+        if failure:
+            return self._reply(failure, {'status': False, 'message': 'Injected failure'})
+        if self.path != '/transaction/initialize':
+            return self._reply(404, {'status': False, 'message': 'Not found'})
+        status, body = self.server.fake.initialize(payload)
+        self._reply(status, body)
+
+    def do_GET(self):
+        failure = self.server.fake.trouble()
+        if failure:
+            return self._reply(failure, {'status': False, 'message': 'Injected failure'})
+        prefix = '/transaction/verify/'
+        if not self.path.startswith(prefix):
+            return self._reply(404, {'status': False, 'message': 'Not found'})
+        status, body = self.server.fake.verify(self.path[len(prefix):])
+        self._reply(status, body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once; the default backlog of 5
+    # drops connects and adds seconds of SYN retries
+    request_queue_size = 128
+
+
+class FakePaystack:
+    """A fake Paystack API on 127.0.0.1, served from a background thread."""
+
+    def __init__(self, port=0, latency=0.0, failure_rate=0.0, failure_status=503, seed=None):
+        self.transactions = {}     # reference -> transaction dict
+        self.requests = 0
+        self.failures = 0          # injected failures served
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._fail_next = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server(('127.0.0.1', port), _Handler)
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-paystack', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Trouble
+
+    def fail_next(self, count=1):
+        """Fail the next `count` requests with failure_status."""
+        with self._lock:
+            self._fail_next += count
+
+    def trouble(self):
+        """Wait out the latency; return an HTTP status to fail with, or None."""
+        with self._lock:
+            self.requests += 1
+            latency = self.latency
+            if isinstance(latency, tuple):
+                latency = self._random.uniform(*latency)
+            if self._fail_next:
+                self._fail_next -= 1
+                fail = True
+            else:
+                fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        if latency:
+            time.sleep(latency)
+        return self.failure_status if fail else None
+
+    # Transactions
+
+    def add(self, reference, amount, status='abandoned'):
+        """Record a transaction as if it had been initialized."""
+        with self._lock:
+            self.transactions[reference] = {
+                'reference': reference,
+                'amount': amount,
+                'currency': 'NGN',
+                'status': status,
+                'paid_at': None,
+                'channel': None,
+            }
+
+    def set_status(self, reference, status):
+        """Set a transaction's outcome ('success', 'failed', 'abandoned', 'ongoing')."""
+        with self._lock:
+            transaction = self.transactions[reference]
+            transaction['status'] = status
+            if status == 'success':
+                transaction['paid_at'] = datetime.now(timezone.utc).isoformat()
+                transaction['channel'] = 'card'
+
+    def initialize(self, payload):
+        reference = payload.get('reference')
+        if not reference or not payload.get('amount'):
+            return 400, {'status': False, 'message': 'Invalid request'}
+        if reference in self.transactions:
+            return 400, {'status': False, 'message': 'Duplicate Transaction Reference'}
+        self.add(reference, payload['amount'])
+        return 200, {
+            'status': True,
+            'message': 'Authorization URL created',
+            'data': {
+                'authorization_url': f"{self.url}/checkout/{reference}",
+                'access_code': f"access_{reference}",
+                'reference': reference,
+            },
+        }
+
+    def verify(self, reference):
+        with self._lock:
+            transaction = self.transactions.get(reference)
+            transaction = dict(transaction) if transaction else None
+        if transaction is None:
+            return 400, {'status': False, 'message': 'Transaction reference not found'}
+        return 200, {'status': True, 'message': 'Verification successful', 'data': transaction}
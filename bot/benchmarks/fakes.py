@@ -0,0 +1,112 @@
+"""
+Fake Telegram objects
+Just enough of Update, CallbackQuery, Message and Context for the Purple
+Board handlers to run without a bot token or network. Outgoing messages
+are recorded instead of sent.
+"""
+from types import SimpleNamespace
+
+
+BENCH_CHAT_ID = 1000
+BENCH_USER_ID = 1000
+
+
+class FakeMessage:
+    def __init__(self, text='', chat_id=BENCH_CHAT_ID):
+        self.text = text
+        self.chat_id = chat_id
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append((text, kwargs))
+        return FakeMessage(text, self.chat_id)
+
+    async def delete(self):
+        return True
+
+
+class FakeCallbackQuery:
+    def __init__(self, data, message=None):
+        self.data = data
+        self.message = message or FakeMessage()
+        self.edits = []
+
+    async def answer(self, *args, **kwargs):
+        return True
+
+    async def edit_message_text(self, text, **kwargs):
+        self.edits.append((text, kwargs))
+        return True
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text, kwargs))
+        return FakeMessage(text, chat_id)
+
+    async def send_document(self, chat_id, document, **kwargs):
+        self.sent.append((chat_id, document, kwargs))
+        return FakeMessage('', chat_id)
+
+
+class FakeApplication:
+    """Records background tasks instead of running them."""
+
+    def __init__(self):
+        self.tasks = 0
+
+    def create_task(self, coroutine, *args, **kwargs):
+        self.tasks += 1
+        coroutine.close()
+
+
+class FakeContext:
+    def __init__(self):
+        self.user_data = {}
+        self.chat_data = {}
+        self.bot = FakeBot()
+        self.application = FakeApplication()
+
+
+def message_update(text):
+    """Return a fake Update carrying a text message."""
+    return SimpleNamespace(
+        message=FakeMessage(text),
+        callback_query=None,
+        effective_user=SimpleNamespace(id=BENCH_USER_ID),
+        effective_chat=SimpleNamespace(id=BENCH_CHAT_ID),
+    )
+
+
+def callback_update(data):
+    """Return a fake Update carrying a callback query."""
+    return SimpleNamespace(
+        message=None,
+        callback_query=FakeCallbackQuery(data),
+        effective_user=SimpleNamespace(id=BENCH_USER_ID),
+        effective_chat=SimpleNamespace(id=BENCH_CHAT_ID),
+    )
+
+
+def last_markup(update):
+    """Return the reply markup of the last message a handler sent or edited."""
+    if update.message and update.message.replies:
+        return update.message.replies[-1][1].get('reply_markup')
+    if update.callback_query and update.callback_query.edits:
+        return update.callback_query.edits[-1][1].get('reply_markup')
+    return None
+
+
+def find_callback(update, label):
+    """Return the callback_data of the first button whose text starts with `label`."""
+    markup = last_markup(update)
+    if markup is None:
+        return None
+    for row in markup.inline_keyboard:
+        for button in row:
+            if button.callback_data and button.text.startswith(label):
+                return button.callback_data
+    return None
@@ -0,0 +1,87 @@
+"""
+Paystack resilience benchmarks
+Runs concurrent verify_payment() calls against the fake Paystack server
+(bot/benchmarks/fake_paystack.py) in healthy, slow, flaky and outage
+conditions, once as a plain client (no retries, no circuit breaker) and
+once with the retries and breaker from settings, and reports latency,
+how many calls succeeded and how many requests reached "Paystack".
+"""
+import asyncio
+import time
+
+from django.test.utils import override_settings
+
+from bot.benchmarks.fake_paystack import FakePaystack
+from bot.benchmarks.search import percentile
+
+
+SCENARIOS = [
+    ('healthy', {'latency': 0.05}),
+    ('slow', {'latency': (0.2, 1.0)}),
+    ('flaky (30% 503)', {'latency': 0.05, 'failure_rate': 0.3}),
+    ('outage (all 503)', {'latency': 0.05, 'failure_rate': 1.0}),
+]
+
+
+class PaystackBenchmark:
+    def __init__(self, calls=200, concurrency=20, seed=0):
+        self.calls = calls
+        self.concurrency = concurrency
+        self.seed = seed
+
+    def run(self):
+        """Run every scenario in both modes and return a list of result dicts."""
+        results = []
+        for name, trouble in SCENARIOS:
+            for mode in ('plain', 'resilient'):
+                with FakePaystack(seed=self.seed, **trouble) as paystack:
+                    results.append(asyncio.run(self._run(name, mode, paystack)))
+        return results
+
+    async def _run(self, scenario, mode, paystack):
+        from bot.services import paystack as client
+
+        references = [f"EV-BENCH{i:05d}" for i in range(self.calls)]
+        for reference in references:
+            paystack.add(reference, 150000, status='success')
+
+        overrides = {'PAYSTACK_BASE_URL': paystack.url}
+        saved_threshold = client.breaker.failure_threshold
+        if mode == 'plain':
+            overrides['PAYSTACK_RETRIES'] = 0
+            client.breaker.failure_threshold = float('inf')
+        client.breaker.reset()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timings, successes = [], 0
+
+        async def verify(reference):
+            nonlocal successes
+            async with semaphore:
+                started = time.perf_counter()
+                result = await client.verify_payment(reference)
+                timings.append(time.perf_counter() - started)
+                successes += bool(result.get('success'))
+
+        started = time.perf_counter()
+        try:
+            with override_settings(**overrides):
+                await asyncio.gather(*(verify(reference) for reference in references))
+        finally:
+            elapsed = time.perf_counter() - started
+            client.breaker.failure_threshold = saved_threshold
+            rejected = client.breaker.rejected
+            client.breaker.reset()
+            await client.close_client()
+
+        return {
+            'scenario': scenario,
+            'mode': mode,
+            'calls': self.calls,
+            'succeeded': successes,
+            'requests': paystack.requests,
+            'failed_fast': rejected,
+            'p50_ms': percentile(timings, 0.50) * 1000,
+            'p95_ms': percentile(timings, 0.95) * 1000,
+            'seconds': elapsed,
+        }
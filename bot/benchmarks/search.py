@@ -0,0 +1,196 @@
+"""
+Purple Board search benchmarks
+Drives the search handlers with fake updates against a seeded corpus and
+measures latency (p50/p95), database queries and peak Python memory per
+handler call.
+
+Queries run on the bot's database pool threads (bot/db.py), so they are
+counted with an execute wrapper installed on every connection as it is
+created.
+"""
+import asyncio
+import random
+import time
+import tracemalloc
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from bot.benchmarks.corpus import sample_queries
+from bot.db import database_sync_to_async
+from bot.benchmarks.fakes import FakeContext, callback_update, find_callback, message_update
+
+
+class QueryCounter:
+    """Counts SQL statements on every database connection (process-wide)."""
+
+    def __init__(self):
+        self.count = 0
+        self._installed = False
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self):
+        """Wrap the calling thread's connections and every one opened from now on."""
+        if not self._installed:
+            connection_created.connect(self._on_connection_created, weak=False)
+            self._installed = True
+        for connection in connections.all(initialized_only=True):
+            self._wrap(connection)
+
+    def _on_connection_created(self, sender, connection, **kwargs):
+        self._wrap(connection)
+
+    def _wrap(self, connection):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+query_counter = QueryCounter()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def drop_cached_results():
+    """Empty the search result cache without making the in-memory indexes stale."""
+    from bot.services.search import invalidate_search_results
+
+    # The corpus doesn't change, so the indexes still reflect it
+    invalidate_search_results(vocabulary_changed=False)
+
+
+def warm_indexes():
+    """Build the in-memory indexes, as post_init does at bot startup."""
+    from bot.services.search import provider_index
+    from bot.services.suggestions import keyword_suggester
+
+    provider_index.build()
+    keyword_suggester.build()
+
+
+class SearchBenchmark:
+    """Runs each Purple Board scenario `iterations` times and collects stats."""
+
+    def __init__(self, iterations=50, seed=0, trace_memory=True):
+        self.iterations = iterations
+        self.trace_memory = trace_memory
+        self.rng = random.Random(seed)
+        self.queries = sample_queries(self.rng)
+        self.counter = query_counter
+
+    def run(self, categories):
+        """Run every scenario and return a list of result dicts."""
+        self.category_ids = [category.id for category in categories]
+        self.counter.install()
+        return asyncio.run(self._run_all())
+
+    async def _run_all(self):
+        from bot.handlers.purple_board import get_purple_board_routes, handle_search_query
+        from bot.router import CallbackRouter
+
+        # Button presses go through the router, as in the bot
+        dispatch = CallbackRouter(get_purple_board_routes()).dispatch
+
+        def search_update(i):
+            update = message_update(self.queries[i % len(self.queries)])
+            context = FakeContext()
+            context.user_data['expecting_search'] = True
+            return update, context
+
+        async def search_then_next(i):
+            # First page (untimed), then follow its Next button
+            update, context = search_update(i)
+            await handle_search_query(update, context)
+            data = find_callback(update, "Next")
+            return (callback_update(data), context) if data else None
+
+        async def category_then_next(i):
+            update, context = callback_update(f"cat_{self._category(i)}"), FakeContext()
+            await dispatch(update, context)
+            data = find_callback(update, "Next")
+            return (callback_update(data), context) if data else None
+
+        async def uncached_search(i):
+            await database_sync_to_async(drop_cached_results)()
+            return search_update(i)
+
+        async def cached_search(i):
+            return search_update(i)
+
+        async def category(i):
+            return callback_update(f"cat_{self._category(i)}"), FakeContext()
+
+        async def directory(i):
+            return callback_update("section_purple"), FakeContext()
+
+        await database_sync_to_async(warm_indexes)()
+        return await self._run_scenarios([
+            ('search (uncached)', handle_search_query, uncached_search),
+            ('search (cached)', handle_search_query, cached_search),
+            ('search next page', dispatch, search_then_next),
+            ('browse_category', dispatch, category),
+            ('category next page', dispatch, category_then_next),
+            ('category directory', dispatch, directory),
+        ])
+
+    async def _run_scenarios(self, scenarios):
+        results = []
+        for name, handler, prepare in scenarios:
+            # One untimed pass warms connections, card caches and imports
+            await self._measure(handler, prepare, passes=min(len(self.queries), self.iterations))
+            timings, queries = await self._measure(handler, prepare, self.iterations)
+            peak = 0
+            if self.trace_memory:
+                peak = await self._measure_memory(handler, prepare, max(1, self.iterations // 10))
+            if not timings:
+                continue
+            results.append({
+                'scenario': name,
+                'calls': len(timings),
+                'p50_ms': percentile(timings, 0.50) * 1000,
+                'p95_ms': percentile(timings, 0.95) * 1000,
+                'queries': sum(queries) / len(queries),
+                'peak_kib': peak / 1024,
+            })
+        return results
+
+    def _category(self, i):
+        return self.category_ids[i % len(self.category_ids)]
+
+    async def _measure(self, handler, prepare, passes):
+        timings, queries = [], []
+        for i in range(passes):
+            prepared = await prepare(i)
+            if prepared is None:
+                continue
+            update, context = prepared
+            before = self.counter.count
+            started = time.perf_counter()
+            await handler(update, context)
+            timings.append(time.perf_counter() - started)
+            queries.append(self.counter.count - before)
+        return timings, queries
+
+    async def _measure_memory(self, handler, prepare, passes):
+        peak = 0
+        tracemalloc.start()
+        try:
+            for i in range(passes):
+                prepared = await prepare(i)
+                if prepared is None:
+                    continue
+                update, context = prepared
+                baseline = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                await handler(update, context)
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+        finally:
+            tracemalloc.stop()
+        return peak
@@ -1,6 +1,7 @@
 """
 Eagles View Telegram Bot - Main Application
 """
+import asyncio
 import os
 import django
 
@@ -12,70 +13,169 @@ from telegram.ext import Application, Defaults
 from telegram.request import HTTPXRequest
 from django.conf import settings
 
-from bot.handlers.start import get_start_handlers
-from bot.handlers.home import get_home_handlers
-from bot.handlers.news import get_news_handlers
-from bot.handlers.purple_board import get_purple_board_handlers
-from bot.handlers.chancellors import get_chancellors_handlers
-from bot.handlers.registration import get_registration_handler, get_payment_verification_handler
+from bot.db import database_sync_to_async
+from bot.metrics import instrument_handlers, start_metrics_server
+from bot.handlers.start import get_start_handlers, get_start_routes
+from bot.handlers.home import get_home_routes
+from bot.handlers.news import get_news_routes
+from bot.handlers.purple_board import get_purple_board_handlers, get_purple_board_routes
+from bot.handlers.chancellors import get_chancellors_routes
+from bot.handlers.inline import get_inline_handlers
+from bot.handlers.admin import get_admin_handlers
+from bot.handlers.registration import get_registration_handler, get_payment_verification_routes
+from bot.persistence import DjangoPersistence
+from bot.profiler import profile
+from bot.rate_limiter import PriorityRateLimiter
+from bot.router import CallbackRouter
+from bot.services.paystack import close_client as close_paystack_client
+from bot.services.reconciler import schedule_reconciler
+from bot.services.search import provider_index
+from bot.services.suggestions import keyword_suggester
+from bot.update_processor import ChatOrderedUpdateProcessor
 
 
-def create_application() -> Application:
-    """Create and configure the bot application."""
+ALLOWED_UPDATES = ["message", "callback_query", "inline_query"]
+
+
+async def post_init(application: Application) -> None:
+    """Warm up in-process caches before polling starts."""
+    application.persistence.set_application(application)
+    await database_sync_to_async(provider_index.build)()
+    await database_sync_to_async(keyword_suggester.build)()
+
+
+async def post_shutdown(application: Application) -> None:
+    """Close the shared Paystack connections."""
+    await close_paystack_client()
+
+
+def create_callback_router() -> CallbackRouter:
+    """Route every button press outside the registration conversation."""
+    return CallbackRouter(
+        # Payment verification ("I've Paid" button, outside the conversation)
+        get_payment_verification_routes()
+        + get_start_routes()
+        + get_home_routes()
+        + get_news_routes()
+        + get_purple_board_routes()
+        + get_chancellors_routes()
+    )
+
+
+def create_application(webhook: bool = False) -> Application:
+    """
+    Create and configure the bot application.
     
-    # Configure request with longer timeouts
+    With webhook=True there is no Updater; updates are put on the
+    application's update_queue by the webhook view (see bot/webhook.py).
+    """
+    
+    # Configure request with longer timeouts (one connection per concurrent handler)
     request = HTTPXRequest(
-        connection_pool_size=8,
+        connection_pool_size=max(8, settings.UPDATE_CONCURRENCY),
         read_timeout=30.0,
         write_timeout=30.0,
         connect_timeout=30.0,
     )
     
     # Create the Application with custom request
-    application = (
+    builder = (
         Application.builder()
         .token(settings.TELEGRAM_BOT_TOKEN)
         .request(request)
-        .build()
+        .rate_limiter(PriorityRateLimiter())
+        .concurrent_updates(ChatOrderedUpdateProcessor(
+            max_running=settings.UPDATE_CONCURRENCY,
+            max_pending=settings.UPDATE_MAX_PENDING,
+        ))
+        .persistence(DjangoPersistence())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
     )
+    if webhook:
+        builder = builder.updater(None)
+    application = builder.build()
     
     # Add handlers
     # Registration conversation handler must be added first (before purple board's message handler)
     application.add_handler(get_registration_handler())
     
-    # Payment verification handler (outside conversation, handles "I've Paid" button)
-    application.add_handler(get_payment_verification_handler())
+    # All other buttons: one handler, routed on callback_data (see bot/router.py)
+    application.add_handler(create_callback_router())
     
     # Add start handlers
     for handler in get_start_handlers():
         application.add_handler(handler)
     
-    # Add section handlers
-    for handler in get_home_handlers():
+    # Purple board message handler (search)
+    for handler in get_purple_board_handlers():
         application.add_handler(handler)
     
-    for handler in get_news_handlers():
+    # Inline mode (@bot query from any chat) - enable with BotFather /setinline
+    for handler in get_inline_handlers():
         application.add_handler(handler)
     
-    # Purple board handlers (includes message handler for search)
-    for handler in get_purple_board_handlers():
+    # Admin-only commands (/profile)
+    for handler in get_admin_handlers():
         application.add_handler(handler)
     
-    for handler in get_chancellors_handlers():
-        application.add_handler(handler)
+    # Re-check pending payments the Paystack webhook hasn't confirmed
+    if application.job_queue is not None:
+        schedule_reconciler(application.job_queue)
+    else:
+        print("JobQueue not installed (python-telegram-bot[job-queue]); payment reconciliation is off")
+    
+    # Handler latency and update queue metrics (served at /metrics)
+    instrument_handlers(application)
     
     return application
 
 
-def main():
-    """Run the bot."""
+async def set_webhook() -> None:
+    """Point Telegram at the webhook endpoint served by the web app."""
+    application = create_application(webhook=True)
+    async with application:
+        await application.bot.set_webhook(
+            url=settings.TELEGRAM_WEBHOOK_URL,
+            secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+            allowed_updates=ALLOWED_UPDATES,
+        )
+
+
+async def profile_startup(seconds: int) -> None:
+    """Profile the bot for its first `seconds` seconds and print the summary."""
+    profiler, path = await profile(seconds)
+    print(f"Profile saved to {path}\n{profiler.summary()}")
+
+
+def main(mode: str = 'polling', profile_seconds: int = None):
+    """Run the bot (polling), or register the webhook (webhook)."""
     print("🦅 Starting Eagles View Bot...")
     print(f"Bot username: @{settings.TELEGRAM_BOT_USERNAME}")
     
+    if mode == 'webhook':
+        # Updates are served by the web app (EaglesViewTGBot/asgi.py)
+        asyncio.run(set_webhook())
+        print(f"Webhook set to {settings.TELEGRAM_WEBHOOK_URL}")
+        return
+    
     application = create_application()
     
-    # Run the bot until Ctrl-C is pressed
-    application.run_polling(allowed_updates=["message", "callback_query"])
+    # The web process's /metrics relays this process's registry
+    if settings.BOT_METRICS_PORT:
+        try:
+            start_metrics_server(settings.BOT_METRICS_PORT)
+        except OSError as e:
+            print(f"Metrics server not started: {e}")
+    
+    if profile_seconds:
+        async def post_init_with_profile(app: Application) -> None:
+            await post_init(app)
+            asyncio.get_running_loop().create_task(profile_startup(profile_seconds))
+        application.post_init = post_init_with_profile
+    
+    # Run the bot until Ctrl-C is pressed (this also removes any webhook)
+    application.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == "__main__":
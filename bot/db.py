@@ -0,0 +1,43 @@
+"""
+Bot database access
+Handlers run their ORM calls with @database_sync_to_async, which uses a
+bounded thread pool (BOT_DB_POOL_SIZE threads, one connection each)
+instead of sync_to_async's single shared thread. Queries from different
+updates then run in parallel, up to the pool size.
+
+Each call is wrapped in close_old_connections(), as Django does around a
+request, so a pool thread's connection is reused until CONN_MAX_AGE and
+replaced if the database dropped it. Its queries are counted and timed
+for the metrics (bot/metrics.py).
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from bot.metrics import record_query
+
+
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.BOT_DB_POOL_SIZE,
+    thread_name_prefix='bot-db',
+)
+
+
+def database_sync_to_async(func):
+    """Like sync_to_async, but runs `func` on the bot's database pool."""
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        # Installed once per pool thread's connection; execute_wrapper()
+        # would pop whichever wrapper was added last, not necessarily ours
+        if record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_query)
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False, executor=db_executor)
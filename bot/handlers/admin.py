@@ -0,0 +1,41 @@
+"""
+Admin commands - operator tools, only for the Telegram users in BOT_ADMIN_IDS
+"""
+from telegram import Update
+from telegram.ext import ContextTypes, CommandHandler, filters
+from django.conf import settings
+
+from bot.profiler import ProfilerBusy, profile
+
+
+DEFAULT_PROFILE_SECONDS = 30
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /profile [seconds] - sample the bot process and reply with a summary."""
+    try:
+        seconds = int(context.args[0]) if context.args else DEFAULT_PROFILE_SECONDS
+    except ValueError:
+        await update.message.reply_text("Usage: /profile [seconds]")
+        return
+    seconds = max(1, min(seconds, settings.PROFILE_MAX_SECONDS))
+    
+    await update.message.reply_text(f"⏱ Profiling for {seconds}s...")
+    try:
+        profiler, path = await profile(seconds)
+    except ProfilerBusy:
+        await update.message.reply_text("A profile is already running.")
+        return
+    
+    # Telegram messages are limited to 4096 characters
+    summary = profiler.summary()[:3500]
+    await update.message.reply_text(f"Saved to {path}\n\n{summary}")
+
+
+def get_admin_handlers():
+    """Return handlers for admin commands."""
+    admins = filters.User(user_id=settings.BOT_ADMIN_IDS)
+    return [
+        # Non-blocking so the admin's chat isn't held up while sampling
+        CommandHandler("profile", profile_command, filters=admins, block=False),
+    ]
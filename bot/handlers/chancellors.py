@@ -2,9 +2,10 @@
 Chancellors section handler - Sports, fixtures, results, leaderboard
 """
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 from django.utils import timezone
-from asgiref.sync import sync_to_async
+
+from bot.db import database_sync_to_async
 
 
 async def chancellors_section(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -56,7 +57,7 @@ async def show_fixtures(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     query = update.callback_query
     await query.answer()
     
-    @sync_to_async
+    @database_sync_to_async
     def get_fixtures():
         now = timezone.now()
         return list(Fixture.objects.filter(match_date__gte=now).order_by('match_date')[:10])
@@ -96,7 +97,7 @@ async def show_results(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     query = update.callback_query
     await query.answer()
     
-    @sync_to_async
+    @database_sync_to_async
     def get_results():
         return list(Result.objects.select_related('fixture').order_by('-created_at')[:10])
     
@@ -135,7 +136,7 @@ async def show_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     query = update.callback_query
     await query.answer()
     
-    @sync_to_async
+    @database_sync_to_async
     def get_leaders():
         return list(FantasyLeaderboard.objects.order_by('rank')[:20])
     
@@ -178,7 +179,7 @@ async def show_announcements(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     
-    @sync_to_async
+    @database_sync_to_async
     def get_announcements():
         return list(Announcement.objects.all()[:10])
     
@@ -208,12 +209,12 @@ async def show_announcements(update: Update, context: ContextTypes.DEFAULT_TYPE)
     )
 
 
-def get_chancellors_handlers():
-    """Return handlers for Chancellors section."""
+def get_chancellors_routes():
+    """Return callback routes for Chancellors section."""
     return [
-        CallbackQueryHandler(chancellors_section, pattern="^section_chancellors$"),
-        CallbackQueryHandler(show_fixtures, pattern="^chancellors_fixtures$"),
-        CallbackQueryHandler(show_results, pattern="^chancellors_results$"),
-        CallbackQueryHandler(show_leaderboard, pattern="^chancellors_leaderboard$"),
-        CallbackQueryHandler(show_announcements, pattern="^chancellors_announcements$"),
+        ("section_chancellors", chancellors_section),
+        ("chancellors_fixtures", show_fixtures),
+        ("chancellors_results", show_results),
+        ("chancellors_leaderboard", show_leaderboard),
+        ("chancellors_announcements", show_announcements),
     ]
@@ -2,12 +2,12 @@
 Home/Ads Hub handler - Display advertisements
 """
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
-from django.conf import settings
+from telegram.ext import ContextTypes
 from django.db.models import Q
 from django.utils import timezone
-from asgiref.sync import sync_to_async
-import os
+
+from bot.db import database_sync_to_async
+from bot.services.media import send_media
 
 
 async def home_section(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -18,8 +18,8 @@ async def home_section(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     # Import here to avoid circular imports
     from bot.models import Advertisement
     
-    # Get active ads using sync_to_async
-    @sync_to_async
+    # Get active ads
+    @database_sync_to_async
     def get_ads():
         now = timezone.now()
         ads = Advertisement.objects.filter(
@@ -82,9 +82,6 @@ async def show_ad(update: Update, context: ContextTypes.DEFAULT_TYPE, edit: bool
     if ad.get('caption'):
         caption += f"\n\n{ad['caption']}"
     
-    # Get the media file path
-    media_path = os.path.join(settings.MEDIA_ROOT, str(ad['media_file']))
-    
     query = update.callback_query
     chat_id = query.message.chat_id
     
@@ -94,62 +91,42 @@ async def show_ad(update: Update, context: ContextTypes.DEFAULT_TYPE, edit: bool
     except:
         pass
     
-    if ad['ad_type'] == 'VIDEO':
-        if os.path.exists(media_path):
-            with open(media_path, 'rb') as video:
-                await context.bot.send_video(
-                    chat_id=chat_id,
-                    video=video,
-                    caption=caption,
-                    parse_mode='Markdown',
-                    reply_markup=reply_markup
-                )
-        else:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=caption + "\n\n_(Video not available)_",
-                parse_mode='Markdown',
-                reply_markup=reply_markup
-            )
-    else:  # PICTURE
-        if os.path.exists(media_path):
-            with open(media_path, 'rb') as photo:
-                await context.bot.send_photo(
-                    chat_id=chat_id,
-                    photo=photo,
-                    caption=caption,
-                    parse_mode='Markdown',
-                    reply_markup=reply_markup
-                )
-        else:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=caption + "\n\n_(Image not available)_",
-                parse_mode='Markdown',
-                reply_markup=reply_markup
-            )
+    kind = 'video' if ad['ad_type'] == 'VIDEO' else 'photo'
+    message = await send_media(
+        context.bot, kind, str(ad['media_file']), chat_id,
+        caption=caption,
+        parse_mode='Markdown',
+        reply_markup=reply_markup
+    )
+    if message is None:
+        missing = "Video" if kind == 'video' else "Image"
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=caption + f"\n\n_({missing} not available)_",
+            parse_mode='Markdown',
+            reply_markup=reply_markup
+        )
 
 
-async def ad_navigation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle ad navigation."""
+async def ad_navigation(update: Update, context: ContextTypes.DEFAULT_TYPE, action: str) -> None:
+    """Handle ad navigation (action is prev, next or count)."""
     query = update.callback_query
     await query.answer()
     
-    action = query.data
     ads = context.user_data.get('ads', [])
     index = context.user_data.get('current_ad_index', 0)
     
-    if action == "ad_next" and index < len(ads) - 1:
+    if action == "next" and index < len(ads) - 1:
         context.user_data['current_ad_index'] = index + 1
-    elif action == "ad_prev" and index > 0:
+    elif action == "prev" and index > 0:
         context.user_data['current_ad_index'] = index - 1
     
     await show_ad(update, context)
 
 
-def get_home_handlers():
-    """Return handlers for home section."""
+def get_home_routes():
+    """Return callback routes for home section."""
     return [
-        CallbackQueryHandler(home_section, pattern="^section_home$"),
-        CallbackQueryHandler(ad_navigation, pattern="^ad_(prev|next|count)$"),
+        ("section_home", home_section),
+        ("ad_<prev|next|count:action>", ad_navigation),
     ]
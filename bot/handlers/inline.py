@@ -0,0 +1,90 @@
+"""
+Inline mode handler - Purple Board search from any chat
+Usage: @eaglesvieweaglebot lash
+"""
+import asyncio
+
+from telegram import (
+    Update, InlineKeyboardButton, InlineKeyboardMarkup,
+    InlineQueryResultArticle, InputTextMessageContent
+)
+from telegram.ext import ContextTypes, InlineQueryHandler
+from django.conf import settings
+
+from bot.db import database_sync_to_async
+from bot.handlers.purple_board import RESULTS_PER_PAGE
+
+
+INLINE_RESULTS_PER_PAGE = 20
+
+
+async def inline_search(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Answer inline queries with provider cards from the Purple Board search."""
+    from bot.services.cards import get_cards
+    from bot.services.pagination import cached_search_ids
+    from bot.services.search_cache import normalize_query
+
+    inline_query = update.inline_query
+    query_text = normalize_query(inline_query.query)
+
+    if len(query_text) < 2:
+        await inline_query.answer([], cache_time=settings.INLINE_CACHE_TIME)
+        return
+
+    # Debounce: inline mode sends a query per keystroke. Wait briefly and
+    # drop this one if the user has typed more since.
+    context.user_data['inline_query_id'] = inline_query.id
+    await asyncio.sleep(settings.INLINE_DEBOUNCE_SECONDS)
+    if context.user_data.get('inline_query_id') != inline_query.id:
+        return
+
+    try:
+        offset = int(inline_query.offset or 0)
+    except ValueError:
+        offset = 0
+
+    @database_sync_to_async
+    def get_results(q, start):
+        # Same shared ranking as the Purple Board search, so pages are cache hits
+        result_ids = cached_search_ids(q, RESULTS_PER_PAGE)
+        cards = get_cards(result_ids[start:start + INLINE_RESULTS_PER_PAGE])
+        has_more = start + INLINE_RESULTS_PER_PAGE < len(result_ids)
+        return cards, has_more
+
+    cards, has_more = await get_results(query_text, offset)
+
+    results = []
+    for card in cards:
+        # Callback buttons don't work on messages sent via inline mode
+        url_rows = [
+            [InlineKeyboardButton(**button) for button in row if 'url' in button]
+            for row in card['keyboard']
+        ]
+        url_rows = [row for row in url_rows if row]
+
+        badge = card.get('badge')
+        results.append(InlineQueryResultArticle(
+            id=str(card['id']),
+            title=f"{card['name']} {badge}" if badge else card['name'],
+            description=card.get('summary', ''),
+            input_message_content=InputTextMessageContent(
+                card['profile'],
+                parse_mode='Markdown'
+            ),
+            reply_markup=InlineKeyboardMarkup(url_rows) if url_rows else None,
+        ))
+
+    await inline_query.answer(
+        results,
+        cache_time=settings.INLINE_CACHE_TIME,
+        is_personal=False,
+        next_offset=str(offset + INLINE_RESULTS_PER_PAGE) if has_more else '',
+    )
+
+
+def get_inline_handlers():
+    """Return handlers for inline mode."""
+    return [
+        # Non-blocking so the debounce sleep doesn't hold up other updates
+        InlineQueryHandler(inline_search, block=False),
+    ]
@@ -2,10 +2,10 @@
 News section handler - Display news updates
 """
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
-from django.conf import settings
-from asgiref.sync import sync_to_async
-import os
+from telegram.ext import ContextTypes
+
+from bot.db import database_sync_to_async
+from bot.services.media import send_media
 
 
 NEWS_PER_PAGE = 5
@@ -28,7 +28,7 @@ async def show_news_list(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     page = context.user_data.get('news_page', 0)
     offset = page * NEWS_PER_PAGE
     
-    @sync_to_async
+    @database_sync_to_async
     def get_news_data():
         all_news = News.objects.filter(is_published=True)
         total_count = all_news.count()
@@ -115,17 +115,14 @@ async def show_news_list(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
 
 
-async def view_news(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def view_news(update: Update, context: ContextTypes.DEFAULT_TYPE, news_id: int) -> None:
     """Display a single news item."""
     from bot.models import News
     
     query = update.callback_query
     await query.answer()
     
-    # Extract news ID from callback data
-    news_id = int(query.data.replace("news_view_", ""))
-    
-    @sync_to_async
+    @database_sync_to_async
     def get_news(nid):
         try:
             return News.objects.get(id=nid)
@@ -161,23 +158,20 @@ async def view_news(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         [InlineKeyboardButton("« Main Menu", callback_data="main_menu")],
     ]
     
-    # Check if news has an image
+    # Check if news has an image (send the Telegram-sized rendition once it exists)
     if news.image:
-        image_path = os.path.join(settings.MEDIA_ROOT, str(news.image))
-        if os.path.exists(image_path):
+        image = news.image_rendition or news.image
+        message = await send_media(
+            context.bot, 'photo', image.name, query.message.chat_id,
+            caption=text,
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        if message is not None:
             try:
                 await query.message.delete()
             except:
                 pass
-            
-            with open(image_path, 'rb') as photo:
-                await context.bot.send_photo(
-                    chat_id=query.message.chat_id,
-                    photo=photo,
-                    caption=text,
-                    parse_mode='Markdown',
-                    reply_markup=InlineKeyboardMarkup(keyboard)
-                )
             return
     
     # No image, just text
@@ -197,26 +191,25 @@ async def view_news(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         )
 
 
-async def news_pagination(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle news pagination."""
+async def news_pagination(update: Update, context: ContextTypes.DEFAULT_TYPE, action: str) -> None:
+    """Handle news pagination (action is prev, next or info)."""
     query = update.callback_query
     await query.answer()
     
-    action = query.data
     page = context.user_data.get('news_page', 0)
     
-    if action == "news_page_next":
+    if action == "next":
         context.user_data['news_page'] = page + 1
-    elif action == "news_page_prev":
+    elif action == "prev":
         context.user_data['news_page'] = max(0, page - 1)
     
     await show_news_list(update, context)
 
 
-def get_news_handlers():
-    """Return handlers for news section."""
+def get_news_routes():
+    """Return callback routes for news section."""
     return [
-        CallbackQueryHandler(news_section, pattern="^section_news$"),
-        CallbackQueryHandler(view_news, pattern=r"^news_view_\d+$"),
-        CallbackQueryHandler(news_pagination, pattern="^news_page_(prev|next|info)$"),
+        ("section_news", news_section),
+        ("news_view_<int:news_id>", view_news),
+        ("news_page_<prev|next|info:action>", news_pagination),
     ]
@@ -3,35 +3,28 @@ Purple Board handler - Service Concierge (Core Feature)
 Search and discover service providers
 """
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler, MessageHandler, filters
-from django.db.models import Q, Case, When, Value, IntegerField
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes, MessageHandler, filters
 from django.conf import settings
-from asgiref.sync import sync_to_async
 import os
 
-
-RESULTS_PER_PAGE = 5
+from bot.db import database_sync_to_async
+from bot.services.cards import escape_md
+from bot.services.media import send_media
 
 
-def escape_md(text):
-    """Escape Markdown special characters in user input."""
-    if not text:
-        return text
-    text = str(text)
-    for char in ['_', '*', '`', '[']:
-        text = text.replace(char, f'\\{char}')
-    return text
+RESULTS_PER_PAGE = 5
 
 
-async def purple_board_section(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle Purple Board section."""
+async def purple_board_section(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int = 0) -> None:
+    """Handle Purple Board section (page is the category directory page)."""
     query = update.callback_query
     await query.answer()
     
     # Set state to expect search query
     context.user_data['expecting_search'] = True
-    context.user_data['search_results'] = []
-    context.user_data['search_page'] = 0
+    context.user_data.pop('search', None)
+    context.user_data.pop('search_position', None)
     
     text = """💜 *PURPLE BOARD*
 _Service Concierge_
@@ -47,30 +40,35 @@ Examples:
 
 _Or browse by category:_"""
     
-    # Get categories with active providers
-    from bot.models import Category
+    # Category directory page (busiest first)
+    from bot.services.directory import directory_page
     
-    @sync_to_async
+    @database_sync_to_async
     def get_categories():
-        return list(Category.objects.filter(
-            providers__is_approved=True,
-            providers__is_active=True
-        ).distinct()[:10])
+        return directory_page(page)
     
-    categories = await get_categories()
+    categories, has_next = await get_categories()
     
     keyboard = []
     
     # Category buttons (2 per row)
     cat_row = []
-    for cat in categories:
-        cat_row.append(InlineKeyboardButton(f"📁 {cat.name}", callback_data=f"cat_{cat.id}"))
+    for cat_id, cat_name, count in categories:
+        cat_row.append(InlineKeyboardButton(f"📁 {cat_name} ({count})", callback_data=f"cat_{cat_id}"))
         if len(cat_row) == 2:
             keyboard.append(cat_row)
             cat_row = []
     if cat_row:
         keyboard.append(cat_row)
     
+    nav_row = []
+    if page > 0:
+        nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"purple_cats_{page - 1}"))
+    if has_next:
+        nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"purple_cats_{page + 1}"))
+    if nav_row:
+        keyboard.append(nav_row)
+    
     keyboard.append([InlineKeyboardButton("« Back to Menu", callback_data="main_menu")])
     
     try:
@@ -94,7 +92,9 @@ async def handle_search_query(update: Update, context: ContextTypes.DEFAULT_TYPE
     if not context.user_data.get('expecting_search'):
         return
     
-    query_text = update.message.text.strip().lower()
+    from bot.services.search_cache import normalize_query
+    
+    query_text = normalize_query(update.message.text)
     
     if len(query_text) < 2:
         await update.message.reply_text(
@@ -105,103 +105,152 @@ async def handle_search_query(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         return
     
-    from bot.models import ServiceProvider
+    await run_search(update, context, query_text, from_message=True)
+
+
+async def run_search(update: Update, context: ContextTypes.DEFAULT_TYPE, query_text: str, from_message: bool) -> None:
+    """Search for a normalized query and show the first page, or suggestions."""
+    from bot.services.search import provider_index
+    from bot.services.pagination import cached_search_ids
+    from bot.services.suggestions import keyword_suggester
     
-    @sync_to_async
+    @database_sync_to_async
     def search_providers(q):
-        providers = ServiceProvider.objects.filter(
-            is_approved=True,
-            is_active=True
-        ).filter(
-            Q(name__icontains=q) |
-            Q(description__icontains=q) |
-            Q(keywords__icontains=q) |
-            Q(category__name__icontains=q)
-        ).annotate(
-            plan_priority=Case(
-                When(plan_type='PREMIUM', then=Value(3)),
-                When(plan_type='VERIFIED', then=Value(2)),
-                When(plan_type='BASIC', then=Value(1)),
-                default=Value(0),
-                output_field=IntegerField()
-            )
-        ).order_by('-plan_priority', '-created_at')
-        return list(providers.values_list('id', flat=True))
-    
-    result_ids = await search_providers(query_text)
+        index_warm = provider_index.is_warm()
+        suggester_warm = keyword_suggester.is_warm()
+        result_ids = cached_search_ids(q, RESULTS_PER_PAGE)
+        suggestions = []
+        if not result_ids and suggester_warm:
+            suggestions = keyword_suggester.suggest(q)
+        return result_ids, suggestions, index_warm, suggester_warm
+    
+    result_ids, suggestions, index_warm, suggester_warm = await search_providers(query_text)
+    
+    # Rebuild whichever is stale in the background (refresh() skips a
+    # structure that is warm again or already being rebuilt)
+    if not index_warm:
+        context.application.create_task(database_sync_to_async(provider_index.refresh)())
+    if not suggester_warm:
+        context.application.create_task(database_sync_to_async(keyword_suggester.refresh)())
     
     if not result_ids:
-        await update.message.reply_text(
-            f"🔍 No providers found for *{query_text}*\n\nTry a different keyword!",
-            parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔍 Search Again", callback_data="section_purple"),
-                InlineKeyboardButton("« Menu", callback_data="main_menu")
-            ]])
-        )
+        text = f"🔍 No providers found for *{escape_md(query_text)}*\n\n"
+        keyboard = []
+        # Suggestion buttons run the search directly (callback data max 64 bytes)
+        suggestions = [s for s in suggestions if len(f"suggest_{s}".encode()) <= 64]
+        if suggestions:
+            text += "Did you mean:"
+            keyboard = [
+                [InlineKeyboardButton(f"🔍 {suggestion}", callback_data=f"suggest_{suggestion}")]
+                for suggestion in suggestions
+            ]
+        else:
+            text += "Try a different keyword!"
+        keyboard.append([
+            InlineKeyboardButton("🔍 Search Again", callback_data="section_purple"),
+            InlineKeyboardButton("« Menu", callback_data="main_menu")
+        ])
+        
+        if from_message:
+            await update.message.reply_text(
+                text,
+                parse_mode='Markdown',
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+        else:
+            await update.callback_query.edit_message_text(
+                text,
+                parse_mode='Markdown',
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
         return
     
-    # Store results
-    context.user_data['search_results'] = result_ids
-    context.user_data['search_page'] = 0
-    context.user_data['search_query'] = query_text
+    # Store only the query; pages are fetched on demand
+    context.user_data['search'] = {'kind': 'query', 'key': query_text, 'title': query_text}
+    context.user_data['search_position'] = {'page': 0, 'cursor': None, 'backwards': False}
     
-    await show_search_results(update, context, from_message=True)
+    await show_search_results(update, context, from_message=from_message)
+
+
+async def suggested_search(update: Update, context: ContextTypes.DEFAULT_TYPE, term: str) -> None:
+    """Run the search for a tapped suggestion button."""
+    from bot.services.search_cache import normalize_query
+    
+    query = update.callback_query
+    await query.answer()
+    
+    context.user_data['expecting_search'] = True
+    query_text = normalize_query(term)
+    await run_search(update, context, query_text, from_message=False)
 
 
 async def show_search_results(update: Update, context: ContextTypes.DEFAULT_TYPE, from_message: bool = False) -> None:
-    """Display search results with pagination."""
-    from bot.models import ServiceProvider
+    """Display one page of search results, fetched with a keyset cursor."""
+    from bot.services.pagination import (
+        cached_search_ids, ranked_page, category_page, category_total
+    )
     
-    result_ids = context.user_data.get('search_results', [])
-    page = context.user_data.get('search_page', 0)
-    query_text = context.user_data.get('search_query', '')
+    search = context.user_data.get('search')
+    position = context.user_data.get('search_position', {'page': 0, 'cursor': None, 'backwards': False})
     
-    offset = page * RESULTS_PER_PAGE
-    page_ids = result_ids[offset:offset + RESULTS_PER_PAGE]
+    if not search:
+        return
+    
+    page = position['page']
     
-    @sync_to_async
-    def get_providers(ids):
-        providers = list(ServiceProvider.objects.filter(id__in=ids))
-        # Preserve order
-        return sorted(providers, key=lambda p: ids.index(p.id))
+    @database_sync_to_async
+    def get_page():
+        if search['kind'] == 'category':
+            if 'total' not in search:
+                search['total'] = category_total(search['key'])
+            result = category_page(
+                search['key'], position['cursor'], position['backwards'], RESULTS_PER_PAGE
+            )
+            return result, search['total']
+        
+        result_ids = cached_search_ids(search['key'], RESULTS_PER_PAGE)
+        result = ranked_page(
+            result_ids, position['cursor'], position['backwards'], RESULTS_PER_PAGE, page
+        )
+        return result, len(result_ids)
     
-    providers = await get_providers(page_ids)
+    result, total_count = await get_page()
     
-    total_count = len(result_ids)
-    total_pages = (total_count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
+    capped = total_count > settings.SEARCH_MAX_RESULTS
+    if capped:
+        total_label = f"{settings.SEARCH_MAX_RESULTS}+"
+        page_label = f"{page + 1}"
+    else:
+        total_pages = max(1, (total_count + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE)
+        total_label = f"{total_count}"
+        page_label = f"{page + 1}/{total_pages}"
     
-    text = f"🔍 Results for '{escape_md(query_text)}'\n"
-    text += f"{total_count} provider(s) found\n\n"
+    text = f"🔍 Results for '{escape_md(search['title'])}'\n"
+    text += f"{total_label} provider(s) found\n\n"
     
     keyboard = []
     
-    for provider in providers:
-        badge = provider.get_display_badge()
-        badge_str = f" {badge}" if badge else ""
-        
-        name = escape_md(provider.name)
-        desc = escape_md(provider.description[:80])
-        text += f"{name}{badge_str}\n"
-        text += f"📝 {desc}\n\n"
-        
-        name_short = provider.name[:20] + "..." if len(provider.name) > 20 else provider.name
+    for card in result.cards:
+        text += card['snippet']
         keyboard.append([
-            InlineKeyboardButton(
-                f"👤 View {name_short}", 
-                callback_data=f"provider_{provider.id}"
-            )
+            InlineKeyboardButton(card['button'], callback_data=f"provider_{card['id']}")
         ])
     
-    # Pagination
+    # Pagination - each button carries the cursor of the page boundary
     nav_row = []
-    if page > 0:
-        nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data="search_prev"))
+    if result.has_prev:
+        if page <= 1:
+            prev_data = "search_page_0_f_"
+        else:
+            prev_data = f"search_page_{page - 1}_b_{result.first_cursor}"
+        nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=prev_data))
     
-    nav_row.append(InlineKeyboardButton(f"{page + 1}/{total_pages}", callback_data="search_info"))
+    nav_row.append(InlineKeyboardButton(page_label, callback_data="search_info"))
     
-    if offset + RESULTS_PER_PAGE < total_count:
-        nav_row.append(InlineKeyboardButton("Next ▶️", callback_data="search_next"))
+    if result.has_next:
+        nav_row.append(InlineKeyboardButton(
+            "Next ▶️", callback_data=f"search_page_{page + 1}_f_{result.last_cursor}"
+        ))
     
     if nav_row:
         keyboard.append(nav_row)
@@ -237,41 +286,37 @@ async def show_search_results(update: Update, context: ContextTypes.DEFAULT_TYPE
             )
 
 
-async def search_pagination(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle search results pagination."""
+async def search_info(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Acknowledge a tap on the page counter."""
+    await update.callback_query.answer()
+
+
+async def search_pagination(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, page: int, direction: str, cursor: str
+) -> None:
+    """Handle search results pagination (search_page_<page>_<f|b>_<cursor>)."""
     query = update.callback_query
     await query.answer()
     
-    action = query.data
-    page = context.user_data.get('search_page', 0)
-    
-    if action == "search_next":
-        context.user_data['search_page'] = page + 1
-    elif action == "search_prev":
-        context.user_data['search_page'] = max(0, page - 1)
+    context.user_data['search_position'] = {
+        'page': page,
+        'cursor': cursor or None,
+        'backwards': direction == 'b',
+    }
     
     await show_search_results(update, context)
 
 
-async def view_provider(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def view_provider(update: Update, context: ContextTypes.DEFAULT_TYPE, provider_id: int) -> None:
     """Display provider profile with contact card."""
-    from bot.models import ServiceProvider
+    from bot.services.cards import get_card
     
     query = update.callback_query
     await query.answer()
     
-    provider_id = int(query.data.replace("provider_", ""))
+    card = await database_sync_to_async(get_card)(provider_id)
     
-    @sync_to_async
-    def get_provider(pid):
-        try:
-            return ServiceProvider.objects.select_related('category').get(id=pid)
-        except ServiceProvider.DoesNotExist:
-            return None
-    
-    provider = await get_provider(provider_id)
-    
-    if not provider:
+    if not card:
         await query.edit_message_text(
             "❌ Provider not found.",
             reply_markup=InlineKeyboardMarkup([[
@@ -280,54 +325,12 @@ async def view_provider(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
         return
     
-    # Build contact card (escape special markdown chars)
-    name = escape_md(provider.name)
-    badge = provider.get_display_badge()
-    desc = escape_md(provider.description)
-    
-    lines = [f"📋 {name}"]
-    if badge:
-        lines[0] += f" {badge}"
-    lines.append(f"\n📝 {desc}")
-    
-    if provider.phone:
-        lines.append(f"📞 {escape_md(provider.phone)}")
-    if provider.telegram_handle:
-        lines.append(f"💬 {escape_md(provider.telegram_handle)}")
-    if provider.instagram_handle:
-        lines.append(f"📸 {escape_md(provider.instagram_handle)}")
-    if provider.plan_type == 'PREMIUM' and provider.hall_of_residence:
-        lines.append(f"🏠 {escape_md(provider.hall_of_residence)}")
-    
-    text = "\n".join(lines)
-    
-    # Add keywords
-    if provider.keywords:
-        keywords = provider.keywords if isinstance(provider.keywords, list) else [provider.keywords]
-        text += f"\n\n🏷️ Keywords: {escape_md(', '.join(str(k) for k in keywords))}"
-    
-    # Add category
-    if provider.category:
-        text += f"\n📁 Category: {escape_md(provider.category.name)}"
-    
-    keyboard = []
-    
-    # Contact buttons
-    contact_row = []
-    if provider.telegram_handle:
-        handle = provider.telegram_handle.lstrip('@')
-        contact_row.append(InlineKeyboardButton("💬 Telegram", url=f"https://t.me/{handle}"))
-    
-    if provider.instagram_handle:
-        handle = provider.instagram_handle.lstrip('@')
-        contact_row.append(InlineKeyboardButton("📸 Instagram", url=f"https://instagram.com/{handle}"))
-    
-    if contact_row:
-        keyboard.append(contact_row)
-    
-    # Catalogue button
-    if provider.catalogue:
-        keyboard.append([InlineKeyboardButton("📄 View Catalogue", callback_data=f"catalogue_{provider.id}")])
+    # Cached contact card (already escaped) and contact/catalogue buttons
+    text = card['profile']
+    keyboard = [
+        [InlineKeyboardButton(**button) for button in row]
+        for row in card['keyboard']
+    ]
     
     keyboard.append([
         InlineKeyboardButton("« Back to Results", callback_data="search_back"),
@@ -348,16 +351,14 @@ async def view_provider(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
 
 
-async def view_catalogue(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def view_catalogue(update: Update, context: ContextTypes.DEFAULT_TYPE, provider_id: int) -> None:
     """Send provider's PDF catalogue."""
     from bot.models import ServiceProvider
     
     query = update.callback_query
     await query.answer("Sending catalogue...")
     
-    provider_id = int(query.data.replace("catalogue_", ""))
-    
-    @sync_to_async
+    @database_sync_to_async
     def get_provider(pid):
         try:
             return ServiceProvider.objects.get(id=pid)
@@ -371,15 +372,15 @@ async def view_catalogue(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     if provider.catalogue:
         try:
-            # Try using the URL (works with Cloudinary)
-            catalogue_url = provider.catalogue.url
-            await context.bot.send_document(
-                chat_id=query.message.chat_id,
-                document=catalogue_url,
+            message = await send_media(
+                context.bot, 'document', provider.catalogue.name, query.message.chat_id,
                 filename=f"{provider.name}_catalogue.pdf",
                 caption=f"📄 Catalogue for {escape_md(provider.name)}",
             )
-        except Exception:
+        except (TelegramError, OSError) as e:
+            print(f"Could not send catalogue of provider {provider.id}: {e}")
+            message = None
+        if message is None:
             # Fallback: try local file path
             catalogue_path = os.path.join(settings.MEDIA_ROOT, str(provider.catalogue))
             if os.path.exists(catalogue_path):
@@ -392,46 +393,27 @@ async def view_catalogue(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                     )
 
 
-async def browse_category(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def browse_category(update: Update, context: ContextTypes.DEFAULT_TYPE, category_id: int) -> None:
     """Browse providers in a specific category."""
-    from bot.models import ServiceProvider, Category
+    from bot.models import Category
     
     query = update.callback_query
     await query.answer()
     
-    category_id = int(query.data.replace("cat_", ""))
-    
-    @sync_to_async
-    def get_category_providers(cat_id):
+    @database_sync_to_async
+    def get_category(cat_id):
         try:
-            category = Category.objects.get(id=cat_id)
+            return Category.objects.get(id=cat_id)
         except Category.DoesNotExist:
-            return None, []
-        
-        providers = ServiceProvider.objects.filter(
-            category=category,
-            is_approved=True,
-            is_active=True
-        ).annotate(
-            plan_priority=Case(
-                When(plan_type='PREMIUM', then=Value(3)),
-                When(plan_type='VERIFIED', then=Value(2)),
-                When(plan_type='BASIC', then=Value(1)),
-                default=Value(0),
-                output_field=IntegerField()
-            )
-        ).order_by('-plan_priority', '-created_at')
-        
-        return category, list(providers.values_list('id', flat=True))
+            return None
     
-    category, result_ids = await get_category_providers(category_id)
+    category = await get_category(category_id)
     
     if not category:
         return
     
-    context.user_data['search_results'] = result_ids
-    context.user_data['search_page'] = 0
-    context.user_data['search_query'] = category.name
+    context.user_data['search'] = {'kind': 'category', 'key': category.id, 'title': category.name}
+    context.user_data['search_position'] = {'page': 0, 'cursor': None, 'backwards': False}
     
     await show_search_results(update, context)
 
@@ -446,11 +428,20 @@ async def search_back(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 def get_purple_board_handlers():
     """Return handlers for Purple Board section."""
     return [
-        CallbackQueryHandler(purple_board_section, pattern="^section_purple$"),
-        CallbackQueryHandler(view_provider, pattern=r"^provider_\d+$"),
-        CallbackQueryHandler(view_catalogue, pattern=r"^catalogue_\d+$"),
-        CallbackQueryHandler(browse_category, pattern=r"^cat_\d+$"),
-        CallbackQueryHandler(search_pagination, pattern="^search_(prev|next|info)$"),
-        CallbackQueryHandler(search_back, pattern="^search_back$"),
         MessageHandler(filters.TEXT & ~filters.COMMAND, handle_search_query),
     ]
+
+
+def get_purple_board_routes():
+    """Return callback routes for Purple Board section."""
+    return [
+        ("section_purple", purple_board_section),
+        ("purple_cats_<int:page>", purple_board_section),
+        ("provider_<int:provider_id>", view_provider),
+        ("catalogue_<int:provider_id>", view_catalogue),
+        ("cat_<int:category_id>", browse_category),
+        ("search_info", search_info),
+        ("search_page_<int:page>_<f|b:direction>_<rest:cursor>", search_pagination),
+        ("search_back", search_back),
+        ("suggest_<rest:term>", suggested_search),
+    ]
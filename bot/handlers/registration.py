@@ -7,6 +7,8 @@ from telegram.ext import (
     filters, ConversationHandler
 )
 from asgiref.sync import sync_to_async
+
+from bot.db import database_sync_to_async
 from django.conf import settings as django_settings
 
 
@@ -512,13 +514,14 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
     
     from bot.models import ServiceProvider, Category, Payment
     from bot.services.paystack import initialize_payment, generate_reference
+    from bot.services.media import key_for_content, remember as remember_media
     import os
     
-    @sync_to_async
+    @database_sync_to_async
     def check_existing(uid):
         return ServiceProvider.objects.filter(telegram_user_id=uid).exists()
     
-    @sync_to_async
+    @database_sync_to_async
     def get_or_create_category(cat_name):
         category, _ = Category.objects.get_or_create(
             name=cat_name,
@@ -526,27 +529,24 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return category
     
-    @sync_to_async
+    @database_sync_to_async
     def save_provider(provider):
         provider.save()
         return provider
     
-    @sync_to_async
-    def create_payment(provider, reference, amount, plan, auth_url):
+    @database_sync_to_async
+    def create_payment(provider, reference, amount, plan, auth_url, email):
         payment = Payment.objects.create(
             provider=provider,
             reference=reference,
             amount=amount,
             plan_type=plan,
             authorization_url=auth_url,
+            email=email,
         )
         return payment
     
-    @sync_to_async
-    def init_payment(email, amount, ref, metadata):
-        return initialize_payment(email, amount, ref, metadata)
-    
-    @sync_to_async
+    @sync_to_async(thread_sensitive=False)
     def gen_ref():
         return generate_reference()
     
@@ -582,6 +582,7 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
     )
     
     # Download and save catalogue if provided
+    catalogue_hash = None
     if reg.get('catalogue_file_id'):
         try:
             from django.core.files.base import ContentFile
@@ -597,7 +598,9 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
             
             # Save via Django's storage (works with Cloudinary or local)
             with open(tmp_path, 'rb') as f:
-                provider.catalogue.save(filename, ContentFile(f.read()), save=False)
+                content = f.read()
+            provider.catalogue.save(filename, ContentFile(content), save=False)
+            catalogue_hash = key_for_content(provider.catalogue.name, content)
             
             # Clean up temp file
             os.remove(tmp_path)
@@ -606,6 +609,10 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
     
     await save_provider(provider)
     
+    # The user's upload already has a file_id, so the catalogue is never re-uploaded
+    if provider.catalogue and catalogue_hash:
+        await remember_media(provider.catalogue.name, catalogue_hash, 'document', reg['catalogue_file_id'])
+    
     # --- PAYSTACK PAYMENT ---
     plan = reg.get('plan_type', 'BASIC')
     amount_kobo = django_settings.PLAN_PRICES.get(plan, 150000)
@@ -613,10 +620,10 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
     email = reg.get('email', f'{user_id}@eaglesview.bot')
     
     # Initialize Paystack transaction
-    result = await init_payment(
+    result = await initialize_payment(
         email=email,
-        amount=amount_kobo,
-        ref=reference,
+        amount_kobo=amount_kobo,
+        reference=reference,
         metadata={
             "provider_id": provider.id,
             "provider_name": provider.name,
@@ -629,7 +636,7 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
         auth_url = result['authorization_url']
         
         # Save payment record
-        await create_payment(provider, reference, amount_kobo, plan, auth_url)
+        await create_payment(provider, reference, amount_kobo, plan, auth_url, email)
         
         # Store reference for verification
         context.user_data['payment_reference'] = reference
@@ -656,6 +663,28 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
         
         return ConversationHandler.END
     
+    elif result.get('retryable'):
+        # Paystack is down or slow: the link is generated in the background
+        # (bot/services/reconciler.py) and sent to the user when ready
+        await create_payment(provider, reference, amount_kobo, plan, '', email)
+        
+        await query.edit_message_text(
+            "✅ *REGISTRATION SAVED!*\n\n"
+            f"💰 *Plan:* {plan}\n"
+            f"📧 *Ref:* `{reference}`\n\n"
+            "⏳ Our payment provider is slow to respond right now.\n"
+            "We'll send your payment link here in a few minutes.",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup([[
+                InlineKeyboardButton("« Main Menu", callback_data="main_menu")
+            ]])
+        )
+        
+        context.user_data['registration'] = {}
+        context.user_data['expecting_search'] = True
+        
+        return ConversationHandler.END
+    
     else:
         # Payment initialization failed — save provider anyway
         error_msg = result.get('error', 'Unknown error')
@@ -678,45 +707,19 @@ async def complete_registration(update: Update, context: ContextTypes.DEFAULT_TY
         return ConversationHandler.END
 
 
-async def verify_payment_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Verify payment via Paystack API when user clicks 'I've Paid'."""
+async def verify_payment_handler(update: Update, context: ContextTypes.DEFAULT_TYPE, reference: str) -> None:
+    """
+    Show the payment's status when the user clicks 'I've Paid'.
+
+    Paystack's webhook (bot/views.py) confirms payments, so this only reads
+    the local row.
+    """
     query = update.callback_query
-    await query.answer("Verifying payment...")
-    
-    reference = query.data.replace("verify_payment_", "")
-    
-    from bot.models import Payment
-    from bot.services.paystack import verify_payment
-    from django.utils import timezone
-    
-    @sync_to_async
-    def do_verify(ref):
-        return verify_payment(ref)
+    await query.answer("Checking payment...")
     
-    @sync_to_async
-    def get_payment(ref):
-        try:
-            return Payment.objects.select_related('provider').get(reference=ref)
-        except Payment.DoesNotExist:
-            return None
-    
-    @sync_to_async
-    def update_payment_success(payment, paystack_data):
-        payment.status = 'SUCCESS'
-        payment.paystack_response = paystack_data
-        payment.verified_at = timezone.now()
-        payment.save()
-        # Also mark provider as paid (but still needs admin approval)
-        provider = payment.provider
-        provider.save()
-    
-    @sync_to_async
-    def update_payment_failed(payment, paystack_data):
-        payment.status = 'FAILED'
-        payment.paystack_response = paystack_data
-        payment.save()
+    from bot.services.payments import get_payment, payment_confirmed_text
     
-    # Get payment record
+    # Get payment record (repeat taps share one lookup)
     payment = await get_payment(reference)
     
     if not payment:
@@ -728,42 +731,16 @@ async def verify_payment_handler(update: Update, context: ContextTypes.DEFAULT_T
         )
         return
     
-    # Already verified?
     if payment.status == 'SUCCESS':
         await query.edit_message_text(
-            "✅ *Payment already verified!*\n\n"
-            "Your profile is pending admin approval.\n"
-            "You'll be visible in search once approved! 🎉",
+            payment_confirmed_text(payment),
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup([[
                 InlineKeyboardButton("« Main Menu", callback_data="main_menu")
             ]])
         )
-        return
-    
-    # Verify with Paystack
-    result = await do_verify(reference)
     
-    if result.get('success') and result.get('status') == 'success':
-        # Payment confirmed!
-        await update_payment_success(payment, result.get('data'))
-        
-        await query.edit_message_text(
-            "✅ *PAYMENT VERIFIED!* 🎉\n\n"
-            f"💰 Amount: ₦{payment.amount_naira:,.0f}\n"
-            f"📧 Ref: `{reference}`\n\n"
-            "Your profile is now *pending admin approval*.\n"
-            "Once approved, you'll appear in Purple Board search!\n\n"
-            "_Thank you for choosing Eagles View!_ 🦅",
-            parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("« Main Menu", callback_data="main_menu")
-            ]])
-        )
-    
-    elif result.get('success') and result.get('status') in ('abandoned', 'failed'):
-        await update_payment_failed(payment, result.get('data'))
-        
+    elif payment.status in ('FAILED', 'ABANDONED'):
         # Regenerate payment link
         auth_url = payment.authorization_url
         
@@ -779,15 +756,27 @@ async def verify_payment_handler(update: Update, context: ContextTypes.DEFAULT_T
             ])
         )
     
+    elif not payment.authorization_url:
+        # Link generation was queued while Paystack was unavailable
+        await query.edit_message_text(
+            "⏳ *Your payment link is on its way.*\n\n"
+            "Our payment provider was slow to respond; we'll send the link "
+            "here as soon as it's ready.",
+            parse_mode='Markdown',
+            reply_markup=InlineKeyboardMarkup([[
+                InlineKeyboardButton("« Main Menu", callback_data="main_menu")
+            ]])
+        )
+    
     else:
-        # Payment still pending or error
+        # Paystack hasn't confirmed it yet
         auth_url = payment.authorization_url
         
         await query.edit_message_text(
             "⏳ *Payment still pending...*\n\n"
-            "We couldn't confirm your payment yet.\n"
+            "We haven't received confirmation from Paystack yet.\n"
             "If you haven't paid, click 'Pay Now'.\n"
-            "If you just paid, wait a moment and try verifying again.",
+            "If you just paid, we'll message you here as soon as it's confirmed.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton("💳 Pay Now", url=auth_url)],
@@ -867,9 +856,13 @@ def get_registration_handler():
         ],
         allow_reentry=True,
         per_message=False,
+        name="registration",
+        persistent=True,
     )
 
 
-def get_payment_verification_handler():
-    """Return the handler for verifying payments (outside conversation)."""
-    return CallbackQueryHandler(verify_payment_handler, pattern=r"^verify_payment_")
+def get_payment_verification_routes():
+    """Return callback routes for verifying payments (outside conversation)."""
+    return [
+        ("verify_payment_<rest:reference>", verify_payment_handler),
+    ]
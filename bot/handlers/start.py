@@ -2,7 +2,7 @@
 Start command handler - Main menu for Eagles View Bot
 """
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
+from telegram.ext import ContextTypes, CommandHandler
 
 
 MAIN_MENU_TEXT = """
@@ -70,5 +70,11 @@ def get_start_handlers():
     """Return handlers for start command."""
     return [
         CommandHandler("start", start_command),
-        CallbackQueryHandler(main_menu_callback, pattern="^main_menu$"),
+    ]
+
+
+def get_start_routes():
+    """Return callback routes for the main menu."""
+    return [
+        ("main_menu", main_menu_callback),
     ]
@@ -0,0 +1,44 @@
+"""
+Django management command to benchmark Paystack calls under trouble
+Usage: python manage.py benchpaystack [--calls 200] [--concurrency 20]
+
+Runs against a local fake Paystack server (never the real API) that
+injects latency and failures; compares a plain client with the retries
+and circuit breaker from settings.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Benchmark Paystack verification against a fake server with injected latency and failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=200, help='verify_payment calls per run')
+        parser.add_argument('--concurrency', type=int, default=20, help='Calls in flight at once')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for injected trouble')
+        parser.add_argument('--json', dest='json_path', help='Also write results to this JSON file')
+
+    def handle(self, *args, **options):
+        from bot.benchmarks.paystack import PaystackBenchmark
+
+        benchmark = PaystackBenchmark(
+            calls=options['calls'], concurrency=options['concurrency'], seed=options['seed']
+        )
+        results = benchmark.run()
+
+        self.stdout.write(
+            f'  {"scenario":<18} {"mode":<10} {"ok":>5} {"requests":>8} {"fast":>5} '
+            f'{"p50 ms":>8} {"p95 ms":>8} {"total s":>8}'
+        )
+        for row in results:
+            self.stdout.write(
+                f'  {row["scenario"]:<18} {row["mode"]:<10} {row["succeeded"]:>5} {row["requests"]:>8} '
+                f'{row["failed_fast"]:>5} {row["p50_ms"]:>8.1f} {row["p95_ms"]:>8.1f} {row["seconds"]:>8.2f}'
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'\nResults written to {options["json_path"]}')
@@ -0,0 +1,44 @@
+"""
+Django management command to benchmark callback routing
+Usage: python manage.py benchrouter [--handlers 25 50 100] [--iterations 20000]
+
+Times how long it takes to find the handler for a button press, with the
+callback router and with the regex CallbackQueryHandler chain it replaced.
+Needs no database or bot token.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Benchmark callback query routing against the old regex handler chain'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--handlers', type=int, nargs='+', default=[25, 50, 100],
+            help='Handler counts to benchmark (padded with synthetic routes)'
+        )
+        parser.add_argument('--iterations', type=int, default=20000, help='Timed lookups per run')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the callback_data mix')
+        parser.add_argument('--json', dest='json_path', help='Also write results to this JSON file')
+
+    def handle(self, *args, **options):
+        from bot.benchmarks.callbacks import CallbackRoutingBenchmark
+
+        benchmark = CallbackRoutingBenchmark(iterations=options['iterations'], seed=options['seed'])
+        results = benchmark.run(options['handlers'])
+
+        self.stdout.write(
+            f'  {"handlers":>8} {"implementation":<14} {"p50 us":>8} {"p95 us":>8} {"mean us":>8}'
+        )
+        for row in results:
+            self.stdout.write(
+                f'  {row["handlers"]:>8} {row["implementation"]:<14} {row["p50_us"]:>8.2f} '
+                f'{row["p95_us"]:>8.2f} {row["mean_us"]:>8.2f}'
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'\nResults written to {options["json_path"]}')
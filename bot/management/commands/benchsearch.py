@@ -0,0 +1,79 @@
+"""
+Django management command to benchmark Purple Board search
+Usage: python manage.py benchsearch [--sizes 1000 10000 100000] [--iterations 50]
+
+Runs against a throwaway test database for whichever backend DATABASE_URL
+points at (SQLite by default, or a local PostgreSQL), never the real data,
+and a process-local cache instead of the shared CACHES, so the real search
+generation and provider cards are left alone.
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = 'Benchmark Purple Board search handlers on a synthetic provider corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+            help='Corpus sizes to benchmark, smallest first (the corpus grows between runs)'
+        )
+        parser.add_argument('--iterations', type=int, default=50, help='Timed calls per scenario')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for corpus and queries')
+        parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+        parser.add_argument('--json', dest='json_path', help='Also write results to this JSON file')
+
+    def handle(self, *args, **options):
+        from bot.benchmarks import BENCHMARK_CACHES
+
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            self._benchmark(options)
+
+    def _benchmark(self, options):
+        from bot.benchmarks.corpus import seed_providers
+        from bot.benchmarks.search import SearchBenchmark
+
+        vendor = connection.vendor
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Benchmarking on {vendor} ({connection.settings_dict["NAME"]})'))
+
+        report = []
+        try:
+            for size in sorted(options['sizes']):
+                started = time.perf_counter()
+                categories = seed_providers(size, seed=options['seed'])
+                self.stdout.write(f'\n{size:,} providers (seeded in {time.perf_counter() - started:.1f}s)')
+
+                benchmark = SearchBenchmark(
+                    iterations=options['iterations'],
+                    seed=options['seed'],
+                    trace_memory=not options['no_memory'],
+                )
+                results = benchmark.run(categories)
+                self._print_table(results)
+                report.append({'vendor': vendor, 'size': size, 'results': results})
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'\nResults written to {options["json_path"]}')
+
+    def _print_table(self, results):
+        self.stdout.write(
+            f'  {"scenario":<22} {"calls":>6} {"p50 ms":>9} {"p95 ms":>9} {"queries":>8} {"peak KiB":>9}'
+        )
+        for row in results:
+            self.stdout.write(
+                f'  {row["scenario"]:<22} {row["calls"]:>6} {row["p50_ms"]:>9.2f} '
+                f'{row["p95_ms"]:>9.2f} {row["queries"]:>8.1f} {row["peak_kib"]:>9.1f}'
+            )
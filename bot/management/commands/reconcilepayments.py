@@ -0,0 +1,87 @@
+"""
+Django management command to reconcile pending payments once
+Usage: python manage.py reconcilepayments [--fake-paystack [--fake-status success]]
+
+The bot does this every RECONCILE_INTERVAL seconds. With --fake-paystack
+the pass runs on a throwaway test database seeded with --fake-payments
+synthetic pending payments (never the real ones), against a local fake
+Paystack (bot/benchmarks/fake_paystack.py) reporting --fake-status for
+them (with --fake-latency, --fake-failure-rate trouble); notifications
+are printed instead of sent.
+"""
+import asyncio
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = 'Check PENDING payments with Paystack and record their outcome'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fake-paystack', action='store_true',
+            help='Run on a test database of synthetic payments against a local fake Paystack'
+        )
+        parser.add_argument(
+            '--fake-payments', type=int, default=20, help='Synthetic pending payments to seed'
+        )
+        parser.add_argument(
+            '--fake-status', default='success', choices=['success', 'failed', 'abandoned', 'ongoing'],
+            help='Status the fake Paystack reports for pending payments'
+        )
+        parser.add_argument('--fake-latency', type=float, default=0.0, help='Seconds the fake takes per request')
+        parser.add_argument(
+            '--fake-failure-rate', type=float, default=0.0, help='Share of fake requests answered with a 503'
+        )
+        parser.add_argument('--batch', type=int, default=None, help='Payments to check (default RECONCILE_BATCH)')
+
+    def handle(self, *args, **options):
+        if options['fake_paystack']:
+            from bot.benchmarks import BENCHMARK_CACHES
+
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                changes = self._fake_pass(options)
+        else:
+            changes = asyncio.run(self._reconcile(options, send=True))
+        self.stdout.write(self.style.SUCCESS(f'Changed: {changes or "nothing"}'))
+
+    def _fake_pass(self, options):
+        from bot.benchmarks.corpus import seed_pending_payments
+        from bot.benchmarks.fake_paystack import FakePaystack
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            payments = seed_pending_payments(options['fake_payments'])
+            with FakePaystack(
+                latency=options['fake_latency'], failure_rate=options['fake_failure_rate']
+            ) as paystack:
+                # Payments still waiting for a link have no transaction yet
+                for payment in payments:
+                    if payment.authorization_url:
+                        paystack.add(payment.reference, payment.amount, status=options['fake_status'])
+                self.stdout.write(
+                    f'Fake Paystack at {paystack.url} ({len(payments)} pending payments, '
+                    f'{len(paystack.transactions)} with a checkout link)'
+                )
+                with override_settings(PAYSTACK_BASE_URL=paystack.url):
+                    return asyncio.run(self._reconcile(options, send=False))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    async def _reconcile(self, options, send):
+        from bot.services.paystack import close_client
+        from bot.services.payments import notify_payment
+        from bot.services.reconciler import reconcile_payments
+
+        async def notify(payment):
+            if send:
+                await notify_payment(payment)
+            else:
+                self.stdout.write(f'  would notify {payment.provider.telegram_user_id}: {payment.reference} {payment.status}')
+
+        try:
+            return await reconcile_payments(notify, batch=options['batch'])
+        finally:
+            await close_client()
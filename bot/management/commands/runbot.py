@@ -1,7 +1,8 @@
 """
 Django management command to run the Telegram bot
-Usage: python manage.py runbot
+Usage: python manage.py runbot [--mode polling|webhook] [--profile SECONDS]
 """
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from bot.bot import main
 
@@ -9,6 +10,18 @@ from bot.bot import main
 class Command(BaseCommand):
     help = 'Run the Eagles View Telegram Bot'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', choices=['polling', 'webhook'], default=settings.BOT_MODE,
+            help='polling: run the bot here. webhook: register the webhook and exit '
+                 '(updates are then served by the ASGI app). Defaults to BOT_MODE.'
+        )
+        parser.add_argument(
+            '--profile', type=int, metavar='SECONDS', default=None,
+            help='Sample the event loop and DB threads for the first SECONDS seconds '
+                 '(polling mode) and write the profile to PROFILE_DIR.'
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting Eagles View Bot...'))
-        main()
+        main(mode=options['mode'], profile_seconds=options['profile'])
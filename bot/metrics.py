@@ -0,0 +1,334 @@
+"""
+In-process metrics
+Counters, gauges and histograms kept in one registry per process and
+rendered in the Prometheus text format by the /metrics view (bot/views.py).
+
+In webhook mode the bot runs inside the web process, so the endpoint shows
+its handler, database, Bot API, Paystack and update queue metrics. With
+`runbot` polling in a separate process, the bot serves its registry on
+127.0.0.1:BOT_METRICS_PORT (start_metrics_server()) and the /metrics view
+relays it, so the same metrics are scraped from the web port either way.
+
+Recorded:
+- bot_handler_seconds{handler}: handler latency, keyed by callback route or
+  pattern (or callback name for message/command/inline handlers)
+- bot_update_db_queries / bot_update_db_seconds: ORM queries per update
+- bot_api_seconds{method} and bot_api_errors_total{method}
+- paystack_seconds{operation}, paystack_errors_total{operation},
+  paystack_retries_total{operation} and paystack_circuit_state
+- bot_update_queue_depth, bot_updates_waiting, bot_updates_in_flight
+"""
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Metric):
+    """A gauge that is set, or read from a function at render time."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._function = None
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from `function` when rendering."""
+        self._function = function
+
+    def render(self):
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+handler_seconds = registry.histogram(
+    'bot_handler_seconds', 'Time spent in a bot handler callback.', ['handler'])
+handler_errors = registry.counter(
+    'bot_handler_errors_total', 'Bot handler callbacks that raised.', ['handler'])
+updates_total = registry.counter(
+    'bot_updates_total', 'Updates processed.')
+update_db_queries = registry.histogram(
+    'bot_update_db_queries', 'ORM queries run while processing one update.', buckets=QUERY_COUNT_BUCKETS)
+update_db_seconds = registry.histogram(
+    'bot_update_db_seconds', 'Time spent in ORM queries while processing one update.')
+db_queries = registry.counter(
+    'bot_db_queries_total', 'ORM queries run by the bot.')
+db_seconds = registry.counter(
+    'bot_db_seconds_total', 'Time spent in ORM queries run by the bot.')
+api_seconds = registry.histogram(
+    'bot_api_seconds', 'Bot API request latency.', ['method'])
+api_errors = registry.counter(
+    'bot_api_errors_total', 'Bot API requests that failed.', ['method'])
+api_throttled = registry.counter(
+    'bot_api_throttled_total', 'Bot API requests delayed by the rate limiter.', ['lane'])
+api_flood_waits = registry.counter(
+    'bot_api_flood_waits_total', 'RetryAfter (429) errors from the Bot API.')
+paystack_seconds = registry.histogram(
+    'paystack_seconds', 'Paystack API request latency.', ['operation'])
+paystack_errors = registry.counter(
+    'paystack_errors_total', 'Paystack API requests that failed.', ['operation'])
+paystack_retries = registry.counter(
+    'paystack_retries_total', 'Paystack API requests retried after a transient failure.', ['operation'])
+paystack_circuit_state = registry.gauge(
+    'paystack_circuit_state', 'Paystack circuit breaker: 0 closed, 1 half open, 2 open.')
+update_queue_depth = registry.gauge(
+    'bot_update_queue_depth', 'Updates received but not yet picked up by the application.')
+updates_waiting = registry.gauge(
+    'bot_updates_waiting', 'Updates waiting for their chat or a running slot.')
+updates_in_flight = registry.gauge(
+    'bot_updates_in_flight', 'Updates being handled.')
+
+
+# ORM usage of the update being processed (copied into the DB pool threads
+# with the rest of the context by sync_to_async)
+_update_queries = contextvars.ContextVar('update_queries', default=None)
+
+
+@contextmanager
+def track_update():
+    """Record the ORM queries made while processing one update."""
+    queries = [0, 0.0]
+    token = _update_queries.set(queries)
+    try:
+        yield
+    finally:
+        _update_queries.reset(token)
+        updates_total.inc()
+        update_db_queries.observe(queries[0])
+        update_db_seconds.observe(queries[1])
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper that counts and times ORM queries."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        db_queries.inc()
+        db_seconds.inc(elapsed)
+        queries = _update_queries.get()
+        if queries is not None:
+            queries[0] += 1
+            queries[1] += elapsed
+
+
+def handler_label(handler):
+    """Metric label for a handler: its callback pattern, or its callback's name."""
+    pattern = getattr(handler, 'pattern', None)
+    if pattern is not None:
+        return getattr(pattern, 'pattern', str(pattern))
+    return getattr(handler.callback, '__name__', type(handler).__name__)
+
+
+def timed_callback(callback, label):
+    @functools.wraps(callback)
+    async def timed(update, context, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context, **kwargs)
+        except Exception:
+            handler_errors.inc(handler=label)
+            raise
+        finally:
+            handler_seconds.observe(time.perf_counter() - started, handler=label)
+
+    return timed
+
+
+def instrument_handlers(application):
+    """Time every handler callback of the application (including conversation states)."""
+    from telegram.ext import ConversationHandler
+    from bot.router import CallbackRouter
+
+    def instrument(handler):
+        if isinstance(handler, CallbackRouter):
+            for route in handler.routes:
+                if not getattr(route.callback, '_timed', False):
+                    route.callback = timed_callback(route.callback, route.pattern)
+                    route.callback._timed = True
+        elif isinstance(handler, ConversationHandler):
+            for inner in handler.entry_points + handler.fallbacks:
+                instrument(inner)
+            for state_handlers in handler.states.values():
+                for inner in state_handlers:
+                    instrument(inner)
+        elif not getattr(handler.callback, '_timed', False):
+            handler.callback = timed_callback(handler.callback, handler_label(handler))
+            handler.callback._timed = True
+
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            instrument(handler)
+
+    processor = application.update_processor
+    update_queue_depth.set_function(application.update_queue.qsize)
+    if hasattr(processor, 'waiting'):
+        updates_waiting.set_function(lambda: processor.waiting)
+        updates_in_flight.set_function(lambda: processor.in_flight)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Serve this process's registry at http://host:port/metrics from a background thread."""
+    server = _MetricsServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
@@ -0,0 +1,140 @@
+# Full-text search document for ServiceProvider.
+#
+# PostgreSQL: a weighted `search_document` tsvector column with a GIN index,
+# maintained by a trigger (name A, keywords/category B, description C).
+# SQLite: an FTS5 table keyed by provider id, maintained by triggers.
+# Triggers are used instead of signals so queryset.update() (admin actions)
+# also keeps the document current.
+
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE bot_serviceprovider ADD COLUMN search_document tsvector",
+    """
+    CREATE FUNCTION bot_serviceprovider_search_document() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_document :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(
+                CASE WHEN jsonb_typeof(NEW.keywords) = 'array'
+                    THEN (SELECT string_agg(value, ' ') FROM jsonb_array_elements_text(NEW.keywords))
+                    ELSE NEW.keywords #>> '{}'
+                END, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(
+                (SELECT name FROM bot_category WHERE id = NEW.category_id), '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER bot_serviceprovider_search_document_trg
+    BEFORE INSERT OR UPDATE ON bot_serviceprovider
+    FOR EACH ROW EXECUTE FUNCTION bot_serviceprovider_search_document()
+    """,
+    """
+    CREATE FUNCTION bot_category_touch_providers() RETURNS trigger AS $$
+    BEGIN
+        UPDATE bot_serviceprovider SET id = id WHERE category_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER bot_category_search_document_trg
+    AFTER UPDATE OF name ON bot_category
+    FOR EACH ROW EXECUTE FUNCTION bot_category_touch_providers()
+    """,
+    # Backfill existing rows through the trigger
+    "UPDATE bot_serviceprovider SET id = id",
+    """
+    CREATE INDEX bot_serviceprovider_search_document_gin
+    ON bot_serviceprovider USING GIN (search_document)
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS bot_category_search_document_trg ON bot_category",
+    "DROP FUNCTION IF EXISTS bot_category_touch_providers()",
+    "DROP TRIGGER IF EXISTS bot_serviceprovider_search_document_trg ON bot_serviceprovider",
+    "DROP FUNCTION IF EXISTS bot_serviceprovider_search_document()",
+    "ALTER TABLE bot_serviceprovider DROP COLUMN IF EXISTS search_document",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE bot_serviceprovider_fts USING fts5(
+        name, keywords, category, description,
+        tokenize = 'porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER bot_serviceprovider_fts_ai AFTER INSERT ON bot_serviceprovider BEGIN
+        INSERT INTO bot_serviceprovider_fts (rowid, name, keywords, category, description)
+        VALUES (
+            NEW.id, NEW.name, NEW.keywords,
+            (SELECT name FROM bot_category WHERE id = NEW.category_id),
+            NEW.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER bot_serviceprovider_fts_au AFTER UPDATE ON bot_serviceprovider BEGIN
+        DELETE FROM bot_serviceprovider_fts WHERE rowid = OLD.id;
+        INSERT INTO bot_serviceprovider_fts (rowid, name, keywords, category, description)
+        VALUES (
+            NEW.id, NEW.name, NEW.keywords,
+            (SELECT name FROM bot_category WHERE id = NEW.category_id),
+            NEW.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER bot_serviceprovider_fts_ad AFTER DELETE ON bot_serviceprovider BEGIN
+        DELETE FROM bot_serviceprovider_fts WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER bot_category_fts_au AFTER UPDATE OF name ON bot_category BEGIN
+        UPDATE bot_serviceprovider_fts SET category = NEW.name
+        WHERE rowid IN (SELECT id FROM bot_serviceprovider WHERE category_id = NEW.id);
+    END
+    """,
+    # Backfill existing rows
+    """
+    INSERT INTO bot_serviceprovider_fts (rowid, name, keywords, category, description)
+    SELECT p.id, p.name, p.keywords, c.name, p.description
+    FROM bot_serviceprovider p LEFT JOIN bot_category c ON c.id = p.category_id
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS bot_category_fts_au",
+    "DROP TRIGGER IF EXISTS bot_serviceprovider_fts_ad",
+    "DROP TRIGGER IF EXISTS bot_serviceprovider_fts_au",
+    "DROP TRIGGER IF EXISTS bot_serviceprovider_fts_ai",
+    "DROP TABLE IF EXISTS bot_serviceprovider_fts",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0002_payment'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_statements({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
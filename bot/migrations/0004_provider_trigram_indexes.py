@@ -0,0 +1,50 @@
+# Trigram indexes for typo-tolerant provider search (PostgreSQL only).
+# Other backends use the bot's in-memory trigram map instead.
+
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX bot_serviceprovider_name_trgm
+    ON bot_serviceprovider USING GIN (name gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX bot_serviceprovider_keywords_trgm
+    ON bot_serviceprovider USING GIN ((keywords::text) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX bot_category_name_trgm
+    ON bot_category USING GIN (name gin_trgm_ops)
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS bot_category_name_trgm",
+    "DROP INDEX IF EXISTS bot_serviceprovider_keywords_trgm",
+    "DROP INDEX IF EXISTS bot_serviceprovider_name_trgm",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0003_provider_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements(POSTGRES_FORWARD),
+            run_statements(POSTGRES_REVERSE),
+        ),
+    ]
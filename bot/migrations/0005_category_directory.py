@@ -0,0 +1,97 @@
+# Denormalized count of approved, active providers per category, so the
+# Purple Board category directory is a single indexed read.
+#
+# SQLite rebuilds bot_category to add a column, which fails while the FTS
+# triggers from 0003 reference it (and would drop bot_category_fts_au), so
+# the triggers are dropped first and recreated afterwards.
+
+from django.db import migrations, models
+
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER bot_serviceprovider_fts_ai AFTER INSERT ON bot_serviceprovider BEGIN
+        INSERT INTO bot_serviceprovider_fts (rowid, name, keywords, category, description)
+        VALUES (
+            NEW.id, NEW.name, NEW.keywords,
+            (SELECT name FROM bot_category WHERE id = NEW.category_id),
+            NEW.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER bot_serviceprovider_fts_au AFTER UPDATE ON bot_serviceprovider BEGIN
+        DELETE FROM bot_serviceprovider_fts WHERE rowid = OLD.id;
+        INSERT INTO bot_serviceprovider_fts (rowid, name, keywords, category, description)
+        VALUES (
+            NEW.id, NEW.name, NEW.keywords,
+            (SELECT name FROM bot_category WHERE id = NEW.category_id),
+            NEW.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER bot_serviceprovider_fts_ad AFTER DELETE ON bot_serviceprovider BEGIN
+        DELETE FROM bot_serviceprovider_fts WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER bot_category_fts_au AFTER UPDATE OF name ON bot_category BEGIN
+        UPDATE bot_serviceprovider_fts SET category = NEW.name
+        WHERE rowid IN (SELECT id FROM bot_serviceprovider WHERE category_id = NEW.id);
+    END
+    """,
+]
+
+SQLITE_DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS bot_category_fts_au",
+    "DROP TRIGGER IF EXISTS bot_serviceprovider_fts_ad",
+    "DROP TRIGGER IF EXISTS bot_serviceprovider_fts_au",
+    "DROP TRIGGER IF EXISTS bot_serviceprovider_fts_ai",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+def backfill_counts(apps, schema_editor):
+    Category = apps.get_model('bot', 'Category')
+    for category in Category.objects.all():
+        category.active_provider_count = category.providers.filter(
+            is_approved=True,
+            is_active=True
+        ).count()
+        category.save(update_fields=['active_provider_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0004_provider_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'sqlite': SQLITE_DROP_TRIGGERS}),
+            run_statements({'sqlite': SQLITE_TRIGGERS}),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='active_provider_count',
+            field=models.PositiveIntegerField(default=0, help_text='Approved, active providers (maintained automatically)'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['-active_provider_count', 'name'], name='bot_category_directory_idx'),
+        ),
+        migrations.RunPython(
+            run_statements({'sqlite': SQLITE_TRIGGERS}),
+            run_statements({'sqlite': SQLITE_DROP_TRIGGERS}),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:21
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0005_category_directory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotUserData',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(help_text='Telegram user ID', unique=True)),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Bot user data',
+            },
+        ),
+        migrations.CreateModel(
+            name='BotConversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='ConversationHandler name', max_length=100)),
+                ('key', models.CharField(help_text='JSON-encoded conversation key', max_length=100)),
+                ('state', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'key'), name='bot_conversation_unique_key')],
+            },
+        ),
+    ]
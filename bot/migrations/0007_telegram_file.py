@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0006_bot_persistence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage_path', models.CharField(help_text='Name in the media storage', max_length=255)),
+                ('content_hash', models.CharField(help_text='SHA-256 of the file content', max_length=64)),
+                ('kind', models.CharField(help_text='photo, video or document', max_length=10)),
+                ('file_id', models.CharField(max_length=255)),
+                ('file_unique_id', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('storage_path', 'content_hash', 'kind'), name='bot_telegram_file_unique_content')],
+            },
+        ),
+    ]
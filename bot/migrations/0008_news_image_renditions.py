@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0007_telegram_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_rendition',
+            field=models.ImageField(blank=True, editable=False, help_text='Telegram-sized copy of the image, without EXIF data', null=True, upload_to='news_images/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='news_images/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
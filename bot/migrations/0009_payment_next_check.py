@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0008_news_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='next_check_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='When the reconciler next asks Paystack about this pending payment', null=True),
+        ),
+    ]
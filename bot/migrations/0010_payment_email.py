@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0009_payment_next_check'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='email',
+            field=models.EmailField(blank=True, help_text='Sent to Paystack with the transaction', max_length=254),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0010_payment_email'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='telegramfile',
+            name='content_hash',
+            field=models.CharField(help_text='SHA-256 of a local file, or size:<bytes> of a remote one', max_length=64),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils.text import slugify
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import FileExtensionValidator
 
 
@@ -10,11 +11,18 @@ class Category(models.Model):
     """
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
+    active_provider_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Approved, active providers (maintained automatically)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['-active_provider_count', 'name'], name='bot_category_directory_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -51,6 +59,8 @@ class ServiceProvider(models.Model):
         default=list,
         help_text="List of keywords for search (e.g., ['lash', 'makeup', 'beauty'])"
     )
+    # The full-text search document (tsvector / FTS5 row) is maintained by
+    # database triggers, see migrations/0003_provider_search_document.py
     category = models.ForeignKey(
         Category,
         on_delete=models.SET_NULL,
@@ -147,6 +157,14 @@ class News(models.Model):
     content = models.TextField()
     category = models.CharField(max_length=20, choices=NEWS_CATEGORIES, default='GENERAL')
     image = models.ImageField(upload_to='news_images/', blank=True, null=True)
+    # Generated from `image` after each save (see bot/services/images.py)
+    image_rendition = models.ImageField(
+        upload_to='news_images/renditions/', blank=True, null=True, editable=False,
+        help_text="Telegram-sized copy of the image, without EXIF data"
+    )
+    image_thumbnail = models.ImageField(upload_to='news_images/thumbnails/', blank=True, null=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     is_published = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -283,9 +301,14 @@ class Payment(models.Model):
     plan_type = models.CharField(max_length=10, choices=ServiceProvider.PLAN_CHOICES)
     status = models.CharField(max_length=10, choices=PAYMENT_STATUS, default='PENDING')
     authorization_url = models.URLField(blank=True)
+    email = models.EmailField(blank=True, help_text="Sent to Paystack with the transaction")
     paystack_response = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     verified_at = models.DateTimeField(null=True, blank=True)
+    next_check_at = models.DateTimeField(
+        null=True, blank=True, db_index=True, editable=False,
+        help_text="When the reconciler next asks Paystack about this pending payment"
+    )
 
     class Meta:
         ordering = ['-created_at']
@@ -297,3 +320,61 @@ class Payment(models.Model):
     def amount_naira(self):
         """Return amount in Naira."""
         return self.amount / 100
+
+
+class BotUserData(models.Model):
+    """
+    Persisted context.user_data for one Telegram user (see bot/persistence.py).
+    """
+    user_id = models.BigIntegerField(unique=True, help_text="Telegram user ID")
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Bot user data"
+
+    def __str__(self):
+        return f"User {self.user_id}"
+
+
+class BotConversation(models.Model):
+    """
+    Persisted ConversationHandler state, e.g. a half-finished registration.
+    """
+    name = models.CharField(max_length=100, help_text="ConversationHandler name")
+    key = models.CharField(max_length=100, help_text="JSON-encoded conversation key")
+    state = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'key'], name='bot_conversation_unique_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} {self.key}: {self.state}"
+
+
+class TelegramFile(models.Model):
+    """
+    A file_id Telegram returned after the bot sent a stored file, so later
+    sends can reuse it instead of uploading again (see bot/services/media.py).
+    """
+    storage_path = models.CharField(max_length=255, help_text="Name in the media storage")
+    content_hash = models.CharField(
+        max_length=64, help_text="SHA-256 of a local file, or size:<bytes> of a remote one"
+    )
+    kind = models.CharField(max_length=10, help_text="photo, video or document")
+    file_id = models.CharField(max_length=255)
+    file_unique_id = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['storage_path', 'content_hash', 'kind'], name='bot_telegram_file_unique_content'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.storage_path}"
@@ -0,0 +1,255 @@
+"""
+Database persistence for user_data and conversations
+Keeps context.user_data and ConversationHandler state (half-finished
+registrations) across restarts and redeploys, in the BotUserData and
+BotConversation tables.
+
+- Nothing is loaded per user at startup: a user's data is read the first
+  time one of their updates is processed (refresh_user_data).
+- PTB hands over changed data every BOT_PERSISTENCE_INTERVAL seconds;
+  writes are buffered and flushed as one batch of upserts, skipping users
+  whose data didn't change.
+- Users idle for BOT_USER_DATA_IDLE_SECONDS are evicted from memory (their
+  row is kept) and reloaded on their next update.
+- Conversations untouched for BOT_CONVERSATION_TTL are dropped at startup.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from telegram.ext import BasePersistence, PersistenceInput
+
+from bot.db import database_sync_to_async
+
+
+# Seconds to wait after the first buffered change, so one PTB persistence
+# run is written as a single batch
+WRITE_DELAY = 0.5
+
+
+def _encode_key(key):
+    return json.dumps(list(key))
+
+
+def _decode_key(key):
+    return tuple(json.loads(key))
+
+
+class DjangoPersistence(BasePersistence):
+    """BasePersistence storing user_data and conversations with the Django ORM."""
+
+    def __init__(self):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=settings.BOT_PERSISTENCE_INTERVAL,
+        )
+        self.application = None
+        self._pending_users = {}           # user id -> data to write, or None to delete
+        self._pending_conversations = {}   # (name, encoded key) -> state, or None to delete
+        self._written = {}                 # user id -> digest of the stored data
+        self._loaded = set()               # users whose stored data is in memory
+        self._last_seen = {}               # user id -> monotonic time of last update
+        self._evicting = set()             # users dropped from memory, not from the database
+        self._last_sweep = time.monotonic()
+        self._write_task = None
+
+    def set_application(self, application):
+        """Give the persistence the Application, for evicting idle users."""
+        self.application = application
+
+    # Loading
+
+    async def get_user_data(self):
+        return {}  # Loaded per user in refresh_user_data
+
+    async def get_chat_data(self):
+        return {}
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        from bot.models import BotConversation
+
+        @database_sync_to_async
+        def load(conversation_name):
+            conversations = BotConversation.objects.filter(name=conversation_name)
+            cutoff = timezone.now() - timedelta(seconds=settings.BOT_CONVERSATION_TTL)
+            conversations.filter(updated_at__lt=cutoff).delete()
+            return {
+                _decode_key(key): state
+                for key, state in conversations.values_list('key', 'state')
+            }
+
+        return await load(name)
+
+    async def refresh_user_data(self, user_id, user_data):
+        now = time.monotonic()
+        self._last_seen[user_id] = now
+        # Memory only grows with activity, so sweep idle users as updates arrive
+        if now - self._last_sweep > settings.BOT_USER_DATA_IDLE_SECONDS / 4:
+            self._last_sweep = now
+            self._evict_idle_users()
+        if user_id in self._loaded:
+            return
+        from bot.models import BotUserData
+
+        @database_sync_to_async
+        def load(uid):
+            return BotUserData.objects.filter(user_id=uid).values_list('data', flat=True).first()
+
+        stored = await load(user_id)
+        self._loaded.add(user_id)
+        if stored:
+            self._written[user_id] = self._digest(json.dumps(stored, cls=DjangoJSONEncoder, sort_keys=True))
+            for key, value in stored.items():
+                user_data.setdefault(key, value)
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    # Writing (buffered)
+
+    async def update_user_data(self, user_id, data):
+        if user_id not in self._loaded:
+            # No handler ran for this user here, so their stored data was never
+            # loaded and the in-memory dict is empty; don't overwrite the row
+            return
+        try:
+            encoded = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+        except TypeError as e:
+            print(f"Not persisting user_data for {user_id}: {e}")
+            return
+        digest = self._digest(encoded)
+        if self._written.get(user_id) == digest:
+            return
+        self._written[user_id] = digest
+        self._pending_users[user_id] = json.loads(encoded)
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id):
+        if user_id in self._evicting:
+            # Evicted from memory only. If the user came back in the meantime,
+            # PTB skips their pending update in favour of this drop, so write it here.
+            self._evicting.discard(user_id)
+            if user_id in self._loaded and self.application is not None:
+                self._written.pop(user_id, None)
+                await self.update_user_data(user_id, dict(self.application.user_data.get(user_id, {})))
+            return
+        self._written.pop(user_id, None)
+        self._loaded.discard(user_id)
+        self._last_seen.pop(user_id, None)
+        self._pending_users[user_id] = None
+        self._schedule_write()
+
+    async def update_conversation(self, name, key, new_state):
+        self._pending_conversations[(name, _encode_key(key))] = new_state
+        self._schedule_write()
+
+    async def update_chat_data(self, chat_id, data):
+        pass
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        pass
+
+    async def flush(self):
+        """Write everything still buffered (called by PTB on shutdown)."""
+        if self._write_task is not None and not self._write_task.done():
+            self._write_task.cancel()
+        self._write_task = None
+        await self._write_pending()
+
+    # Internals
+
+    @staticmethod
+    def _digest(encoded):
+        return hashlib.md5(encoded.encode()).digest()
+
+    def _schedule_write(self):
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.get_running_loop().create_task(self._write_soon())
+
+    async def _write_soon(self):
+        await asyncio.sleep(WRITE_DELAY)
+        await self._write_pending()
+
+    async def _write_pending(self):
+        users, self._pending_users = self._pending_users, {}
+        conversations, self._pending_conversations = self._pending_conversations, {}
+        if not users and not conversations:
+            return
+        try:
+            await database_sync_to_async(self._write)(users, conversations)
+        except Exception as e:
+            print(f"Persistence write failed, retrying on next run: {e}")
+            # Keep anything newer that was buffered meanwhile
+            self._pending_users = {**users, **self._pending_users}
+            self._pending_conversations = {**conversations, **self._pending_conversations}
+            for user_id in users:
+                self._written.pop(user_id, None)
+
+    @staticmethod
+    def _write(users, conversations):
+        from bot.models import BotConversation, BotUserData
+
+        with transaction.atomic():
+            upserts = [BotUserData(user_id=uid, data=data) for uid, data in users.items() if data is not None]
+            if upserts:
+                BotUserData.objects.bulk_create(
+                    upserts,
+                    update_conflicts=True,
+                    unique_fields=['user_id'],
+                    update_fields=['data', 'updated_at'],
+                )
+            deleted = [uid for uid, data in users.items() if data is None]
+            if deleted:
+                BotUserData.objects.filter(user_id__in=deleted).delete()
+
+            upserts = [
+                BotConversation(name=name, key=key, state=state)
+                for (name, key), state in conversations.items() if state is not None
+            ]
+            if upserts:
+                BotConversation.objects.bulk_create(
+                    upserts,
+                    update_conflicts=True,
+                    unique_fields=['name', 'key'],
+                    update_fields=['state', 'updated_at'],
+                )
+            for (name, key), state in conversations.items():
+                if state is None:
+                    BotConversation.objects.filter(name=name, key=key).delete()
+
+    def _evict_idle_users(self):
+        """Drop idle users' data from memory; it is reloaded on their next update."""
+        if self.application is None:
+            return
+        cutoff = time.monotonic() - settings.BOT_USER_DATA_IDLE_SECONDS
+        idle = [
+            uid for uid, seen in self._last_seen.items()
+            if seen < cutoff and uid not in self._pending_users
+        ]
+        for user_id in idle:
+            self._evicting.add(user_id)
+            self._loaded.discard(user_id)
+            self._last_seen.pop(user_id, None)
+            self._written.pop(user_id, None)
+            self.application.drop_user_data(user_id)
@@ -0,0 +1,150 @@
+"""
+Sampling profiler for the bot process
+Turned on for a number of seconds with `runbot --profile N` or the
+admin-only /profile command. A background thread takes a snapshot of the
+event loop thread's and the DB pool threads' stacks every
+PROFILE_INTERVAL_MS milliseconds (sys._current_frames, so the profiled code
+is not slowed down), then writes to PROFILE_DIR:
+
+- profile-<time>.collapsed: one "thread;frame;frame... count" line per
+  distinct stack, for flamegraph.pl / speedscope
+- profile-<time>.txt: the summary below
+
+The summary lists the handlers (functions in bot/handlers) and call sites
+seen in the most samples. An idle loop shows up as time in select().
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+
+# Summary length
+TOP_COUNT = 15
+
+HANDLERS_DIR = os.path.join('bot', 'handlers') + os.sep
+
+_running = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """A profile is already being recorded."""
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of the event loop thread and the DB pool threads."""
+
+    def __init__(self, loop_thread_id, interval=None, thread_prefix='bot-db'):
+        self.loop_thread_id = loop_thread_id
+        self.interval = (interval or settings.PROFILE_INTERVAL_MS) / 1000
+        self.thread_prefix = thread_prefix
+        self.stacks = Counter()        # (thread name, frames root first) -> samples
+        self.samples = 0
+        self.duration = 0.0
+
+    def _threads(self):
+        names = {self.loop_thread_id: 'event-loop'}
+        for thread in threading.enumerate():
+            if thread.name.startswith(self.thread_prefix):
+                names[thread.ident] = thread.name
+        return names
+
+    def sample(self):
+        names = self._threads()
+        for thread_id, frame in sys._current_frames().items():
+            name = names.get(thread_id)
+            if name is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                frame = frame.f_back
+            labels = tuple(_frame_label(f) for f in reversed(stack))
+            handler = next(
+                (f.f_code.co_name for f in reversed(stack) if HANDLERS_DIR in f.f_code.co_filename),
+                None
+            )
+            self.stacks[(name, labels, handler)] += 1
+        self.samples += 1
+
+    def run(self, seconds):
+        """Sample for `seconds` (blocking; call from a thread)."""
+        started = time.monotonic()
+        deadline = started + seconds
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            self.sample()
+            time.sleep(max(0.0, min(self.interval, deadline - now)))
+        self.duration = time.monotonic() - started
+        return self
+
+    def collapsed(self):
+        lines = [
+            f"{';'.join((thread,) + labels)} {count}"
+            for (thread, labels, _), count in self.stacks.most_common()
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        handlers = Counter()
+        call_sites = Counter()
+        threads = Counter()
+        for (thread, labels, handler), count in self.stacks.items():
+            threads[thread] += count
+            if handler:
+                handlers[handler] += count
+            if labels:
+                call_sites[labels[-1]] += count
+
+        def share(count):
+            return f"{count:6d}  {count / self.samples * 100:5.1f}%" if self.samples else f"{count:6d}"
+
+        lines = [f"{self.samples} samples over {self.duration:.1f}s ({self.interval * 1000:.0f}ms interval)", ""]
+        lines.append("Threads:")
+        lines += [f"{share(count)}  {name}" for name, count in threads.most_common()]
+        lines += ["", "Top handlers:"]
+        lines += [f"{share(count)}  {name}" for name, count in handlers.most_common(TOP_COUNT)] or ["  (none)"]
+        lines += ["", "Top call sites (innermost frame):"]
+        lines += [f"{share(count)}  {site}" for site, count in call_sites.most_common(TOP_COUNT)]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory=None):
+        """Write the collapsed stacks and the summary; return the summary path."""
+        directory = directory or settings.PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}")
+        with open(f"{stem}.collapsed", 'w') as f:
+            f.write(self.collapsed())
+        with open(f"{stem}.txt", 'w') as f:
+            f.write(self.summary())
+        return f"{stem}.txt"
+
+
+async def profile(seconds):
+    """
+    Profile the running event loop (and DB pool) for `seconds`.
+
+    Returns the finished SamplingProfiler and the summary file's path.
+    Raises ProfilerBusy if a profile is already being recorded.
+    """
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        seconds = min(seconds, settings.PROFILE_MAX_SECONDS)
+        profiler = SamplingProfiler(threading.get_ident())
+        await asyncio.to_thread(profiler.run, seconds)
+        path = await asyncio.to_thread(profiler.write)
+        return profiler, path
+    finally:
+        _running.release()
@@ -0,0 +1,261 @@
+"""
+Outbound Bot API rate limiting
+Every Bot API call goes through PriorityRateLimiter (ExtBot's rate_limiter
+hook), which keeps the bot inside Telegram's flood limits instead of
+running into 429 RetryAfter errors:
+
+- Calls that target a chat share a global budget of TELEGRAM_GLOBAL_RATE
+  per second, and each chat has its own budget (TELEGRAM_CHAT_RATE per
+  second in private chats, TELEGRAM_GROUP_RATE per minute in groups).
+- Calls waiting for the global budget are granted by lane: interactive
+  calls (answering callback/inline queries, edits) first, then ordinary
+  sends, then bulk sends (notifications, pass rate_limit_args={'lane': BULK}).
+- A RetryAfter pauses the chat it came from (or every call, if it had no
+  chat) for retry_after seconds and the call is retried, up to
+  TELEGRAM_MAX_RETRIES times, so handlers don't see the error.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+
+from django.conf import settings
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from bot import metrics
+
+
+# Lanes, highest priority first
+INTERACTIVE = 0
+NORMAL = 1
+BULK = 2
+
+LANE_NAMES = {INTERACTIVE: 'interactive', NORMAL: 'normal', BULK: 'bulk'}
+
+# Answers and edits to a message the user just tapped
+INTERACTIVE_ENDPOINTS = {
+    'answerCallbackQuery',
+    'answerInlineQuery',
+    'editMessageText',
+    'editMessageCaption',
+    'editMessageMedia',
+    'editMessageReplyMarkup',
+}
+
+# Calls with a chat_id that don't send anything, so don't count against
+# the message limits
+UNLIMITED_ENDPOINTS = {'deleteMessage', 'deleteMessages', 'sendChatAction', 'getChat'}
+
+# Calls may start this many per-chat tokens early (short bursts are allowed)
+CHAT_BURST = 3
+
+# Per-chat buckets kept before full (idle) ones are dropped
+MAX_CHAT_BUCKETS = 1024
+
+# Extra seconds added to Telegram's retry_after
+RETRY_AFTER_MARGIN = 0.1
+
+
+class TokenBucket:
+    """
+    Allows `rate` calls per second on average, and bursts of `capacity`.
+
+    reserve() takes a token even if none is available yet and returns how
+    long the caller must wait for it, so reservations are served in order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now=None):
+        """Seconds until a token is available (without taking it)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.paused_until - now)
+
+    def take(self):
+        self.tokens -= 1
+
+    def reserve(self):
+        """Take a token and return the seconds to wait before using it."""
+        wait = self.delay()
+        self.take()
+        return wait
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def idle(self):
+        return self.delay() == 0 and self.tokens >= self.capacity
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    """BaseRateLimiter with global and per-chat budgets and priority lanes."""
+
+    def __init__(self, global_rate=None, chat_rate=None, group_rate=None, max_retries=None):
+        self.global_rate = global_rate or settings.TELEGRAM_GLOBAL_RATE
+        self.chat_rate = chat_rate or settings.TELEGRAM_CHAT_RATE
+        self.group_rate = (group_rate or settings.TELEGRAM_GROUP_RATE) / 60
+        self.max_retries = settings.TELEGRAM_MAX_RETRIES if max_retries is None else max_retries
+        self._global = TokenBucket(self.global_rate, self.global_rate)
+        self._chats = {}                   # chat id -> TokenBucket
+        self._waiting = []                 # heap of (lane, sequence, future)
+        self._sequence = itertools.count()
+        self._wakeup = None
+        self._dispatcher = None
+        self.calls = dict.fromkeys(LANE_NAMES.values(), 0)
+        self.throttled = 0                 # calls that had to wait
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+        self.flood_waits = 0               # RetryAfter errors received
+        self.retries = 0
+
+    async def initialize(self):
+        self._start_dispatcher()
+
+    async def shutdown(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for _, _, future in self._waiting:
+            future.cancel()
+        self._waiting.clear()
+
+    # Classification
+
+    @staticmethod
+    def lane_for(endpoint, rate_limit_args):
+        if rate_limit_args and 'lane' in rate_limit_args:
+            return rate_limit_args['lane']
+        if endpoint in INTERACTIVE_ENDPOINTS:
+            return INTERACTIVE
+        return NORMAL
+
+    @staticmethod
+    def chat_for(endpoint, data):
+        """Return the chat id the call counts against, or None."""
+        if endpoint in UNLIMITED_ENDPOINTS:
+            return None
+        chat_id = data.get('chat_id')
+        if chat_id is None:
+            return None
+        try:
+            return int(chat_id)
+        except (TypeError, ValueError):
+            return chat_id  # @channel username
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                for key in [k for k, b in self._chats.items() if b.idle()]:
+                    del self._chats[key]
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            bucket = TokenBucket(self.chat_rate if is_private else self.group_rate, CHAT_BURST)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    # Global budget, granted in lane order
+
+    def _start_dispatcher(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _acquire_global(self, lane):
+        if not self._waiting and self._global.delay() == 0:
+            self._global.take()
+            return
+        self._start_dispatcher()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (lane, next(self._sequence), future))
+        self._wakeup.set()
+        await future
+
+    async def _dispatch(self):
+        while True:
+            if not self._waiting:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            wait = self._global.delay()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():   # skip callers that gave up
+                self._global.take()
+                future.set_result(None)
+
+    # Requests
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        lane = self.lane_for(endpoint, rate_limit_args)
+        chat_id = self.chat_for(endpoint, data)
+        max_retries = (rate_limit_args or {}).get('max_retries', self.max_retries)
+        self.calls[LANE_NAMES[lane]] += 1
+
+        for attempt in range(max_retries + 1):
+            await self._wait_for_turn(lane, chat_id)
+            started = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.flood_waits += 1
+                metrics.api_flood_waits.inc()
+                if attempt == max_retries:
+                    raise
+                self.retries += 1
+                pause = e.retry_after
+                pause = (pause.total_seconds() if hasattr(pause, 'total_seconds') else pause) + RETRY_AFTER_MARGIN
+                if chat_id is not None:
+                    self._chat_bucket(chat_id).pause(pause)
+                else:
+                    self._global.pause(pause)
+            except Exception:
+                metrics.api_errors.inc(method=endpoint)
+                raise
+            finally:
+                metrics.api_seconds.observe(time.perf_counter() - started, method=endpoint)
+
+    async def _wait_for_turn(self, lane, chat_id):
+        started = time.monotonic()
+        if chat_id is not None:
+            wait = self._chat_bucket(chat_id).reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._acquire_global(lane)
+        else:
+            # Not counted against the budgets, but respects a global pause
+            wait = self._global.paused_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        delay = time.monotonic() - started
+        if delay > 0.001:
+            metrics.api_throttled.inc(lane=LANE_NAMES[lane])
+            self.throttled += 1
+            self.total_delay += delay
+            self.max_delay = max(self.max_delay, delay)
+
+    def stats(self):
+        """Return call counts per lane, throttling and flood-wait counters."""
+        return {
+            'calls': dict(self.calls),
+            'queued': len(self._waiting),
+            'throttled': self.throttled,
+            'avg_delay_ms': self.total_delay / self.throttled * 1000 if self.throttled else 0.0,
+            'max_delay_ms': self.max_delay * 1000,
+            'flood_waits': self.flood_waits,
+            'retries': self.retries,
+            'chat_buckets': len(self._chats),
+        }
@@ -0,0 +1,181 @@
+"""
+Callback query router
+One handler for every button press outside the registration conversation.
+Instead of trying ~25 CallbackQueryHandler regexes in order, callback_data
+is split once on "_" and walked through a trie of route tokens; the
+matching route's callback gets the decoded arguments as keyword arguments.
+
+Routes are written in the existing callback_data format, so buttons in
+messages sent before a deploy keep working:
+
+    ("provider_<int:provider_id>", view_provider)
+    ("news_page_<prev|next|info:action>", news_pagination)
+    ("search_page_<int:page>_<f|b:direction>_<rest:cursor>", search_pagination)
+
+Argument types: int, str (one token), rest (everything after the
+separator, "_" included, possibly empty) and a|b|c (one of the tokens).
+"""
+import re
+
+from telegram import Update
+from telegram.ext import BaseHandler
+
+
+SEPARATOR = '_'
+
+# Splits a route pattern on the separator, but not inside <type:name>
+_PATTERN_TOKENS = re.compile(r'_(?![^<]*>)')
+
+
+def _decode_int(token):
+    if not token.isdigit():
+        raise ValueError(token)
+    return int(token)
+
+
+def _decode_str(token):
+    if not token:
+        raise ValueError(token)
+    return token
+
+
+CONVERTERS = {
+    'int': _decode_int,
+    'str': _decode_str,
+}
+
+
+class Route:
+    def __init__(self, pattern, callback):
+        self.pattern = pattern
+        self.callback = callback
+
+    def __repr__(self):
+        return f"Route({self.pattern!r}, {getattr(self.callback, '__name__', self.callback)})"
+
+
+class _Node:
+    __slots__ = ('literals', 'params', 'rest', 'route')
+
+    def __init__(self):
+        self.literals = {}   # token -> _Node
+        self.params = []     # (name, decode, _Node), tried in order
+        self.rest = None     # (name, Route) consuming the remaining tokens
+        self.route = None
+
+
+def _parse_param(token):
+    """Return (name, decoder) for a <type:name> token, or None for a literal."""
+    if not (token.startswith('<') and token.endswith('>')):
+        return None
+    kind, _, name = token[1:-1].rpartition(':')
+    if not name or not kind:
+        raise ValueError(f"Route parameter needs a type and a name: {token}")
+    if '|' in kind:
+        choices = frozenset(kind.split('|'))
+
+        def decode(value):
+            if value not in choices:
+                raise ValueError(value)
+            return value
+        return name, decode
+    if kind == 'rest':
+        return name, None
+    if kind not in CONVERTERS:
+        raise ValueError(f"Unknown route parameter type: {kind}")
+    return name, CONVERTERS[kind]
+
+
+class CallbackRouter(BaseHandler):
+    """A single handler dispatching callback queries by their callback_data."""
+
+    def __init__(self, routes=(), block=True):
+        super().__init__(self.dispatch, block=block)
+        self._root = _Node()
+        self.routes = []
+        self.add_routes(routes)
+
+    def add(self, pattern, callback):
+        """Register `callback` for callback_data matching `pattern`."""
+        route = Route(pattern, callback)
+        node = self._root
+        tokens = _PATTERN_TOKENS.split(pattern)
+        for i, token in enumerate(tokens):
+            param = _parse_param(token)
+            if param is None:
+                node = node.literals.setdefault(token, _Node())
+                continue
+            name, decode = param
+            if decode is None:
+                if i != len(tokens) - 1:
+                    raise ValueError(f"<rest:...> must be the last token: {pattern}")
+                if node.rest is not None:
+                    raise ValueError(f"Duplicate route: {pattern}")
+                node.rest = (name, route)
+                self.routes.append(route)
+                return route
+            for existing_name, existing_decode, child in node.params:
+                if existing_name == name and existing_decode is decode:
+                    node = child
+                    break
+            else:
+                child = _Node()
+                node.params.append((name, decode, child))
+                node = child
+        if node.route is not None:
+            raise ValueError(f"Duplicate route: {pattern}")
+        node.route = route
+        self.routes.append(route)
+        return route
+
+    def add_routes(self, routes):
+        for pattern, callback in routes:
+            self.add(pattern, callback)
+
+    def match(self, data):
+        """Return (route, args) for callback_data, or None if no route matches."""
+        if not isinstance(data, str):
+            return None
+        return self._match(self._root, data.split(SEPARATOR), 0, {})
+
+    def _match(self, node, tokens, index, args):
+        if index == len(tokens):
+            if node.route is not None:
+                return node.route, args
+        else:
+            token = tokens[index]
+            child = node.literals.get(token)
+            if child is not None:
+                found = self._match(child, tokens, index + 1, args)
+                if found:
+                    return found
+            for name, decode, child in node.params:
+                try:
+                    value = decode(token)
+                except ValueError:
+                    continue
+                found = self._match(child, tokens, index + 1, {**args, name: value})
+                if found:
+                    return found
+        if node.rest is not None and index < len(tokens):
+            name, route = node.rest
+            return route, {**args, name: SEPARATOR.join(tokens[index:])}
+        return None
+
+    def check_update(self, update):
+        if not (isinstance(update, Update) and update.callback_query):
+            return None
+        return self.match(update.callback_query.data)
+
+    async def handle_update(self, update, application, check_result, context):
+        self.collect_additional_context(context, update, application, check_result)
+        route, args = check_result
+        return await route.callback(update, context, **args)
+
+    async def dispatch(self, update, context):
+        """Route an update directly (for callers outside an Application)."""
+        found = self.match(update.callback_query.data)
+        if found is None:
+            return None
+        route, args = found
+        return await route.callback(update, context, **args)
@@ -0,0 +1,152 @@
+"""
+Provider Card Cache
+Pre-rendered Purple Board text for each provider: the short result-list
+snippet, the full profile text and the profile keyboard layout.
+
+Cards live in the shared Django cache under the provider id, stamped with
+the provider's updated_at. They are rendered lazily on first use and
+dropped whenever the provider (or its category) is saved. A card whose
+stamp doesn't match the row's updated_at (a change that skipped the
+signals) is rendered again, so paging and profile opens cost one
+(id, updated_at) query and no string assembly.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+
+def escape_md(text):
+    """Escape Markdown special characters in user input."""
+    if not text:
+        return text
+    text = str(text)
+    for char in ['_', '*', '`', '[']:
+        text = text.replace(char, f'\\{char}')
+    return text
+
+
+def _card_key(provider_id):
+    return f"purple:card:{provider_id}"
+
+
+def _cache():
+    return caches[settings.SEARCH_CACHE_ALIAS]
+
+
+def render_card(provider):
+    """Render the cached card dict for a provider (category must be loaded)."""
+    badge = provider.get_display_badge()
+    badge_str = f" {badge}" if badge else ""
+    name = escape_md(provider.name)
+
+    # Result list entry
+    snippet = f"{name}{badge_str}\n"
+    snippet += f"📝 {escape_md(provider.description[:80])}\n\n"
+    name_short = provider.name[:20] + "..." if len(provider.name) > 20 else provider.name
+
+    # Profile contact card
+    lines = [f"📋 {name}"]
+    if badge:
+        lines[0] += f" {badge}"
+    lines.append(f"\n📝 {escape_md(provider.description)}")
+
+    if provider.phone:
+        lines.append(f"📞 {escape_md(provider.phone)}")
+    if provider.telegram_handle:
+        lines.append(f"💬 {escape_md(provider.telegram_handle)}")
+    if provider.instagram_handle:
+        lines.append(f"📸 {escape_md(provider.instagram_handle)}")
+    if provider.plan_type == 'PREMIUM' and provider.hall_of_residence:
+        lines.append(f"🏠 {escape_md(provider.hall_of_residence)}")
+
+    profile = "\n".join(lines)
+
+    if provider.keywords:
+        keywords = provider.keywords if isinstance(provider.keywords, list) else [provider.keywords]
+        profile += f"\n\n🏷️ Keywords: {escape_md(', '.join(str(k) for k in keywords))}"
+
+    if provider.category:
+        profile += f"\n📁 Category: {escape_md(provider.category.name)}"
+
+    # Profile keyboard (rows of InlineKeyboardButton kwargs)
+    keyboard = []
+    contact_row = []
+    if provider.telegram_handle:
+        handle = provider.telegram_handle.lstrip('@')
+        contact_row.append({'text': "💬 Telegram", 'url': f"https://t.me/{handle}"})
+    if provider.instagram_handle:
+        handle = provider.instagram_handle.lstrip('@')
+        contact_row.append({'text': "📸 Instagram", 'url': f"https://instagram.com/{handle}"})
+    if contact_row:
+        keyboard.append(contact_row)
+    if provider.catalogue:
+        keyboard.append([{'text': "📄 View Catalogue", 'callback_data': f"catalogue_{provider.id}"}])
+
+    return {
+        'id': provider.id,
+        'updated_at': provider.updated_at.isoformat(),
+        'name': provider.name,
+        'badge': badge,
+        'summary': provider.description[:80],
+        'snippet': snippet,
+        'button': f"👤 View {name_short}",
+        'profile': profile,
+        'keyboard': keyboard,
+    }
+
+
+def get_cards(provider_ids):
+    """
+    Return cards for the given provider ids, in order.
+
+    Missing and outdated cards are rendered from one query and stored.
+    Ids that no longer exist are skipped.
+    """
+    from bot.models import ServiceProvider
+
+    if not provider_ids:
+        return []
+
+    stamps = {
+        pid: updated_at.isoformat()
+        for pid, updated_at in ServiceProvider.objects.filter(id__in=provider_ids).values_list('id', 'updated_at')
+    }
+    provider_ids = [pid for pid in provider_ids if pid in stamps]
+
+    cache = _cache()
+    keys = {pid: _card_key(pid) for pid in provider_ids}
+    try:
+        found = cache.get_many(list(keys.values()))
+    except Exception:
+        found = {}
+    cards = {
+        pid: found[key] for pid, key in keys.items()
+        if key in found and found[key]['updated_at'] == stamps[pid]
+    }
+
+    missing = [pid for pid in provider_ids if pid not in cards]
+    if missing:
+        rendered = {}
+        for provider in ServiceProvider.objects.filter(id__in=missing).select_related('category'):
+            card = render_card(provider)
+            cards[provider.id] = card
+            rendered[_card_key(provider.id)] = card
+        try:
+            cache.set_many(rendered, settings.CARD_CACHE_TIMEOUT)
+        except Exception:
+            pass
+
+    return [cards[pid] for pid in provider_ids if pid in cards]
+
+
+def get_card(provider_id):
+    """Return the card for one provider, or None if it does not exist."""
+    cards = get_cards([provider_id])
+    return cards[0] if cards else None
+
+
+def drop_cards(provider_ids):
+    """Forget the cards of changed providers."""
+    try:
+        _cache().delete_many([_card_key(pid) for pid in provider_ids])
+    except Exception:
+        pass
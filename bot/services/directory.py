@@ -0,0 +1,76 @@
+"""
+Category Directory
+The Purple Board "browse by category" list: categories with listed
+providers, busiest first, with their provider counts.
+
+Each category carries a denormalized `active_provider_count`, adjusted in
+the provider signals as providers are approved, deactivated, moved or
+deleted (and recounted after bulk admin updates). A directory page is then
+one read of the (-active_provider_count, name) index, cached alongside the
+search results and dropped with them on the same invalidation.
+"""
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from bot.services.search_cache import search_cache
+
+
+CATEGORIES_PER_PAGE = 10
+
+
+def listed_category_id(provider):
+    """Return the category a provider is listed under, or None if not listed."""
+    if provider.is_approved and provider.is_active:
+        return provider.category_id
+    return None
+
+
+def move_provider_count(old_category_id, new_category_id):
+    """Move one provider's contribution from one category's count to another's."""
+    from bot.models import Category
+
+    if old_category_id == new_category_id:
+        return
+    if old_category_id is not None:
+        Category.objects.filter(id=old_category_id).update(
+            active_provider_count=Greatest(F('active_provider_count') - 1, 0)
+        )
+    if new_category_id is not None:
+        Category.objects.filter(id=new_category_id).update(
+            active_provider_count=F('active_provider_count') + 1
+        )
+
+
+def refresh_category_counts(category_ids=None):
+    """Recount listed providers for the given categories (all if None)."""
+    from bot.models import Category
+
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(id__in=set(category_ids))
+
+    counts = categories.annotate(
+        listed=Count('providers', filter=Q(providers__is_approved=True, providers__is_active=True))
+    ).values_list('id', 'listed', 'active_provider_count')
+
+    for category_id, listed, stored in counts:
+        if listed != stored:
+            Category.objects.filter(id=category_id).update(active_provider_count=listed)
+
+
+def directory_page(page, per_page=CATEGORIES_PER_PAGE):
+    """
+    Return ([(id, name, count), ...], has_next) for one directory page.
+    """
+    from bot.models import Category
+
+    def compute():
+        start = page * per_page
+        return Category.objects.filter(
+            active_provider_count__gt=0
+        ).order_by(
+            '-active_provider_count', 'name'
+        ).values_list('id', 'name', 'active_provider_count')[start:start + per_page + 1]
+
+    rows = search_cache.get_or_compute('directory', page, compute)
+    return rows[:per_page], len(rows) > per_page
@@ -0,0 +1,165 @@
+"""
+News image ingestion
+Admins upload whatever their phone produced (often a 10 MB photo over
+Telegram's photo limits). After a News item is saved with a new image,
+a Telegram-sized rendition and a small thumbnail are generated from it:
+
+- EXIF orientation is applied and all metadata stripped
+- the rendition fits in NEWS_IMAGE_MAX_SIDE pixels (Telegram shows photos
+  at up to 1280px anyway) and the thumbnail in NEWS_THUMBNAIL_SIDE
+- both are saved as NEWS_IMAGE_FORMAT (JPEG or WEBP)
+
+The Pillow work runs in a process pool, driven from a background thread,
+so admin saves return right away; view_news sends the original until the
+rendition is ready.
+"""
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+
+_process_pool = None
+_pool_lock = threading.Lock()
+
+# Saves to storage and the database, and waits on the process pool
+_ingest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='news-images')
+
+
+def _get_process_pool():
+    global _process_pool
+    from django.conf import settings
+
+    with _pool_lock:
+        if _process_pool is None:
+            # spawn: forking a threaded web worker is unsafe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.NEWS_IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _process_pool
+
+
+def _reset_process_pool():
+    """Drop a pool whose worker died, so the next image starts a new one."""
+    global _process_pool
+
+    with _pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+            _process_pool = None
+
+
+def _encode(image, image_format, quality):
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, image_format, quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def render_image(data, max_side, thumb_side, image_format='JPEG', quality=85):
+    """
+    Return (rendition bytes, thumbnail bytes, width, height) for an image.
+
+    Runs in the process pool, so it only takes and returns plain values.
+    """
+    image = Image.open(io.BytesIO(data))
+    # JPEGs can be decoded straight at a fraction of their size
+    image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # A new image carries no EXIF/ICC metadata over
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    rendition = _encode(image, image_format, quality)
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail((thumb_side, thumb_side), Image.Resampling.LANCZOS)
+    thumb = _encode(thumbnail, image_format, quality)
+
+    return rendition, thumb, image.width, image.height
+
+
+def ingest_news_image(news_id, stale_files=()):
+    """
+    Generate and store the rendition and thumbnail for a News item's image,
+    then delete `stale_files` (the renditions of the image it replaced).
+    """
+    from django.conf import settings
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from django.db import close_old_connections
+    from bot.models import News
+
+    close_old_connections()
+    try:
+        news = News.objects.filter(id=news_id).first()
+        if news is None or not news.image:
+            for name in stale_files:
+                default_storage.delete(name)
+            return
+        source = news.image.name
+        with news.image.open('rb') as f:
+            data = f.read()
+
+        image_format = settings.NEWS_IMAGE_FORMAT
+        try:
+            rendition, thumb, width, height = _get_process_pool().submit(
+                render_image, data,
+                settings.NEWS_IMAGE_MAX_SIDE, settings.NEWS_THUMBNAIL_SIDE,
+                image_format, settings.NEWS_IMAGE_QUALITY,
+            ).result()
+        except BrokenProcessPool:
+            _reset_process_pool()
+            raise
+        except Exception as e:
+            print(f"Could not render news image {source}: {e}")
+            return
+
+        extension = 'jpg' if image_format == 'JPEG' else image_format.lower()
+        stem = os.path.splitext(os.path.basename(source))[0]
+        storage = news.image.storage
+        rendition_name = storage.save(
+            news._meta.get_field('image_rendition').generate_filename(news, f"{stem}.{extension}"),
+            ContentFile(rendition),
+        )
+        thumb_name = storage.save(
+            news._meta.get_field('image_thumbnail').generate_filename(news, f"{stem}.{extension}"),
+            ContentFile(thumb),
+        )
+
+        # update() skips the signals; only apply if the image wasn't replaced meanwhile
+        updated = News.objects.filter(id=news_id, image=source).update(
+            image_rendition=rendition_name,
+            image_thumbnail=thumb_name,
+            image_width=width,
+            image_height=height,
+        )
+        for name in (stale_files if updated else [rendition_name, thumb_name]):
+            storage.delete(name)
+    finally:
+        close_old_connections()
+
+
+def _report_failure(future):
+    if future.exception() is not None:
+        print(f"News image ingestion failed: {future.exception()}")
+
+
+def schedule_news_image(news_id, stale_files=()):
+    """Queue rendition generation for a News item, off the request thread."""
+    future = _ingest_executor.submit(ingest_news_image, news_id, list(stale_files))
+    future.add_done_callback(_report_failure)
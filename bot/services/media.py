@@ -0,0 +1,181 @@
+"""
+Telegram file_id registry
+Ads, news images and catalogues are stored files that get sent again and
+again. After the first send Telegram returns a file_id for the upload;
+sending that id again is a tiny request instead of a multi-megabyte upload
+(or a fetch of the Cloudinary URL).
+
+file_ids are kept in the TelegramFile table, keyed by storage path plus a
+content key, so a file replaced under the same name is uploaded afresh:
+the SHA-256 of a local file, or the size of a remote (Cloudinary) one,
+which is read without downloading the file. If Telegram rejects a stored
+file_id it is forgotten and the file is uploaded again.
+"""
+import hashlib
+import os
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+from telegram.error import BadRequest
+
+from bot.db import database_sync_to_async
+
+
+SEND_METHODS = {
+    'photo': 'send_photo',
+    'video': 'send_video',
+    'document': 'send_document',
+}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# In-process memos: storage path -> (stat signature, content key) and
+# (path, content key, kind) -> file_id
+_digests = {}
+_file_ids = {}
+
+
+def _local_path(name):
+    try:
+        return default_storage.path(name)
+    except NotImplementedError:
+        return None  # Remote storage (Cloudinary)
+
+
+def key_for_content(name, content):
+    """Return the content key of `content`, about to be saved as `name`."""
+    if _local_path(name) is None:
+        return f"size:{len(content)}"
+    return hashlib.sha256(content).hexdigest()
+
+
+def content_key(name):
+    """
+    Return the content key of a stored file, or None if it does not exist.
+
+    Local files are hashed, and rehashed only when their size or mtime
+    changes. Remote files are keyed on their size, read once per process
+    (their names are never reused).
+    """
+    path = _local_path(name)
+    if path is None:
+        memo = _digests.get(name)
+        if memo:
+            return memo[1]
+        try:
+            size = default_storage.size(name)
+        except Exception:
+            return None  # Missing, or the storage can't tell
+        _digests[name] = (None, f"size:{size}")
+        return _digests[name][1]
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    signature = (stat.st_size, stat.st_mtime_ns)
+
+    memo = _digests.get(name)
+    if memo and memo[0] == signature:
+        return memo[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    _digests[name] = (signature, digest.hexdigest())
+    return _digests[name][1]
+
+
+@database_sync_to_async
+def _get_file_id(name, digest, kind):
+    from bot.models import TelegramFile
+
+    return (
+        TelegramFile.objects
+        .filter(storage_path=name, content_hash=digest, kind=kind)
+        .values_list('file_id', flat=True)
+        .first()
+    )
+
+
+@database_sync_to_async
+def remember(name, digest, kind, file_id, file_unique_id=''):
+    """Record the file_id Telegram assigned to a stored file."""
+    from bot.models import TelegramFile
+
+    _file_ids[(name, digest, kind)] = file_id
+    try:
+        TelegramFile.objects.update_or_create(
+            storage_path=name, content_hash=digest, kind=kind,
+            defaults={'file_id': file_id, 'file_unique_id': file_unique_id},
+        )
+    except IntegrityError:
+        pass  # Recorded concurrently by another send
+
+
+@database_sync_to_async
+def _forget(name, digest, kind):
+    from bot.models import TelegramFile
+
+    _file_ids.pop((name, digest, kind), None)
+    TelegramFile.objects.filter(storage_path=name, content_hash=digest, kind=kind).delete()
+
+
+def _sent_file(message, kind):
+    """Return the (file_id, file_unique_id) of what a sent message carries."""
+    if kind == 'photo':
+        sent = message.photo[-1] if message.photo else None
+    else:
+        sent = getattr(message, kind, None)
+    if sent is None:
+        return None, None
+    return sent.file_id, sent.file_unique_id
+
+
+async def send_media(bot, kind, name, chat_id, filename=None, **kwargs):
+    """
+    Send the stored file `name` as a photo, video or document.
+
+    Reuses the file's Telegram file_id when one is known, and uploads it
+    otherwise. Returns the sent Message, or None if the file does not exist
+    or Telegram refused the message (e.g. a caption that fails to parse).
+    """
+    send = getattr(bot, SEND_METHODS[kind])
+    if filename and kind == 'document':
+        kwargs['filename'] = filename
+
+    digest = await sync_to_async(content_key, thread_sensitive=False)(name)
+    if digest is None:
+        return None
+
+    key = (name, digest, kind)
+    file_id = _file_ids.get(key)
+    if file_id is None:
+        file_id = await _get_file_id(name, digest, kind)
+    if file_id:
+        _file_ids[key] = file_id
+        try:
+            return await send(chat_id=chat_id, **{kind: file_id}, **kwargs)
+        except BadRequest as e:
+            if 'file' not in str(e).lower():
+                print(f"Could not send {name}: {e}")
+                return None
+            await _forget(name, digest, kind)
+
+    path = _local_path(name)
+    try:
+        if path is not None:
+            with open(path, 'rb') as f:
+                message = await send(chat_id=chat_id, **{kind: f}, **kwargs)
+        else:
+            message = await send(chat_id=chat_id, **{kind: default_storage.url(name)}, **kwargs)
+    except BadRequest as e:
+        print(f"Could not send {name}: {e}")
+        return None
+
+    file_id, file_unique_id = _sent_file(message, kind)
+    if file_id:
+        await remember(name, digest, kind, file_id, file_unique_id)
+    return message
@@ -0,0 +1,145 @@
+"""
+Search Result Pagination
+Fetches one page of Purple Board results at a time.
+
+Category pages use keyset pagination over (plan_priority, created_at, id),
+with the boundary row encoded as a short cursor carried in callback data.
+Text searches are ranked by relevance too, so their pages are cut from the
+shared cached ranking (see search_cache.py), anchored on the boundary
+provider id. Either way nothing but the query and a cursor is kept per user.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models import Q
+
+from bot.services.cards import get_cards
+from bot.services.search import plan_priority_annotation, search_provider_ids
+from bot.services.search_cache import search_cache
+
+
+# `cards` are pre-rendered provider cards (see cards.py), in page order
+Page = namedtuple('Page', ['cards', 'first_cursor', 'last_cursor', 'has_prev', 'has_next'])
+
+
+def _to_base36(number):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    if number == 0:
+        return '0'
+    text = ''
+    while number:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+    return text
+
+
+def encode_cursor(plan_priority, created_at, provider_id):
+    """Encode a keyset position as e.g. '3.1b2x9k0.7f'."""
+    micros = int(created_at.timestamp() * 1_000_000)
+    return f"{plan_priority}.{_to_base36(micros)}.{_to_base36(provider_id)}"
+
+
+def decode_cursor(cursor):
+    """Decode a keyset cursor into (plan_priority, created_at, id), or None."""
+    try:
+        plan_priority, micros, provider_id = cursor.split('.')
+        created_at = datetime.fromtimestamp(int(micros, 36) / 1_000_000, tz=timezone.utc)
+        return int(plan_priority), created_at, int(provider_id, 36)
+    except (AttributeError, ValueError):
+        return None
+
+
+def cached_search_ids(query_text, page_size):
+    """Return the shared, cached ranking of provider ids for a text query."""
+    return search_cache.get_or_compute(
+        'query', query_text,
+        lambda: search_provider_ids(query_text, min_results=page_size)
+    )
+
+
+def category_page(category_id, cursor, backwards, limit):
+    """Fetch one keyset page of a category's approved, active providers."""
+    from bot.models import ServiceProvider
+
+    providers = ServiceProvider.objects.filter(
+        category_id=category_id,
+        is_approved=True,
+        is_active=True
+    ).annotate(
+        plan_priority=plan_priority_annotation()
+    )
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        plan_priority, created_at, provider_id = position
+        op = 'gt' if backwards else 'lt'
+        providers = providers.filter(
+            Q(**{f'plan_priority__{op}': plan_priority}) |
+            Q(plan_priority=plan_priority, **{f'created_at__{op}': created_at}) |
+            Q(plan_priority=plan_priority, created_at=created_at, **{f'id__{op}': provider_id})
+        )
+
+    if backwards:
+        providers = providers.order_by('plan_priority', 'created_at', 'id')
+    else:
+        providers = providers.order_by('-plan_priority', '-created_at', '-id')
+
+    rows = list(providers.values_list('plan_priority', 'created_at', 'id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return Page([], None, None, False, False)
+
+    return Page(
+        cards=get_cards([row[2] for row in rows]),
+        first_cursor=encode_cursor(*rows[0]),
+        last_cursor=encode_cursor(*rows[-1]),
+        has_prev=has_more if backwards else position is not None,
+        has_next=True if backwards else has_more,
+    )
+
+
+def category_total(category_id):
+    """Count a category's listed providers, capped at SEARCH_MAX_RESULTS + 1."""
+    from bot.models import ServiceProvider
+
+    cap = settings.SEARCH_MAX_RESULTS
+    return ServiceProvider.objects.filter(
+        category_id=category_id,
+        is_approved=True,
+        is_active=True
+    )[:cap + 1].count()
+
+
+def ranked_page(result_ids, cursor, backwards, limit, page):
+    """
+    Cut one page out of a ranked id list.
+
+    The cursor is the base-36 id of the boundary provider. If it is no
+    longer in the list (results changed), fall back to the page offset.
+    """
+    start = page * limit
+    if cursor:
+        try:
+            anchor = result_ids.index(int(cursor, 36))
+            start = anchor - limit if backwards else anchor + 1
+        except ValueError:
+            pass
+    start = max(0, start)
+
+    cards = get_cards(result_ids[start:start + limit])
+
+    if not cards:
+        return Page([], None, None, False, False)
+
+    return Page(
+        cards=cards,
+        first_cursor=_to_base36(cards[0]['id']),
+        last_cursor=_to_base36(cards[-1]['id']),
+        has_prev=start > 0,
+        has_next=start + limit < len(result_ids),
+    )
@@ -0,0 +1,192 @@
+"""
+Payment status updates
+Payment rows are moved out of PENDING by Paystack's charge.success webhook
+(bot/views.py), or by the reconciler (bot/services/reconciler.py) for
+payments the webhook never confirmed. Updates are conditional, so a
+webhook delivered twice, or racing the reconciler, changes the row and
+notifies the provider once:
+
+- SUCCESS is applied to any payment not already successful (a failed
+  attempt can be retried on the same checkout link), and only when
+  Paystack reports at least the payment's amount, in NGN
+- FAILED and ABANDONED are only applied to PENDING payments
+
+The "I've Paid - Verify" button only reads the local row, through
+get_payment(): taps on the same reference share one query while it runs
+and its result for PAYMENT_STATUS_CACHE_SECONDS. Concurrent Paystack
+verifies of one reference share one call too (verify_once()).
+"""
+from django.conf import settings
+from django.utils import timezone
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.db import database_sync_to_async
+from bot.rate_limiter import BULK
+from bot.services.paystack import verify_payment
+from bot.services.singleflight import SingleFlight
+
+
+# Paystack transaction status -> Payment.status
+PAYSTACK_STATUSES = {
+    'success': 'SUCCESS',
+    'failed': 'FAILED',
+    'abandoned': 'ABANDONED',
+}
+
+
+def apply_paystack_status(reference, paystack_status, data=None):
+    """
+    Record Paystack's status for a payment.
+
+    Returns the Payment if its status changed, or None (unknown reference,
+    unfinished transaction, amount missing or too low, currency not NGN,
+    or nothing to change).
+    """
+    from bot.models import Payment
+
+    status = PAYSTACK_STATUSES.get(paystack_status)
+    if status is None:
+        return None
+
+    payments = Payment.objects.filter(reference=reference)
+    if status == 'SUCCESS':
+        amount = (data or {}).get('amount')
+        if amount is None or (data or {}).get('currency') != 'NGN':
+            return None
+        payments = payments.exclude(status='SUCCESS').filter(amount__lte=amount)
+    else:
+        payments = payments.filter(status='PENDING')
+
+    changed = payments.update(
+        status=status,
+        paystack_response=data,
+        verified_at=timezone.now() if status == 'SUCCESS' else None,
+    )
+    if not changed:
+        return None
+    return Payment.objects.select_related('provider').get(reference=reference)
+
+
+payment_lookups = SingleFlight(ttl=settings.PAYMENT_STATUS_CACHE_SECONDS)
+# Only coalesced: the reconciler wants Paystack's current answer
+paystack_verifications = SingleFlight()
+
+
+def _load_payment(reference):
+    from bot.models import Payment
+
+    return Payment.objects.select_related('provider').filter(reference=reference).first()
+
+
+async def get_payment(reference):
+    """Return the Payment for `reference` (or None), coalescing repeat lookups."""
+    return await payment_lookups.do(reference, database_sync_to_async(_load_payment), reference)
+
+
+async def verify_once(reference):
+    """verify_payment(), with concurrent verifies of one reference sharing a call."""
+    return await paystack_verifications.do(reference, verify_payment, reference)
+
+
+async def record_paystack_status(reference, paystack_status, data=None):
+    """apply_paystack_status() on the bot's DB pool, dropping cached lookups if it changed."""
+    payment = await database_sync_to_async(apply_paystack_status)(reference, paystack_status, data)
+    if payment is not None:
+        payment_lookups.forget(reference)
+    return payment
+
+
+def set_payment_link(reference, authorization_url):
+    """Store the checkout link of a payment whose link generation was queued."""
+    from bot.models import Payment
+
+    changed = Payment.objects.filter(reference=reference, status='PENDING', authorization_url='').update(
+        authorization_url=authorization_url
+    )
+    if not changed:
+        return None
+    return Payment.objects.select_related('provider').get(reference=reference)
+
+
+def replace_reference(reference, new_reference):
+    """
+    Give a queued payment a new reference (Paystack already has the old one
+    from an attempt whose answer was lost) and retry it on the next run.
+    """
+    from bot.models import Payment
+
+    return Payment.objects.filter(reference=reference, status='PENDING', authorization_url='').update(
+        reference=new_reference, next_check_at=None
+    )
+
+
+def payment_confirmed_text(payment):
+    return (
+        "✅ *PAYMENT VERIFIED!* 🎉\n\n"
+        f"💰 Amount: ₦{payment.amount_naira:,.0f}\n"
+        f"📧 Ref: `{payment.reference}`\n\n"
+        "Your profile is now *pending admin approval*.\n"
+        "Once approved, you'll appear in Purple Board search!\n\n"
+        "_Thank you for choosing Eagles View!_ 🦅"
+    )
+
+
+def payment_notice(payment):
+    """Return (text, reply_markup) telling the provider their payment's outcome."""
+    main_menu = [InlineKeyboardButton("« Main Menu", callback_data="main_menu")]
+    if payment.status == 'SUCCESS':
+        return payment_confirmed_text(payment), InlineKeyboardMarkup([main_menu])
+    if payment.status == 'PENDING':
+        # A queued payment link is ready
+        text = (
+            "💳 *Your payment link is ready!*\n\n"
+            f"💰 *Amount:* ₦{payment.amount_naira:,.0f}\n"
+            f"📧 *Ref:* `{payment.reference}`\n\n"
+            "After payment, click *'✅ I've Paid'* to verify."
+        )
+        return text, InlineKeyboardMarkup([
+            [InlineKeyboardButton("💳 Pay Now", url=payment.authorization_url)],
+            [InlineKeyboardButton("✅ I've Paid - Verify", callback_data=f"verify_payment_{payment.reference}")],
+            main_menu,
+        ])
+    if payment.status == 'FAILED':
+        text = (
+            "❌ *Payment failed.*\n\n"
+            f"📧 Ref: `{payment.reference}`\n\n"
+            "Your registration is saved. Please try the payment again:"
+        )
+    else:
+        text = (
+            "⌛ *Payment not completed.*\n\n"
+            f"📧 Ref: `{payment.reference}`\n\n"
+            "We didn't receive your payment. Your registration is saved; "
+            "pay below or contact the admin to activate your profile."
+        )
+    rows = [main_menu]
+    if payment.authorization_url:
+        rows.insert(0, [InlineKeyboardButton("💳 Try Again", url=payment.authorization_url)])
+    return text, InlineKeyboardMarkup(rows)
+
+
+async def notify_payment(payment, bot=None):
+    """
+    Message the provider about their payment's new status.
+
+    Uses `bot` when given (the running application's, so the call is rate
+    limited), otherwise a short-lived Bot.
+    """
+    text, reply_markup = payment_notice(payment)
+    kwargs = {
+        'chat_id': payment.provider.telegram_user_id,
+        'text': text,
+        'parse_mode': 'Markdown',
+        'reply_markup': reply_markup,
+    }
+    try:
+        if bot is not None:
+            await bot.send_message(**kwargs, rate_limit_args={'lane': BULK})
+        else:
+            async with Bot(settings.TELEGRAM_BOT_TOKEN) as short_lived_bot:
+                await short_lived_bot.send_message(**kwargs)
+    except Exception as e:
+        print(f"Could not notify provider of payment {payment.reference}: {e}")
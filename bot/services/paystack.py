@@ -1,13 +1,47 @@
 """
 Paystack Payment Service
 Handles payment initialization and verification via Paystack API.
+
+Calls are async and share one httpx.AsyncClient per process (the bot and
+the web views alike), so connections to Paystack are kept alive and
+reused, over HTTP/2 when the h2 package is installed. Connecting and
+reading have separate timeouts (PAYSTACK_CONNECT_TIMEOUT,
+PAYSTACK_READ_TIMEOUT), and no thread is held while Paystack answers.
+
+When Paystack is slow or down (see bot/services/resilience.py):
+- failed calls are retried PAYSTACK_RETRIES times with jittered backoff:
+  verifies on any timeout, connection error, 429 or 5xx; initializes only
+  when the request never reached Paystack (it isn't idempotent)
+- after PAYSTACK_BREAKER_FAILURES calls in a row fail (each counted once,
+  after its retries) the circuit opens and calls fail fast for
+  PAYSTACK_BREAKER_COOLDOWN seconds
+
+Failed calls return {"success": False, "error": ..., "retryable": True}
+when trying again later may work.
 """
-import requests
+import asyncio
+import importlib.util
 import uuid
+
+import httpx
 from django.conf import settings
 
+from bot.metrics import paystack_circuit_state, paystack_errors, paystack_retries, paystack_seconds
+from bot.services.resilience import STATE_VALUES, CircuitBreaker, CircuitOpen, backoff_delay
+
+
+# Shown to users instead of a raw network error
+UNAVAILABLE_MESSAGE = "Paystack is not responding right now"
+
+_client = None
+_client_loop = None
+
+breaker = CircuitBreaker(settings.PAYSTACK_BREAKER_FAILURES, settings.PAYSTACK_BREAKER_COOLDOWN, name='Paystack')
+paystack_circuit_state.set_function(lambda: STATE_VALUES[breaker.state])
+
 
-PAYSTACK_BASE_URL = "https://api.paystack.co"
+class TransientError(Exception):
+    """A failure that may succeed if tried again (timeout, 429, 5xx)."""
 
 
 def get_headers():
@@ -18,27 +52,110 @@ def get_headers():
     }
 
 
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide Paystack client.
+
+    A client's connections belong to the event loop that opened them, so a
+    new client is created if this is called from a different loop (e.g. a
+    management command's asyncio.run()).
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=settings.PAYSTACK_BASE_URL,
+            http2=importlib.util.find_spec('h2') is not None,
+            timeout=httpx.Timeout(
+                settings.PAYSTACK_READ_TIMEOUT,
+                connect=settings.PAYSTACK_CONNECT_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.PAYSTACK_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PAYSTACK_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_client():
+    """Close the shared client (on bot/web server shutdown)."""
+    global _client, _client_loop
+
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+async def _request(operation, method, path, idempotent, **kwargs):
+    """
+    Send a request with retries and the circuit breaker; return the JSON body.
+
+    Raises CircuitOpen, or TransientError once the retries are used up. The
+    breaker counts the call once, after its retries; a cancelled call isn't
+    counted.
+    """
+    attempts = settings.PAYSTACK_RETRIES + 1
+    breaker.check()
+    try:
+        for attempt in range(attempts):
+            try:
+                with paystack_seconds.time(operation=operation):
+                    response = await get_client().request(method, path, headers=get_headers(), **kwargs)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise TransientError(f"Paystack returned HTTP {response.status_code}")
+                data = response.json()
+            except (httpx.TransportError, TransientError) as e:
+                # Only a request that never left can be resent when it isn't idempotent
+                retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if not retryable or attempt == attempts - 1:
+                    raise TransientError(str(e) or type(e).__name__) from e
+            else:
+                breaker.record_success()
+                return data
+            paystack_retries.inc(operation=operation)
+            await asyncio.sleep(backoff_delay(attempt, settings.PAYSTACK_RETRY_BASE, settings.PAYSTACK_RETRY_CAP))
+    except asyncio.CancelledError:
+        # The caller gave up, which says nothing about Paystack
+        breaker.release()
+        raise
+    except Exception:
+        # Out of retries, or a bad body
+        breaker.record_failure()
+        raise
+
+
+def _unavailable(operation, e):
+    paystack_errors.inc(operation=operation)
+    # Fast failures aren't logged one by one; the breaker logs opening and closing
+    if not isinstance(e, CircuitOpen):
+        print(f"Paystack {operation} failed: {e}")
+    return {"success": False, "error": UNAVAILABLE_MESSAGE, "retryable": True}
+
+
 def generate_reference():
     """Generate a unique payment reference."""
     return f"EV-{uuid.uuid4().hex[:12].upper()}"
 
 
-def initialize_payment(email: str, amount_kobo: int, reference: str, metadata: dict = None) -> dict:
+async def initialize_payment(email: str, amount_kobo: int, reference: str, metadata: dict = None) -> dict:
     """
     Initialize a Paystack transaction.
-    
+
     Args:
         email: Customer email address
         amount_kobo: Amount in kobo (100 kobo = ₦1)
         reference: Unique payment reference
         metadata: Optional metadata dict
-    
+
     Returns:
         dict with 'authorization_url', 'access_code', 'reference'
         or dict with 'error' key on failure
     """
-    url = f"{PAYSTACK_BASE_URL}/transaction/initialize"
-    
     payload = {
         "email": email,
         "amount": amount_kobo,
@@ -46,57 +163,61 @@ def initialize_payment(email: str, amount_kobo: int, reference: str, metadata: d
         "currency": "NGN",
         "channels": ["card", "bank", "ussd", "bank_transfer"],
     }
-    
+
     if metadata:
         payload["metadata"] = metadata
-    
+
     try:
-        response = requests.post(url, json=payload, headers=get_headers(), timeout=30)
-        data = response.json()
-        
-        if data.get("status"):
-            return {
-                "success": True,
-                "authorization_url": data["data"]["authorization_url"],
-                "access_code": data["data"]["access_code"],
-                "reference": data["data"]["reference"],
-            }
-        else:
-            return {"success": False, "error": data.get("message", "Unknown error")}
-    
-    except requests.RequestException as e:
-        return {"success": False, "error": str(e)}
-
-
-def verify_payment(reference: str) -> dict:
+        data = await _request('initialize', 'POST', "/transaction/initialize", idempotent=False, json=payload)
+    except (CircuitOpen, TransientError) as e:
+        return _unavailable('initialize', e)
+    except (httpx.HTTPError, ValueError) as e:
+        # e.g. a body that fails to decode; not worth retrying
+        paystack_errors.inc(operation='initialize')
+        return {"success": False, "error": str(e) or type(e).__name__}
+
+    if data.get("status"):
+        return {
+            "success": True,
+            "authorization_url": data["data"]["authorization_url"],
+            "access_code": data["data"]["access_code"],
+            "reference": data["data"]["reference"],
+        }
+    else:
+        paystack_errors.inc(operation='initialize')
+        return {"success": False, "error": data.get("message", "Unknown error")}
+
+
+async def verify_payment(reference: str) -> dict:
     """
     Verify a Paystack transaction.
-    
+
     Args:
         reference: Payment reference to verify
-    
+
     Returns:
         dict with payment status and details
     """
-    url = f"{PAYSTACK_BASE_URL}/transaction/verify/{reference}"
-    
     try:
-        response = requests.get(url, headers=get_headers(), timeout=30)
-        data = response.json()
-        
-        if data.get("status"):
-            tx_data = data["data"]
-            return {
-                "success": True,
-                "status": tx_data["status"],  # 'success', 'failed', 'abandoned'
-                "amount": tx_data["amount"],
-                "reference": tx_data["reference"],
-                "paid_at": tx_data.get("paid_at"),
-                "channel": tx_data.get("channel"),
-                "data": tx_data,
-            }
-        else:
-            return {"success": False, "error": data.get("message", "Unknown error")}
-    
-    except requests.RequestException as e:
-        return {"success": False, "error": str(e)}
+        data = await _request('verify', 'GET', f"/transaction/verify/{reference}", idempotent=True)
+    except (CircuitOpen, TransientError) as e:
+        return _unavailable('verify', e)
+    except (httpx.HTTPError, ValueError) as e:
+        # e.g. a body that fails to decode; not worth retrying
+        paystack_errors.inc(operation='verify')
+        return {"success": False, "error": str(e) or type(e).__name__}
+
+    if data.get("status"):
+        tx_data = data["data"]
+        return {
+            "success": True,
+            "status": tx_data["status"],  # 'success', 'failed', 'abandoned'
+            "amount": tx_data["amount"],
+            "reference": tx_data["reference"],
+            "paid_at": tx_data.get("paid_at"),
+            "channel": tx_data.get("channel"),
+            "data": tx_data,
+        }
+    else:
+        paystack_errors.inc(operation='verify')
+        return {"success": False, "error": data.get("message", "Unknown error")}
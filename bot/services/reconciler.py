@@ -0,0 +1,188 @@
+"""
+Payment reconciliation
+Catches payments the charge.success webhook never confirmed (webhook not
+configured, delivery lost, or the payment failed). A JobQueue job runs
+every RECONCILE_INTERVAL seconds and asks Paystack about PENDING payments
+that are due:
+
+- a payment is first checked RECONCILE_FIRST_CHECK seconds after it was
+  created, then again after half its age (between RECONCILE_FIRST_CHECK
+  and RECONCILE_MAX_BACKOFF), so new payments are checked often and old
+  ones rarely
+- up to RECONCILE_BATCH payments per run, RECONCILE_CONCURRENCY at a time,
+  and no new checks are started after RECONCILE_BUDGET seconds
+- success -> SUCCESS, failed -> FAILED; payments still unfinished at
+  Paystack ("abandoned", "ongoing", "pending", ... or unknown to it) once
+  older than PAYMENT_ABANDON_AFTER -> ABANDONED, so none is polled forever
+- payments saved without a checkout link (Paystack was unavailable at
+  registration) get one generated, and it is sent to the provider
+
+The provider is told when their payment changes. All of it is awaited on
+the event loop (ORM calls on the bot's DB pool), so handlers are never
+held up; each payment is claimed by moving its next_check_at before
+Paystack is asked, so overlapping runs don't check it twice.
+
+`manage.py reconcilepayments --fake-paystack` runs one pass against a
+local fake Paystack (bot/benchmarks/fake_paystack.py).
+"""
+import asyncio
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from bot.db import database_sync_to_async
+from bot.services.payments import (
+    notify_payment, record_paystack_status, replace_reference, set_payment_link, verify_once
+)
+from bot.services.paystack import generate_reference, initialize_payment
+
+
+# Paystack's message for a reference it has no transaction for
+NOT_FOUND_MESSAGE = 'Transaction reference not found'
+
+
+def next_check_delay(age):
+    """Seconds until a payment `age` seconds old is checked again."""
+    return min(settings.RECONCILE_MAX_BACKOFF, max(settings.RECONCILE_FIRST_CHECK, age / 2))
+
+
+def _claim_due_payments(limit):
+    """Return up to `limit` due PENDING payments, pushing back their next check."""
+    from bot.models import Payment
+
+    now = timezone.now()
+    due = (
+        Payment.objects
+        .filter(status='PENDING')
+        # Queued links are generated right away; others give the user time to pay
+        .filter(Q(authorization_url='') | Q(created_at__lte=now - timedelta(seconds=settings.RECONCILE_FIRST_CHECK)))
+        .filter(Q(next_check_at__isnull=True) | Q(next_check_at__lte=now))
+        .order_by('next_check_at', 'created_at')
+        .values_list('id', 'reference', 'created_at', 'next_check_at', 'authorization_url')[:limit]
+    )
+    claimed = []
+    for payment_id, reference, created_at, next_check_at, authorization_url in due:
+        age = (now - created_at).total_seconds()
+        # Conditional on next_check_at, so a concurrent run can't claim it too
+        if Payment.objects.filter(id=payment_id, next_check_at=next_check_at).update(
+            next_check_at=now + timedelta(seconds=next_check_delay(age))
+        ):
+            claimed.append((reference, age, bool(authorization_url)))
+    return claimed
+
+
+def outcome_for(result, age):
+    """Map a verify_payment() result to the Paystack status to record, or None to wait."""
+    if result.get('success'):
+        if result.get('status') in ('success', 'failed'):
+            return result['status']
+        # Any other status is unfinished; give the user until PAYMENT_ABANDON_AFTER
+    elif result.get('error') != NOT_FOUND_MESSAGE:
+        return None  # Paystack couldn't answer; ask again later
+    return 'abandoned' if age >= settings.PAYMENT_ABANDON_AFTER else None
+
+
+async def reconcile_payment(reference, age, notify):
+    """Check one payment with Paystack; return its new status, or None if unchanged."""
+    result = await verify_once(reference)
+    outcome = outcome_for(result, age)
+    if outcome is None:
+        return None
+    payment = await record_paystack_status(reference, outcome, result.get('data'))
+    if payment is None:
+        return None
+    await notify(payment)
+    return payment.status
+
+
+def _load_queued_payment(reference):
+    from bot.models import Payment
+
+    return Payment.objects.select_related('provider').filter(
+        reference=reference, status='PENDING', authorization_url=''
+    ).first()
+
+
+async def generate_link(reference, notify):
+    """Create the Paystack transaction for a queued payment; return 'LINK_SENT' once sent."""
+    payment = await database_sync_to_async(_load_queued_payment)(reference)
+    if payment is None:
+        return None
+    provider = payment.provider
+    result = await initialize_payment(
+        email=payment.email or f'{provider.telegram_user_id}@eaglesview.bot',
+        amount_kobo=payment.amount,
+        reference=reference,
+        metadata={
+            "provider_id": provider.id,
+            "provider_name": provider.name,
+            "plan_type": payment.plan_type,
+            "telegram_user_id": provider.telegram_user_id,
+        },
+    )
+    if not result.get('success'):
+        if 'duplicate' in result.get('error', '').lower():
+            await database_sync_to_async(replace_reference)(reference, generate_reference())
+        return None
+    payment = await database_sync_to_async(set_payment_link)(reference, result['authorization_url'])
+    if payment is None:
+        return None
+    await notify(payment)
+    return 'LINK_SENT'
+
+
+async def reconcile_payments(notify, batch=None, concurrency=None, budget=None):
+    """
+    Check the due PENDING payments; return {status: count} of the changes.
+
+    `notify` is awaited with each payment whose status changed.
+    """
+    batch = batch or settings.RECONCILE_BATCH
+    semaphore = asyncio.Semaphore(concurrency or settings.RECONCILE_CONCURRENCY)
+    deadline = time.monotonic() + (budget or settings.RECONCILE_BUDGET)
+
+    claimed = await database_sync_to_async(_claim_due_payments)(batch)
+
+    async def check(reference, age, has_link):
+        async with semaphore:
+            if time.monotonic() > deadline:
+                return 'SKIPPED'
+            try:
+                if not has_link:
+                    return await generate_link(reference, notify)
+                return await reconcile_payment(reference, age, notify)
+            except Exception as e:
+                print(f"Could not reconcile payment {reference}: {e}")
+                return None
+
+    changes = {}
+    for status in await asyncio.gather(*(check(*payment) for payment in claimed)):
+        if status is not None:
+            changes[status] = changes.get(status, 0) + 1
+    if claimed:
+        print(f"Reconciled {len(claimed)} pending payments: {changes or 'no changes'}")
+    return changes
+
+
+async def reconcile_job(context) -> None:
+    """JobQueue callback: reconcile, notifying providers through the bot."""
+    async def notify(payment):
+        await notify_payment(payment, context.bot)
+
+    await reconcile_payments(notify)
+
+
+def schedule_reconciler(job_queue):
+    """Run reconcile_job every RECONCILE_INTERVAL seconds (never two at once)."""
+    if settings.RECONCILE_INTERVAL <= 0:
+        return None
+    return job_queue.run_repeating(
+        reconcile_job,
+        interval=settings.RECONCILE_INTERVAL,
+        first=settings.RECONCILE_INTERVAL,
+        name='reconcile_payments',
+        job_kwargs={'max_instances': 1, 'coalesce': True},
+    )
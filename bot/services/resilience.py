@@ -0,0 +1,100 @@
+"""
+Retries and circuit breaking for outbound calls
+Used by the Paystack client (bot/services/paystack.py):
+
+- backoff_delay() gives "full jitter" exponential backoff, so callers that
+  failed together don't all retry at the same moment
+- CircuitBreaker opens after `failure_threshold` failures in a row; while
+  open, calls fail straight away instead of waiting on a service that is
+  down. After `cooldown` seconds one trial call is let through (half
+  open): success closes the circuit, failure opens it again. State
+  changes are logged (not every rejected call).
+"""
+import random
+import threading
+import time
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def backoff_delay(attempt, base, cap):
+    """Seconds to wait before retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitOpen(Exception):
+    """The circuit is open; the call was not made."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, cooldown, name='circuit'):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0              # calls failed fast while open
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may be made now (and reserve the trial call when half open)."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self._set_state(HALF_OPEN)
+                self._trial_running = False
+            if self.state == HALF_OPEN:
+                if self._trial_running:
+                    self.rejected += 1
+                    return False
+                self._trial_running = True
+            return True
+
+    def check(self):
+        """Raise CircuitOpen unless a call may be made now."""
+        if not self.allow():
+            raise CircuitOpen()
+
+    def record_success(self):
+        with self._lock:
+            self._set_state(CLOSED)
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._set_state(OPEN)
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back a call allowed by allow() that ended without an outcome (cancelled)."""
+        with self._lock:
+            self._trial_running = False
+
+    def is_open(self):
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.cooldown
+
+    def _set_state(self, state):
+        if state != self.state:
+            print(f"{self.name} circuit {state.replace('_', ' ')}")
+            self.state = state
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.rejected = 0
+            self._trial_running = False
@@ -0,0 +1,533 @@
+"""
+Purple Board Search Service
+Process-local inverted keyword index for provider search, backed by the
+database full-text index (PostgreSQL tsvector / SQLite FTS5) and a plain
+regex ORM fallback. Typos are handled by a trigram fuzzy matcher.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError
+from django.db.models import Q, Case, When, Value, IntegerField
+
+from bot.services.search_cache import search_cache
+
+
+PLAN_PRIORITY = {
+    'PREMIUM': 3,
+    'VERIFIED': 2,
+    'BASIC': 1,
+}
+
+# Relevance weight of each field a token can come from (name > keywords > description)
+FIELD_WEIGHTS = {
+    'name': 3,
+    'keywords': 2,
+    'category': 2,
+    'description': 1,
+}
+
+# Fuzzy matching only looks at tokens from these fields (not descriptions)
+FUZZY_MIN_WEIGHT = FIELD_WEIGHTS['category']
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens."""
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def trigrams(token):
+    """Return the set of trigrams of a token, padded like pg_trgm."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(shared, count, other_count):
+    """Jaccard index of two trigram sets of `count` and `other_count` trigrams sharing `shared`."""
+    return shared / (count + other_count - shared)
+
+
+def plan_priority_annotation():
+    """Return the Case expression that ranks providers by plan."""
+    return Case(
+        *[When(plan_type=plan, then=Value(priority)) for plan, priority in PLAN_PRIORITY.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+
+def provider_tokens(provider, category_name=None):
+    """Return a dict of searchable token -> relevance weight for a provider."""
+    keywords = provider.keywords if isinstance(provider.keywords, list) else [provider.keywords]
+    fields = {
+        'name': tokenize(provider.name),
+        'keywords': [token for keyword in keywords for token in tokenize(keyword)],
+        'category': tokenize(category_name),
+        'description': tokenize(provider.description),
+    }
+    tokens = {}
+    for field, field_tokens in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for token in field_tokens:
+            if weight > tokens.get(token, 0):
+                tokens[token] = weight
+    return tokens
+
+
+class ProviderIndex:
+    """
+    Inverted index from token to approved, active provider ids.
+
+    Built at bot startup and kept current by the model signals in
+    bot/signals.py. Writes made in another process (e.g. the admin under
+    gunicorn) bump the shared search cache generation, which marks the
+    index stale until it is rebuilt.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}        # token -> {provider id: weight}
+        self._docs = {}            # provider id -> (sort_key, tokens, category_id)
+        self._categories = {}      # category id -> set of provider ids
+        self._trigrams = {}        # trigram -> set of tokens, for fuzzy lookups
+        self._trigram_counts = {}  # token -> number of distinct trigrams
+        self._vocabulary = []      # sorted tokens, for prefix lookups
+        self._vocabulary_dirty = False
+        self._built_at = None
+        self._building = False
+        self._generation = None    # search cache generation the index reflects
+
+    def is_warm(self):
+        """Return True if the index is built, recent and reflects the latest writes."""
+        if self._built_at is None:
+            return False
+        if self._generation != search_cache.generation():
+            return False
+        return time.monotonic() - self._built_at < settings.SEARCH_INDEX_MAX_AGE
+
+    def advance_generation(self, old_generation, new_generation):
+        """Follow a cache invalidation caused by a write this index already applied."""
+        with self._lock:
+            if self._generation == old_generation:
+                self._generation = new_generation
+
+    def build(self):
+        """Rebuild the whole index from the database."""
+        from bot.models import ServiceProvider
+
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        try:
+            generation = search_cache.generation()
+            providers = ServiceProvider.objects.filter(
+                is_approved=True,
+                is_active=True
+            ).select_related('category').only(
+                'id', 'name', 'description', 'keywords', 'plan_type', 'created_at',
+                'category__id', 'category__name'
+            )
+
+            # Build off to the side so searches aren't blocked meanwhile.
+            # Writes applied to the old index during the build advance the
+            # generation, so the swapped-in index is stale and rebuilt again.
+            fresh = ProviderIndex()
+            for provider in providers.iterator(chunk_size=2000):
+                category = provider.category
+                fresh._add(provider, category.name if category else None)
+
+            with self._lock:
+                self._postings = fresh._postings
+                self._docs = fresh._docs
+                self._categories = fresh._categories
+                self._trigrams = fresh._trigrams
+                self._trigram_counts = fresh._trigram_counts
+                self._vocabulary = sorted(fresh._postings)
+                self._vocabulary_dirty = False
+                self._built_at = time.monotonic()
+                self._generation = generation
+        finally:
+            self._building = False
+
+    def refresh(self):
+        """Rebuild the index unless it is warm (or a rebuild is already running)."""
+        if not self.is_warm():
+            self.build()
+
+    def update_provider(self, provider):
+        """Re-index a single provider after it was saved."""
+        if self._built_at is None:
+            return
+        with self._lock:
+            self._remove(provider.id)
+            if provider.is_approved and provider.is_active:
+                category = provider.category
+                self._add(provider, category.name if category else None)
+
+    def remove_provider(self, provider_id):
+        """Drop a deleted provider from the index."""
+        if self._built_at is None:
+            return
+        with self._lock:
+            self._remove(provider_id)
+
+    def update_category(self, category, deleted=False):
+        """Re-index the providers of a renamed or deleted category."""
+        if self._built_at is None:
+            return
+        from bot.models import ServiceProvider
+
+        with self._lock:
+            member_ids = list(self._categories.get(category.id, ()))
+        if not member_ids:
+            return
+
+        # On delete the providers' category has already been set to NULL
+        providers = ServiceProvider.objects.filter(id__in=member_ids).select_related('category')
+        with self._lock:
+            if deleted:
+                self._categories.pop(category.id, None)
+            for provider in providers:
+                self._remove(provider.id)
+                if provider.is_approved and provider.is_active:
+                    self._add(provider, provider.category.name if provider.category else None)
+
+    def search(self, query_text, limit=None):
+        """
+        Return ordered provider ids matching every token in the query.
+
+        Each query token matches any indexed token it is a prefix of, so
+        'lash' also finds 'lashes'. Results are ordered by plan priority,
+        then relevance (name > keywords > description), then newest first.
+        """
+        tokens = tokenize(query_text)
+        if not tokens:
+            return []
+
+        with self._lock:
+            if self._vocabulary_dirty:
+                self._vocabulary = sorted(self._postings)
+                self._vocabulary_dirty = False
+
+            scores = None
+            for token in tokens:
+                matches = self._prefix_matches(token)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {
+                        pid: score + matches[pid]
+                        for pid, score in scores.items() if pid in matches
+                    }
+                if not scores:
+                    return []
+
+            def sort_key(pid):
+                plan, created, neg_id = self._docs[pid][0]
+                return (plan, -scores[pid], created, neg_id)
+
+            if limit is not None:
+                return heapq.nsmallest(limit, scores, key=sort_key)
+            return sorted(scores, key=sort_key)
+
+    def fuzzy_search(self, query_text, threshold, deadline, limit=None):
+        """
+        Return ordered provider ids whose name, keyword or category tokens
+        are trigram-similar to every token in the query.
+
+        Similarity is the Jaccard index of the trigram sets. Stops early
+        and returns what it has once `deadline` (time.perf_counter) passes.
+        """
+        tokens = tokenize(query_text)
+        if not tokens:
+            return []
+
+        with self._lock:
+            scores = None
+            for token in tokens:
+                query_trigrams = trigrams(token)
+                overlaps = Counter()
+                for trigram in query_trigrams:
+                    overlaps.update(self._trigrams.get(trigram, ()))
+                    if time.perf_counter() > deadline:
+                        break
+
+                matches = {}
+                for term, shared in overlaps.items():
+                    similarity = trigram_similarity(shared, len(query_trigrams), self._trigram_counts[term])
+                    if similarity < threshold:
+                        continue
+                    for pid, weight in self._postings[term].items():
+                        if weight < FUZZY_MIN_WEIGHT:
+                            continue
+                        score = similarity * weight
+                        if score > matches.get(pid, 0):
+                            matches[pid] = score
+
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {
+                        pid: score + matches[pid]
+                        for pid, score in scores.items() if pid in matches
+                    }
+                if not scores or time.perf_counter() > deadline:
+                    break
+
+            if not scores:
+                return []
+
+            def sort_key(pid):
+                plan, created, neg_id = self._docs[pid][0]
+                return (plan, -scores[pid], created, neg_id)
+
+            if limit is not None:
+                return heapq.nsmallest(limit, scores, key=sort_key)
+            return sorted(scores, key=sort_key)
+
+    def _prefix_matches(self, token):
+        """Return {provider id: best weight} over indexed tokens starting with `token`."""
+        matches = {}
+        vocabulary = self._vocabulary
+        i = bisect.bisect_left(vocabulary, token)
+        while i < len(vocabulary) and vocabulary[i].startswith(token):
+            for pid, weight in self._postings[vocabulary[i]].items():
+                if weight > matches.get(pid, 0):
+                    matches[pid] = weight
+            i += 1
+        return matches
+
+    def _add(self, provider, category_name):
+        category_id = provider.category_id
+        tokens = provider_tokens(provider, category_name)
+        sort_key = (
+            -PLAN_PRIORITY.get(provider.plan_type, 0),
+            -provider.created_at.timestamp(),
+            -provider.id,
+        )
+        self._docs[provider.id] = (sort_key, tokens, category_id)
+        for token, weight in tokens.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                self._vocabulary_dirty = True
+                token_trigrams = trigrams(token)
+                self._trigram_counts[token] = len(token_trigrams)
+                for trigram in token_trigrams:
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            posting[provider.id] = weight
+        if category_id is not None:
+            self._categories.setdefault(category_id, set()).add(provider.id)
+
+    def _remove(self, provider_id):
+        doc = self._docs.pop(provider_id, None)
+        if doc is None:
+            return
+        _, tokens, category_id = doc
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(provider_id, None)
+            if not posting:
+                del self._postings[token]
+                self._vocabulary_dirty = True
+                self._trigram_counts.pop(token, None)
+                for trigram in trigrams(token):
+                    terms = self._trigrams.get(trigram)
+                    if terms is not None:
+                        terms.discard(token)
+                        if not terms:
+                            del self._trigrams[trigram]
+        if category_id is not None:
+            members = self._categories.get(category_id)
+            if members:
+                members.discard(provider_id)
+
+
+provider_index = ProviderIndex()
+
+
+def invalidate_search_results(index_current=True, vocabulary_changed=True):
+    """
+    Drop cached search results in every process after a provider/category change.
+
+    This process's provider index and keyword suggester stay warm unless
+    they missed the change: the index when it wasn't updated incrementally
+    (`index_current`, False after a queryset.update()), the suggester when
+    keywords, categories or listing changed (`vocabulary_changed`).
+    """
+    from bot.services.suggestions import keyword_suggester
+
+    old_generation, new_generation = search_cache.invalidate()
+    if index_current:
+        provider_index.advance_generation(old_generation, new_generation)
+    if not vocabulary_changed:
+        keyword_suggester.advance_generation(old_generation, new_generation)
+
+
+def search_providers_orm(query_text, limit=None):
+    """
+    Search providers with regex filters (no full-text index available).
+
+    Matches like the in-memory index: every query token must start a word
+    of the name, description, keywords or category name.
+    """
+    from bot.models import ServiceProvider
+
+    tokens = tokenize(query_text)
+    if not tokens:
+        return []
+
+    providers = ServiceProvider.objects.filter(
+        is_approved=True,
+        is_active=True
+    )
+    for token in tokens:
+        # Tokens are [a-z0-9]+, so they need no escaping
+        word_start = rf"(^|[^a-z0-9]){token}"
+        providers = providers.filter(
+            Q(name__iregex=word_start) |
+            Q(description__iregex=word_start) |
+            Q(keywords__iregex=word_start) |
+            Q(category__name__iregex=word_start)
+        )
+    providers = providers.annotate(
+        plan_priority=plan_priority_annotation()
+    ).order_by('-plan_priority', '-created_at')
+    return list(providers.values_list('id', flat=True)[:limit])
+
+
+def _plan_priority_sql(column):
+    whens = " ".join(
+        f"WHEN '{plan}' THEN {priority}" for plan, priority in PLAN_PRIORITY.items()
+    )
+    return f"CASE {column} {whens} ELSE 0 END"
+
+
+def search_providers_fulltext(query_text, limit=None):
+    """
+    Search providers with the database full-text index.
+
+    Uses the weighted `search_document` tsvector on PostgreSQL and the
+    `bot_serviceprovider_fts` FTS5 table on SQLite (see migration 0003).
+    Results are ordered by plan priority, then text relevance, then date.
+    Returns None on database backends without a full-text index.
+    """
+    tokens = tokenize(query_text)
+    if not tokens:
+        return []
+
+    if connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT p.id
+            FROM bot_serviceprovider p, to_tsquery('english', %s) q
+            WHERE p.search_document @@ q AND p.is_approved AND p.is_active
+            ORDER BY {_plan_priority_sql('p.plan_type')} DESC,
+                     ts_rank(p.search_document, q) DESC,
+                     p.created_at DESC
+            LIMIT %s
+        """
+        params = [' & '.join(f"{token}:*" for token in tokens), limit]
+    elif connection.vendor == 'sqlite':
+        # bm25() weights follow the FTS column order: name, keywords, category, description
+        sql = f"""
+            SELECT p.id
+            FROM bot_serviceprovider_fts
+            JOIN bot_serviceprovider p ON p.id = bot_serviceprovider_fts.rowid
+            WHERE bot_serviceprovider_fts MATCH %s AND p.is_approved AND p.is_active
+            ORDER BY {_plan_priority_sql('p.plan_type')} DESC,
+                     bm25(bot_serviceprovider_fts, 10.0, 5.0, 5.0, 1.0),
+                     p.created_at DESC
+            LIMIT %s
+        """
+        params = [' '.join(f'"{token}"*' for token in tokens), -1 if limit is None else limit]
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_providers_trigram(query_text, threshold, budget_ms, limit=None):
+    """
+    Typo-tolerant search over provider names, keywords and category names.
+
+    PostgreSQL uses pg_trgm word similarity (indexes from migration 0004)
+    under a statement timeout; other backends use the trigram map kept by
+    the in-memory index. Returns [] if neither is available or the latency
+    budget runs out.
+    """
+    if connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT p.id
+            FROM bot_serviceprovider p
+            LEFT JOIN bot_category c ON c.id = p.category_id
+            WHERE p.is_approved AND p.is_active AND (
+                %s <%% p.name OR %s <%% (p.keywords::text) OR %s <%% c.name
+            )
+            ORDER BY {_plan_priority_sql('p.plan_type')} DESC,
+                     GREATEST(
+                         word_similarity(%s, p.name) * {FIELD_WEIGHTS['name']},
+                         word_similarity(%s, p.keywords::text) * {FIELD_WEIGHTS['keywords']},
+                         word_similarity(%s, coalesce(c.name, '')) * {FIELD_WEIGHTS['category']}
+                     ) DESC,
+                     p.created_at DESC
+            LIMIT %s
+        """
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true), "
+                    "set_config('statement_timeout', %s, true)",
+                    [str(threshold), str(int(budget_ms))]
+                )
+                cursor.execute(sql, [query_text] * 6 + [limit])
+                return [row[0] for row in cursor.fetchall()]
+        except DatabaseError:
+            # Statement timeout - give up on fuzzy results for this query
+            return []
+
+    if not provider_index.is_warm():
+        return []
+    deadline = time.perf_counter() + budget_ms / 1000
+    return provider_index.fuzzy_search(query_text, threshold, deadline, limit)
+
+
+def search_provider_ids(query_text, min_results=0):
+    """
+    Return the ordered ids of every provider matching the query.
+
+    If fewer than `min_results` providers match exactly, close (typo)
+    matches are appended after the exact ones. The whole ranking is
+    returned so every match can be paged to; callers cap only the total
+    they display (SEARCH_MAX_RESULTS).
+    """
+    if provider_index.is_warm():
+        result_ids = provider_index.search(query_text)
+    else:
+        result_ids = search_providers_fulltext(query_text)
+        if result_ids is None:
+            result_ids = search_providers_orm(query_text)
+
+    if len(result_ids) < min_results:
+        fuzzy_ids = search_providers_trigram(
+            query_text,
+            threshold=settings.SEARCH_FUZZY_THRESHOLD,
+            budget_ms=settings.SEARCH_FUZZY_BUDGET_MS,
+        )
+        seen = set(result_ids)
+        result_ids += [pid for pid in fuzzy_ids if pid not in seen]
+
+    return result_ids
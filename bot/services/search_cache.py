@@ -0,0 +1,156 @@
+"""
+Search Result Cache
+Caches ordered provider id lists for Purple Board queries and category
+pages in Django's CACHES, so the gunicorn workers and the bot process share
+them. A small per-process LRU sits in front of the shared cache.
+
+Invalidation bumps a shared generation number that is part of every key,
+which drops all cached results in every process at once. The generation
+starts at a random number, and a generation key that went missing (culled
+or evicted) is replaced by a new random one, so old results are never
+served again under a reused number.
+"""
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+GENERATION_KEY = 'purple:search:generation'
+
+# How long a process trusts its last read of the shared generation (seconds)
+GENERATION_CHECK_INTERVAL = 1.0
+
+
+def new_generation():
+    """Return a random starting generation number."""
+    return secrets.randbits(48)
+
+
+def normalize_query(query_text):
+    """Lowercase a query and collapse its whitespace."""
+    return ' '.join(str(query_text).lower().split())
+
+
+class SearchResultCache:
+    """Two-level (local LRU + shared Django cache) store of result id lists."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = OrderedDict()    # key -> (expires_at, ids)
+        self._generation = None
+        self._generation_read_at = 0.0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+
+    @property
+    def _cache(self):
+        return caches[settings.SEARCH_CACHE_ALIAS]
+
+    def generation(self):
+        """Return the current shared generation number."""
+        now = time.monotonic()
+        if self._generation is not None and now - self._generation_read_at < GENERATION_CHECK_INTERVAL:
+            return self._generation
+        try:
+            generation = self._cache.get(GENERATION_KEY)
+            if generation is None:
+                # Never set, or dropped by the cache: start afresh, which
+                # invalidates everything cached under the lost number
+                generation = new_generation()
+                if not self._cache.add(GENERATION_KEY, generation, None):
+                    generation = self._cache.get(GENERATION_KEY, generation)
+        except Exception:
+            self.errors += 1
+            generation = self._generation or 0
+        self._generation = generation
+        self._generation_read_at = now
+        return generation
+
+    def get_or_compute(self, kind, key, compute):
+        """
+        Return cached ids for (kind, key), computing and storing them on a miss.
+
+        `kind` is e.g. 'query' or 'category'; `compute` takes no arguments
+        and returns the ordered id list.
+        """
+        generation = self.generation()
+        digest = hashlib.md5(str(key).encode()).hexdigest()
+        cache_key = f"purple:search:{generation}:{kind}:{digest}"
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._local.get(cache_key)
+            if entry is not None and entry[0] > now:
+                self._local.move_to_end(cache_key)
+                self.hits += 1
+                return list(entry[1])
+
+        try:
+            ids = self._cache.get(cache_key)
+        except Exception:
+            self.errors += 1
+            ids = None
+
+        if ids is not None:
+            self.shared_hits += 1
+        else:
+            self.misses += 1
+            ids = list(compute())
+            try:
+                self._cache.set(cache_key, ids, settings.SEARCH_CACHE_TIMEOUT)
+            except Exception:
+                self.errors += 1
+
+        self._store_local(cache_key, ids, now)
+        return list(ids)
+
+    def invalidate(self):
+        """
+        Drop every cached result in all processes.
+
+        Returns (old_generation, new_generation).
+        """
+        cache = self._cache
+        try:
+            cache.add(GENERATION_KEY, new_generation(), None)
+            generation = cache.incr(GENERATION_KEY)
+        except Exception:
+            self.errors += 1
+            generation = (self._generation or 0) + 1
+        old_generation = generation - 1
+
+        with self._lock:
+            self._local.clear()
+            self._generation = generation
+            self._generation_read_at = time.monotonic()
+        self.invalidations += 1
+        return old_generation, generation
+
+    def stats(self):
+        """Return hit/miss counters."""
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'invalidations': self.invalidations,
+            'local_entries': len(self._local),
+        }
+
+    def _store_local(self, cache_key, ids, now):
+        with self._lock:
+            self._local[cache_key] = (now + settings.SEARCH_CACHE_TIMEOUT, tuple(ids))
+            self._local.move_to_end(cache_key)
+            while len(self._local) > settings.SEARCH_CACHE_LOCAL_SIZE:
+                self._local.popitem(last=False)
+
+
+search_cache = SearchResultCache()
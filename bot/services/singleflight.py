@@ -0,0 +1,67 @@
+"""
+Single-flight calls
+Coalesces concurrent async calls for the same key: the first caller runs
+the call, everyone who asks for that key while it is running awaits the
+same result, and the result is then kept for `ttl` seconds so repeats
+(a user tapping a button five times) don't run it again.
+
+Results live in this process's memory and belong to the event loop that
+made them; failures are not cached, and neither is the result of a call
+that was running when its key was forgotten.
+"""
+import asyncio
+import time
+
+
+# Results kept before expired ones are dropped
+MAX_RESULTS = 1024
+
+
+class SingleFlight:
+    def __init__(self, ttl=0.0):
+        self.ttl = ttl
+        self._calls = {}       # key -> asyncio.Task
+        self._results = {}     # key -> (expires at, result)
+        self.calls = 0         # calls actually run
+        self.shared = 0        # callers served by a running call or a cached result
+
+    async def do(self, key, function, *args, **kwargs):
+        """Return `await function(*args, **kwargs)`, shared by concurrent callers of `key`."""
+        cached = self._results.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.shared += 1
+            return cached[1]
+
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(function(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._finished(key, finished))
+        else:
+            self.shared += 1
+        # One caller giving up (cancelled) doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        if self._calls.get(key) is not task:
+            return  # Forgotten while running; its result may predate the change
+        del self._calls[key]
+        if self.ttl <= 0 or task.cancelled() or task.exception() is not None:
+            return
+        now = time.monotonic()
+        if len(self._results) >= MAX_RESULTS:
+            for stale in [k for k, (expires, _) in self._results.items() if expires <= now]:
+                del self._results[stale]
+        if len(self._results) < MAX_RESULTS:
+            self._results[key] = (now + self.ttl, task.result())
+
+    def forget(self, key):
+        """
+        Drop the cached result for `key` (after it has changed).
+
+        A call for `key` still running is detached: later callers start a
+        fresh one, and its result is not cached.
+        """
+        self._results.pop(key, None)
+        self._calls.pop(key, None)
@@ -0,0 +1,169 @@
+"""
+Search Suggestions
+Prefix autocomplete and "did you mean" suggestions for Purple Board, built
+from approved providers' keywords and category names.
+
+Terms are kept in a sorted array searched with bisect for completions.
+When nothing completes the query, each query word is corrected to the
+closest known word through a trigram map over the (much smaller) word
+vocabulary.
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from bot.services.search import trigram_similarity, trigrams
+from bot.services.search_cache import search_cache
+
+
+# Stop scanning completions after this many prefix matches, so very short
+# prefixes stay fast on large vocabularies
+MAX_PREFIX_SCAN = 200
+
+# Trigrams shared by more words than this are too common to be useful
+MAX_TRIGRAM_POSTINGS = 5000
+
+
+class KeywordSuggester:
+    """Sorted term array + word trigram map over provider keywords and categories."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._terms = []           # sorted terms
+        self._popularity = {}      # term -> number of providers using it
+        self._words = {}           # word -> number of providers using it
+        self._trigrams = {}        # trigram -> list of words
+        self._trigram_counts = {}  # word -> number of distinct trigrams
+        self._built_at = None
+        self._generation = None
+        self._building = False
+
+    def is_warm(self):
+        """Return True if built, recent and not invalidated by a provider change."""
+        if self._built_at is None:
+            return False
+        if self._generation != search_cache.generation():
+            return False
+        return time.monotonic() - self._built_at < settings.SEARCH_INDEX_MAX_AGE
+
+    def advance_generation(self, old_generation, new_generation):
+        """Follow a cache invalidation that did not change the vocabulary."""
+        with self._lock:
+            if self._generation == old_generation:
+                self._generation = new_generation
+
+    def build(self):
+        """Rebuild the term list from the database."""
+        from bot.models import ServiceProvider
+
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        try:
+            generation = search_cache.generation()
+            popularity = Counter()
+            providers = ServiceProvider.objects.filter(
+                is_approved=True,
+                is_active=True
+            ).values_list('keywords', 'category__name')
+
+            for keywords, category_name in providers.iterator(chunk_size=2000):
+                keywords = keywords if isinstance(keywords, list) else [keywords]
+                terms = {' '.join(str(k).lower().split()) for k in keywords if k}
+                if category_name:
+                    terms.add(' '.join(category_name.lower().split()))
+                popularity.update(term for term in terms if term)
+
+            words = Counter()
+            for term, count in popularity.items():
+                for word in set(term.split()):
+                    words[word] += count
+
+            trigram_map = {}
+            trigram_counts = {}
+            for word in words:
+                word_trigrams = trigrams(word)
+                trigram_counts[word] = len(word_trigrams)
+                for trigram in word_trigrams:
+                    trigram_map.setdefault(trigram, []).append(word)
+
+            with self._lock:
+                self._terms = sorted(popularity)
+                self._popularity = dict(popularity)
+                self._words = dict(words)
+                self._trigrams = trigram_map
+                self._trigram_counts = trigram_counts
+                self._built_at = time.monotonic()
+                self._generation = generation
+        finally:
+            self._building = False
+
+    def refresh(self):
+        """Rebuild the term list unless it is warm (or a rebuild is already running)."""
+        if not self.is_warm():
+            self.build()
+
+    def complete(self, prefix, limit=5):
+        """Return the most popular terms starting with `prefix`."""
+        with self._lock:
+            terms, popularity = self._terms, self._popularity
+        i = bisect.bisect_left(terms, prefix)
+        matches = []
+        while i < len(terms) and len(matches) < MAX_PREFIX_SCAN and terms[i].startswith(prefix):
+            if terms[i] != prefix:
+                matches.append(terms[i])
+            i += 1
+        matches.sort(key=lambda term: (-popularity[term], term))
+        return matches[:limit]
+
+    def closest_words(self, word, limit=5, threshold=None):
+        """Return the known words most trigram-similar to `word`."""
+        if threshold is None:
+            threshold = settings.SEARCH_FUZZY_THRESHOLD
+        with self._lock:
+            words, trigram_map, trigram_counts = self._words, self._trigrams, self._trigram_counts
+        if word in words:
+            return [word]
+
+        query_trigrams = trigrams(word)
+        overlaps = Counter()
+        for trigram in query_trigrams:
+            postings = trigram_map.get(trigram, ())
+            if len(postings) <= MAX_TRIGRAM_POSTINGS:
+                overlaps.update(postings)
+
+        scored = []
+        for candidate, shared in overlaps.items():
+            similarity = trigram_similarity(shared, len(query_trigrams), trigram_counts[candidate])
+            if similarity >= threshold:
+                scored.append((-similarity, -words[candidate], candidate))
+        scored.sort()
+        return [candidate for _, _, candidate in scored[:limit]]
+
+    def closest(self, text, limit=5):
+        """Return "did you mean" corrections of a query."""
+        words = text.split()
+        if len(words) == 1:
+            return [word for word in self.closest_words(words[0], limit) if word != text]
+
+        # Multi-word query: correct each word to its best match
+        corrected = []
+        for word in words:
+            matches = self.closest_words(word, limit=1)
+            if not matches:
+                return []
+            corrected.append(matches[0])
+        suggestion = ' '.join(corrected)
+        return [suggestion] if suggestion != text else []
+
+    def suggest(self, text, limit=5):
+        """Return completions for the query, or close matches if none complete it."""
+        text = ' '.join(text.lower().split())
+        return self.complete(text, limit) or self.closest(text, limit)
+
+
+keyword_suggester = KeywordSuggester()
@@ -0,0 +1,117 @@
+"""
+Model signal handlers - keep derived search data, provider cards,
+category counts and news image renditions in sync with the database
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from bot.models import Category, News, ServiceProvider
+from bot.services.cards import drop_cards
+from bot.services.images import schedule_news_image
+from bot.services.directory import listed_category_id, move_provider_count, refresh_category_counts
+from bot.services.search import provider_index, invalidate_search_results
+
+
+# Provider fields that change which providers a search returns, or their order
+SEARCH_FIELDS = (
+    'is_approved', 'is_active', 'plan_type', 'keywords', 'category_id',
+    'name', 'description',
+)
+
+# Of those, the fields the keyword suggester's vocabulary is built from
+VOCABULARY_FIELDS = ('is_approved', 'is_active', 'keywords', 'category_id')
+
+
+@receiver(pre_save, sender=ServiceProvider)
+def provider_pre_save(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._search_fields_changed = instance.is_approved and instance.is_active
+        instance._vocabulary_changed = instance._search_fields_changed
+        instance._listed_category_id = None
+        return
+    old = sender.objects.filter(pk=instance.pk).values(*SEARCH_FIELDS).first()
+    instance._search_fields_changed = old is None or any(
+        old[field] != getattr(instance, field) for field in SEARCH_FIELDS
+    )
+    instance._vocabulary_changed = old is None or any(
+        old[field] != getattr(instance, field) for field in VOCABULARY_FIELDS
+    )
+    instance._listed_category_id = (
+        old['category_id'] if old and old['is_approved'] and old['is_active'] else None
+    )
+
+
+@receiver(post_save, sender=ServiceProvider)
+def provider_saved(sender, instance, **kwargs):
+    move_provider_count(getattr(instance, '_listed_category_id', None), listed_category_id(instance))
+    provider_index.update_provider(instance)
+    transaction.on_commit(lambda: drop_cards([instance.id]))
+    if getattr(instance, '_search_fields_changed', True):
+        vocabulary_changed = getattr(instance, '_vocabulary_changed', True)
+        transaction.on_commit(lambda: invalidate_search_results(vocabulary_changed=vocabulary_changed))
+
+
+@receiver(post_delete, sender=ServiceProvider)
+def provider_deleted(sender, instance, **kwargs):
+    move_provider_count(listed_category_id(instance), None)
+    provider_index.remove_provider(instance.id)
+    transaction.on_commit(lambda: drop_cards([instance.id]))
+    transaction.on_commit(invalidate_search_results)
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    if created:
+        return  # A new category has no providers yet
+    # save() writes back whatever count was loaded with the instance
+    refresh_category_counts([instance.id])
+    provider_index.update_category(instance)
+    provider_ids = list(instance.providers.values_list('id', flat=True))
+    transaction.on_commit(lambda: drop_cards(provider_ids))
+    transaction.on_commit(invalidate_search_results)
+
+
+@receiver(pre_delete, sender=Category)
+def category_pre_delete(sender, instance, **kwargs):
+    # Remember the members before their category is set to NULL
+    instance._provider_ids = list(instance.providers.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    provider_index.update_category(instance, deleted=True)
+    provider_ids = getattr(instance, '_provider_ids', [])
+    transaction.on_commit(lambda: drop_cards(provider_ids))
+    transaction.on_commit(invalidate_search_results)
+
+
+@receiver(pre_save, sender=News)
+def news_pre_save(sender, instance, **kwargs):
+    old = None
+    if instance.pk is not None:
+        old = sender.objects.filter(pk=instance.pk).values(
+            'image', 'image_rendition', 'image_thumbnail'
+        ).first()
+    old_image = (old or {}).get('image') or ''
+    instance._image_changed = (
+        instance.image.name != old_image
+        or (bool(instance.image) and not instance.image._committed)
+    )
+    if instance._image_changed:
+        # The old renditions no longer match; view_news sends the original
+        # image until the new ones are ready
+        instance._stale_renditions = [
+            name for name in (old or {}).values() if name and name != old_image
+        ]
+        instance.image_rendition = None
+        instance.image_thumbnail = None
+        instance.image_width = None
+        instance.image_height = None
+
+
+@receiver(post_save, sender=News)
+def news_saved(sender, instance, **kwargs):
+    if getattr(instance, '_image_changed', False):
+        stale = getattr(instance, '_stale_renditions', [])
+        transaction.on_commit(lambda: schedule_news_image(instance.id, stale))
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from telegram.error import NetworkError
+
+from bot.handlers import purple_board
+from bot.models import ServiceProvider
+
+
+def callback_update(chat_id=100):
+    update = mock.Mock()
+    update.callback_query.answer = mock.AsyncMock()
+    update.callback_query.message.chat_id = chat_id
+    return update
+
+
+def bot_context():
+    context = mock.Mock()
+    context.bot.send_document = mock.AsyncMock()
+    return context
+
+
+# Handlers load rows on the bot's DB pool, so rows must be committed
+class ViewCatalogueTests(TransactionTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        os.makedirs(os.path.join(self.media_root, 'catalogues'))
+        with open(os.path.join(self.media_root, 'catalogues', 'lashes.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+        self.provider = ServiceProvider.objects.create(
+            telegram_user_id=1, name='Lash Studio', description='Lashes', keywords=['lashes'],
+            catalogue='catalogues/lashes.pdf',
+        )
+
+    async def test_catalogue_is_sent_through_media_cache(self):
+        context = bot_context()
+        with mock.patch('bot.handlers.purple_board.send_media', new_callable=mock.AsyncMock) as send_media:
+            await purple_board.view_catalogue(callback_update(), context, provider_id=self.provider.id)
+
+        send_media.assert_awaited_once()
+        args, kwargs = send_media.await_args
+        self.assertEqual(args, (context.bot, 'document', 'catalogues/lashes.pdf', 100))
+        self.assertEqual(kwargs['filename'], 'Lash Studio_catalogue.pdf')
+        context.bot.send_document.assert_not_awaited()
+
+    async def test_falls_back_to_local_file_when_telegram_fails(self):
+        context = bot_context()
+        with mock.patch(
+            'bot.handlers.purple_board.send_media', new_callable=mock.AsyncMock,
+            side_effect=NetworkError('timed out'),
+        ):
+            await purple_board.view_catalogue(callback_update(), context, provider_id=self.provider.id)
+
+        context.bot.send_document.assert_awaited_once()
+        self.assertEqual(context.bot.send_document.await_args.kwargs['chat_id'], 100)
+
+    async def test_programming_errors_are_not_swallowed(self):
+        with mock.patch(
+            'bot.handlers.purple_board.send_media', new_callable=mock.AsyncMock,
+            side_effect=NameError('send_media'),
+        ):
+            with self.assertRaises(NameError):
+                await purple_board.view_catalogue(callback_update(), bot_context(), provider_id=self.provider.id)
+
+    async def test_unknown_provider_sends_nothing(self):
+        context = bot_context()
+        with mock.patch('bot.handlers.purple_board.send_media', new_callable=mock.AsyncMock) as send_media:
+            await purple_board.view_catalogue(callback_update(), context, provider_id=self.provider.id + 1)
+        send_media.assert_not_awaited()
+        context.bot.send_document.assert_not_awaited()
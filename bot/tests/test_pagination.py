@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+
+from bot.services.pagination import decode_cursor, encode_cursor
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        created_at = datetime(2025, 3, 14, 15, 9, 26, 535897, tzinfo=timezone.utc)
+        cursor = encode_cursor(3, created_at, 1234)
+        self.assertEqual(decode_cursor(cursor), (3, created_at, 1234))
+
+    def test_cursor_is_short_and_callback_safe(self):
+        created_at = datetime(2025, 3, 14, tzinfo=timezone.utc)
+        cursor = encode_cursor(3, created_at, 10 ** 9)
+        # Carried in callback_data (64 bytes) and split on "_" by the router
+        self.assertLess(len(cursor), 25)
+        self.assertNotIn('_', cursor)
+
+    def test_malformed_cursors_decode_to_none(self):
+        for cursor in ('', 'abc', '3.xyz', '3.!!.1', 'x.1.1', None):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor))
@@ -0,0 +1,148 @@
+import hashlib
+import hmac
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from bot.models import Payment, ServiceProvider
+from bot.services.payments import apply_paystack_status
+from bot.services.reconciler import NOT_FOUND_MESSAGE, outcome_for
+
+
+SECRET_KEY = 'sk_test_secret'
+
+
+def make_payment(reference='EV-TEST', amount=500000, status='PENDING'):
+    provider = ServiceProvider.objects.create(
+        telegram_user_id=1, name='Lash Studio', description='Lashes', keywords=['lashes']
+    )
+    return Payment.objects.create(
+        provider=provider, reference=reference, amount=amount, plan_type='VERIFIED', status=status
+    )
+
+
+class ApplyPaystackStatusTests(TestCase):
+    def status_of(self, payment):
+        payment.refresh_from_db()
+        return payment.status
+
+    def test_success_is_applied_once(self):
+        payment = make_payment()
+        data = {'amount': 500000, 'currency': 'NGN'}
+        changed = apply_paystack_status('EV-TEST', 'success', data)
+        self.assertEqual(changed.status, 'SUCCESS')
+        self.assertIsNotNone(changed.verified_at)
+        self.assertEqual(changed.paystack_response, data)
+        # A repeated webhook or a racing reconciler changes nothing
+        self.assertIsNone(apply_paystack_status('EV-TEST', 'success', data))
+        self.assertEqual(self.status_of(payment), 'SUCCESS')
+
+    def test_success_needs_full_amount_in_naira(self):
+        payment = make_payment()
+        self.assertIsNone(apply_paystack_status('EV-TEST', 'success', {'amount': 499999, 'currency': 'NGN'}))
+        self.assertIsNone(apply_paystack_status('EV-TEST', 'success', {'amount': 500000, 'currency': 'USD'}))
+        self.assertIsNone(apply_paystack_status('EV-TEST', 'success', {'currency': 'NGN'}))
+        self.assertIsNone(apply_paystack_status('EV-TEST', 'success'))
+        self.assertEqual(self.status_of(payment), 'PENDING')
+
+    def test_failed_payment_can_still_succeed(self):
+        payment = make_payment(status='FAILED')
+        self.assertIsNotNone(apply_paystack_status('EV-TEST', 'success', {'amount': 500000, 'currency': 'NGN'}))
+        self.assertEqual(self.status_of(payment), 'SUCCESS')
+
+    def test_failed_and_abandoned_only_apply_to_pending(self):
+        payment = make_payment()
+        self.assertEqual(apply_paystack_status('EV-TEST', 'abandoned').status, 'ABANDONED')
+        self.assertIsNone(apply_paystack_status('EV-TEST', 'failed'))
+        self.assertEqual(self.status_of(payment), 'ABANDONED')
+
+        Payment.objects.filter(pk=payment.pk).update(status='SUCCESS')
+        self.assertIsNone(apply_paystack_status('EV-TEST', 'failed'))
+        self.assertEqual(self.status_of(payment), 'SUCCESS')
+
+    def test_unfinished_and_unknown_are_ignored(self):
+        make_payment()
+        self.assertIsNone(apply_paystack_status('EV-TEST', 'ongoing'))
+        self.assertIsNone(apply_paystack_status('EV-OTHER', 'failed'))
+
+
+@override_settings(PAYMENT_ABANDON_AFTER=3600)
+class OutcomeForTests(SimpleTestCase):
+    def test_final_statuses_are_recorded(self):
+        self.assertEqual(outcome_for({'success': True, 'status': 'success'}, 0), 'success')
+        self.assertEqual(outcome_for({'success': True, 'status': 'failed'}, 0), 'failed')
+
+    def test_unfinished_statuses_are_abandoned_eventually(self):
+        for status in ('abandoned', 'ongoing', 'pending', 'processing', 'queued', 'reversed', None):
+            with self.subTest(status=status):
+                result = {'success': True, 'status': status}
+                self.assertIsNone(outcome_for(result, 3599))
+                self.assertEqual(outcome_for(result, 3600), 'abandoned')
+
+    def test_unknown_reference_is_abandoned_eventually(self):
+        result = {'success': False, 'error': NOT_FOUND_MESSAGE}
+        self.assertIsNone(outcome_for(result, 60))
+        self.assertEqual(outcome_for(result, 7200), 'abandoned')
+
+    def test_paystack_errors_are_retried(self):
+        result = {'success': False, 'error': 'Paystack returned HTTP 503'}
+        self.assertIsNone(outcome_for(result, 7200))
+
+
+# The webhook records the payment on the bot's DB pool, so rows must be committed
+@override_settings(PAYSTACK_SECRET_KEY=SECRET_KEY)
+class PaystackWebhookTests(TransactionTestCase):
+    def setUp(self):
+        self.payment = make_payment()
+        notify = mock.patch('bot.views.notify_payment', new_callable=mock.AsyncMock)
+        self.notify_payment = notify.start()
+        self.addCleanup(notify.stop)
+
+    def post(self, event, signature=None, secret=SECRET_KEY):
+        body = json.dumps(event).encode()
+        if signature is None:
+            signature = hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+        return self.client.post(
+            reverse('paystack_webhook'), body, content_type='application/json',
+            headers={'X-Paystack-Signature': signature},
+        )
+
+    def charge_success(self, amount=500000):
+        return {
+            'event': 'charge.success',
+            'data': {'reference': 'EV-TEST', 'status': 'success', 'amount': amount, 'currency': 'NGN'},
+        }
+
+    def test_signed_charge_success_confirms_payment_once(self):
+        self.assertEqual(self.post(self.charge_success()).status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'SUCCESS')
+        self.notify_payment.assert_awaited_once()
+
+        # Paystack redelivers; acknowledged, but nothing changes
+        self.assertEqual(self.post(self.charge_success()).status_code, 200)
+        self.notify_payment.assert_awaited_once()
+
+    def test_bad_signature_is_rejected(self):
+        self.assertEqual(self.post(self.charge_success(), signature='0' * 128).status_code, 403)
+        self.assertEqual(self.post(self.charge_success(), secret='sk_test_other').status_code, 403)
+        self.assertEqual(self.post(self.charge_success(), signature='').status_code, 403)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'PENDING')
+        self.notify_payment.assert_not_awaited()
+
+    def test_underpaid_charge_is_acknowledged_but_not_applied(self):
+        self.assertEqual(self.post(self.charge_success(amount=100)).status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'PENDING')
+        self.notify_payment.assert_not_awaited()
+
+    def test_other_events_are_acknowledged(self):
+        self.assertEqual(self.post({'event': 'transfer.success', 'data': {}}).status_code, 200)
+        self.notify_payment.assert_not_awaited()
+
+    @override_settings(PAYSTACK_SECRET_KEY='')
+    def test_webhook_disabled_without_secret_key(self):
+        self.assertEqual(self.post(self.charge_success(), signature='').status_code, 404)
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.test import TransactionTestCase
+
+from bot.db import database_sync_to_async
+from bot.models import BotConversation, BotUserData
+from bot.persistence import DjangoPersistence
+
+
+@database_sync_to_async
+def stored_user_data(user_id):
+    return BotUserData.objects.filter(user_id=user_id).values_list('data', flat=True).first()
+
+
+@database_sync_to_async
+def stored_conversations():
+    return dict(BotConversation.objects.values_list('key', 'state'))
+
+
+@database_sync_to_async
+def store_user_data(user_id, data):
+    BotUserData.objects.create(user_id=user_id, data=data)
+
+
+# The persistence writes from the bot's DB pool threads, so rows must be committed
+class DjangoPersistenceTests(TransactionTestCase):
+    def setUp(self):
+        self.persistence = DjangoPersistence()
+
+    async def test_writes_are_buffered_until_flush(self):
+        await self.persistence.refresh_user_data(1, {})
+        await self.persistence.update_user_data(1, {'search': {'kind': 'query'}})
+        self.assertIsNone(await stored_user_data(1))
+
+        await self.persistence.flush()
+        self.assertEqual(await stored_user_data(1), {'search': {'kind': 'query'}})
+
+    async def test_buffered_writes_are_flushed_after_write_delay(self):
+        with mock.patch('bot.persistence.WRITE_DELAY', 0):
+            await self.persistence.refresh_user_data(1, {})
+            await self.persistence.refresh_user_data(2, {})
+            with mock.patch.object(DjangoPersistence, '_write', wraps=DjangoPersistence._write) as write:
+                await self.persistence.update_user_data(1, {'page': 1})
+                await self.persistence.update_user_data(2, {'page': 2})
+                await self.persistence.update_conversation('registration', (5, 5), 3)
+                await self.persistence._write_task
+
+        # One batch for everything buffered meanwhile
+        write.assert_called_once()
+        self.assertEqual(await stored_user_data(1), {'page': 1})
+        self.assertEqual(await stored_user_data(2), {'page': 2})
+        self.assertEqual(await stored_conversations(), {'[5, 5]': 3})
+
+    async def test_unchanged_data_is_not_rewritten(self):
+        await store_user_data(1, {'page': 1})
+        user_data = {}
+        await self.persistence.refresh_user_data(1, user_data)
+        self.assertEqual(user_data, {'page': 1})
+
+        await self.persistence.update_user_data(1, {'page': 1})
+        self.assertEqual(self.persistence._pending_users, {})
+
+    async def test_users_never_loaded_are_not_overwritten(self):
+        await store_user_data(1, {'page': 1})
+        await self.persistence.update_user_data(1, {})
+        await self.persistence.flush()
+        self.assertEqual(await stored_user_data(1), {'page': 1})
+
+    async def test_failed_write_is_retried(self):
+        await self.persistence.refresh_user_data(1, {})
+        await self.persistence.update_user_data(1, {'page': 1})
+        with mock.patch.object(DjangoPersistence, '_write', side_effect=RuntimeError('database down')):
+            await self.persistence.flush()
+        self.assertIn(1, self.persistence._pending_users)
+
+        await self.persistence.flush()
+        self.assertEqual(await stored_user_data(1), {'page': 1})
+
+    async def test_ended_conversation_is_deleted(self):
+        await self.persistence.update_conversation('registration', (5, 5), 3)
+        await self.persistence.flush()
+        await self.persistence.update_conversation('registration', (5, 5), None)
+        await self.persistence.flush()
+        self.assertEqual(await stored_conversations(), {})
+        self.assertEqual(await self.persistence.get_conversations('registration'), {})
+
+    async def test_dropped_user_data_is_deleted(self):
+        await store_user_data(1, {'page': 1})
+        await self.persistence.refresh_user_data(1, {})
+        await self.persistence.drop_user_data(1)
+        await self.persistence.flush()
+        self.assertIsNone(await stored_user_data(1))
+
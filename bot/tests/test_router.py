@@ -0,0 +1,76 @@
+from django.test import SimpleTestCase
+
+from bot.bot import create_callback_router
+from bot.handlers import chancellors, home, news, purple_board, registration, start
+from bot.router import CallbackRouter
+
+
+class CallbackRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = create_callback_router()
+
+    def assertRoutes(self, data, callback, **args):
+        found = self.router.match(data)
+        self.assertIsNotNone(found, f"{data!r} matches no route")
+        route, matched_args = found
+        self.assertIs(route.callback, callback, data)
+        self.assertEqual(matched_args, args, data)
+
+    def test_existing_callback_data(self):
+        # callback_data as sent by the handlers, including in old messages
+        self.assertRoutes('main_menu', start.main_menu_callback)
+        self.assertRoutes('section_home', home.home_section)
+        self.assertRoutes('ad_prev', home.ad_navigation, action='prev')
+        self.assertRoutes('ad_count', home.ad_navigation, action='count')
+        self.assertRoutes('section_news', news.news_section)
+        self.assertRoutes('news_view_42', news.view_news, news_id=42)
+        self.assertRoutes('news_page_next', news.news_pagination, action='next')
+        self.assertRoutes('section_purple', purple_board.purple_board_section)
+        self.assertRoutes('purple_cats_2', purple_board.purple_board_section, page=2)
+        self.assertRoutes('provider_7', purple_board.view_provider, provider_id=7)
+        self.assertRoutes('catalogue_7', purple_board.view_catalogue, provider_id=7)
+        self.assertRoutes('cat_3', purple_board.browse_category, category_id=3)
+        self.assertRoutes('search_info', purple_board.search_info)
+        self.assertRoutes('search_back', purple_board.search_back)
+        self.assertRoutes('section_chancellors', chancellors.chancellors_section)
+        self.assertRoutes('chancellors_leaderboard', chancellors.show_leaderboard)
+
+    def test_rest_arguments_keep_separators(self):
+        self.assertRoutes(
+            'verify_payment_EV-1A2B3C4D5E6F', registration.verify_payment_handler,
+            reference='EV-1A2B3C4D5E6F'
+        )
+        self.assertRoutes(
+            'verify_payment_EV_OLD_REF', registration.verify_payment_handler, reference='EV_OLD_REF'
+        )
+        self.assertRoutes('suggest_hair_and_nails', purple_board.suggested_search, term='hair_and_nails')
+        self.assertRoutes(
+            'search_page_2_f_3.1b2x9k0.7f', purple_board.search_pagination,
+            page=2, direction='f', cursor='3.1b2x9k0.7f'
+        )
+        self.assertRoutes(
+            'search_page_0_b_', purple_board.search_pagination, page=0, direction='b', cursor=''
+        )
+
+    def test_unknown_or_malformed_data_is_left_to_other_handlers(self):
+        for data in ('provider_x', 'provider_', 'news_page_last', 'ad', 'register_start',
+                     'plan_BASIC', 'main_menu_extra', None):
+            with self.subTest(data=data):
+                self.assertIsNone(self.router.match(data))
+
+    def test_literal_beats_parameter(self):
+        router = CallbackRouter([
+            ('item_<str:name>', 'by_name'),
+            ('item_new', 'new'),
+        ])
+        self.assertEqual(router.match('item_new')[0].callback, 'new')
+        self.assertEqual(router.match('item_old'), (router.routes[0], {'name': 'old'}))
+
+    def test_duplicate_and_invalid_routes_are_rejected(self):
+        router = CallbackRouter([('a_<int:n>', 'first')])
+        with self.assertRaises(ValueError):
+            router.add('a_<int:n>', 'second')
+        with self.assertRaises(ValueError):
+            router.add('b_<rest:tail>_c', 'rest not last')
+        with self.assertRaises(ValueError):
+            router.add('c_<float:x>', 'unknown type')
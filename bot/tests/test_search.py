@@ -0,0 +1,117 @@
+from django.test import TestCase, override_settings
+
+from bot.benchmarks import BENCHMARK_CACHES
+from bot.models import Category, ServiceProvider
+from bot.services.search import ProviderIndex, invalidate_search_results, provider_index, tokenize
+from bot.services.search_cache import search_cache
+from bot.services.suggestions import keyword_suggester
+
+
+def make_provider(user_id, name, keywords, category=None, plan_type='BASIC', **fields):
+    return ServiceProvider.objects.create(
+        telegram_user_id=user_id,
+        name=name,
+        description=fields.pop('description', f"{name} on campus"),
+        keywords=keywords,
+        category=category,
+        plan_type=plan_type,
+        is_approved=fields.pop('is_approved', True),
+        is_active=fields.pop('is_active', True),
+        **fields,
+    )
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class ProviderIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.beauty = Category.objects.create(name='Beauty')
+        cls.lashes = make_provider(1, 'Lash Studio', ['lashes', 'brows'], cls.beauty)
+        cls.nails = make_provider(2, 'Nail Bar', ['nails', 'lashes'], cls.beauty, plan_type='PREMIUM')
+        cls.hidden = make_provider(3, 'Lash Lounge', ['lashes'], cls.beauty, is_approved=False)
+
+    def setUp(self):
+        self.index = ProviderIndex()
+        self.index.build()
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Hair & Make-up 24/7"), ['hair', 'make', 'up', '24', '7'])
+        self.assertEqual(tokenize(None), [])
+
+    def test_prefix_match_ranks_by_plan_then_relevance(self):
+        # Premium first even though "lash" is only one of its keywords
+        self.assertEqual(self.index.search('lash'), [self.nails.id, self.lashes.id])
+        self.assertEqual(self.index.search('lash brows'), [self.lashes.id])
+        self.assertEqual(self.index.search('lash', limit=1), [self.nails.id])
+
+    def test_unapproved_providers_are_not_indexed(self):
+        self.assertNotIn(self.hidden.id, self.index.search('lounge'))
+
+    def test_category_name_is_searchable(self):
+        self.assertCountEqual(self.index.search('beauty'), [self.lashes.id, self.nails.id])
+
+    def test_update_and_remove_provider(self):
+        self.lashes.keywords = ['wigs']
+        self.index.update_provider(self.lashes)
+        self.assertEqual(self.index.search('brows'), [])
+        self.assertEqual(self.index.search('wigs'), [self.lashes.id])
+
+        self.index.remove_provider(self.lashes.id)
+        self.assertEqual(self.index.search('wigs'), [])
+
+    def test_fuzzy_search_finds_typos(self):
+        import time
+
+        found = self.index.fuzzy_search('lashs', threshold=0.3, deadline=time.perf_counter() + 1)
+        self.assertCountEqual(found, [self.lashes.id, self.nails.id])
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class SearchGenerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_provider(1, 'Lash Studio', ['lashes'])
+
+    def setUp(self):
+        provider_index.build()
+        keyword_suggester.build()
+
+    def test_built_structures_are_warm(self):
+        self.assertTrue(provider_index.is_warm())
+        self.assertTrue(keyword_suggester.is_warm())
+
+    def test_generation_changes_on_invalidate(self):
+        old = search_cache.generation()
+        old_generation, new_generation = search_cache.invalidate()
+        self.assertEqual(old_generation, old)
+        self.assertNotEqual(new_generation, old)
+        self.assertEqual(search_cache.generation(), new_generation)
+
+    def test_write_applied_incrementally_keeps_index_warm(self):
+        invalidate_search_results()
+        self.assertTrue(provider_index.is_warm())
+        # The vocabulary may have changed, so the suggester rebuilds
+        self.assertFalse(keyword_suggester.is_warm())
+
+    def test_write_outside_vocabulary_keeps_suggester_warm(self):
+        invalidate_search_results(vocabulary_changed=False)
+        self.assertTrue(provider_index.is_warm())
+        self.assertTrue(keyword_suggester.is_warm())
+
+    def test_bulk_update_marks_index_stale(self):
+        invalidate_search_results(index_current=False)
+        self.assertFalse(provider_index.is_warm())
+        provider_index.refresh()
+        self.assertTrue(provider_index.is_warm())
+
+    def test_stale_generation_is_not_advanced(self):
+        # An index that already missed a write stays stale after the next one
+        search_cache.invalidate()
+        invalidate_search_results()
+        self.assertFalse(provider_index.is_warm())
+
+    def test_build_skipped_while_another_is_running(self):
+        index = ProviderIndex()
+        index._building = True
+        index.build()
+        self.assertFalse(index.is_warm())
@@ -0,0 +1,122 @@
+"""
+Chat-ordered concurrent update processing
+Updates from different chats are handled concurrently (up to a bound), so a
+slow Paystack verification or catalogue upload only holds up its own chat.
+Updates from the same chat still run one at a time and in arrival order,
+which keeps ConversationHandler state and user_data consistent.
+"""
+import asyncio
+import time
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from bot.metrics import track_update
+
+
+# Number of recent queue waits kept for percentiles
+WAIT_SAMPLE_SIZE = 1000
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Runs up to `max_running` handlers at once, one per chat at a time.
+
+    PTB admits up to `max_pending` updates (its own bound, see
+    BaseUpdateProcessor); admitted updates then wait for their chat's lock
+    and a running slot. Taking the chat lock first means a burst from one
+    chat waits on that chat alone instead of filling the running slots.
+    """
+
+    def __init__(self, max_running, max_pending):
+        super().__init__(max(max_running, max_pending))
+        self.max_running = max_running
+        self._running = asyncio.Semaphore(max_running)
+        self._chat_locks = {}      # chat key -> [lock, number of updates holding or waiting]
+        self.in_flight = 0
+        self.waiting = 0
+        self.started = 0
+        self.processed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent_waits = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    @staticmethod
+    def chat_key(update):
+        """Return the key updates are serialized on, or None for no ordering."""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat:
+            return update.effective_chat.id
+        if update.effective_user:
+            # Inline queries have no chat; keep a user's own updates in order
+            return f"user:{update.effective_user.id}"
+        return None
+
+    async def do_process_update(self, update, coroutine):
+        key = self.chat_key(update)
+        queued_at = time.monotonic()
+        started = False
+        self.waiting += 1
+
+        lock = None
+        if key is not None:
+            entry = self._chat_locks.setdefault(key, [asyncio.Lock(), 0])
+            entry[1] += 1
+            lock = entry[0]
+
+        try:
+            if lock is not None:
+                await lock.acquire()
+            try:
+                async with self._running:
+                    started = True
+                    self._record_start(time.monotonic() - queued_at)
+                    try:
+                        with track_update():
+                            await coroutine
+                    finally:
+                        self.in_flight -= 1
+                        self.processed += 1
+            finally:
+                if lock is not None:
+                    lock.release()
+        finally:
+            if not started:
+                self.waiting -= 1
+                coroutine.close()
+            if key is not None:
+                entry = self._chat_locks[key]
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._chat_locks[key]
+
+    def _record_start(self, wait):
+        self.waiting -= 1
+        self.in_flight += 1
+        self.started += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._recent_waits.append(wait)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def stats(self):
+        """Return in-flight/queue counters and queue wait times (milliseconds)."""
+        waits = sorted(self._recent_waits)
+        p95 = waits[max(0, round(0.95 * len(waits)) - 1)] if waits else 0.0
+        return {
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'active_chats': len(self._chat_locks),
+            'processed': self.processed,
+            'max_running': self.max_running,
+            'avg_wait_ms': self.total_wait / self.started * 1000 if self.started else 0.0,
+            'p95_wait_ms': p95 * 1000,
+            'max_wait_ms': self.max_wait * 1000,
+        }
@@ -0,0 +1,100 @@
+"""
+Bot web views
+"""
+import hashlib
+import hmac
+import json
+import secrets
+
+import httpx
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotFound
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from telegram import Update
+
+from bot.metrics import CONTENT_TYPE, registry
+from bot.services.payments import notify_payment, record_paystack_status
+from bot.webhook import start_application, webhook_enabled
+
+
+@csrf_exempt
+@require_POST
+async def telegram_webhook(request):
+    """Receive an update from Telegram and queue it for the bot."""
+    if not webhook_enabled():
+        return HttpResponseNotFound()
+
+    token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+    if not secrets.compare_digest(token, settings.TELEGRAM_WEBHOOK_SECRET):
+        return HttpResponseForbidden()
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    application = await start_application()
+    update = Update.de_json(data, application.bot)
+    # Answer Telegram right away; the application processes the queue
+    await application.update_queue.put(update)
+    return HttpResponse()
+
+
+@csrf_exempt
+@require_POST
+async def paystack_webhook(request):
+    """
+    Receive a Paystack event and confirm the payment it is about.
+
+    Paystack signs the body with the secret key (HMAC-SHA512, hex, in
+    X-Paystack-Signature) and retries until it gets a 200, so signed events
+    are always acknowledged, and repeats change nothing.
+    """
+    if not settings.PAYSTACK_SECRET_KEY:
+        return HttpResponseNotFound()
+
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), request.body, hashlib.sha512).hexdigest()
+    if not secrets.compare_digest(request.headers.get('X-Paystack-Signature', ''), expected):
+        return HttpResponseForbidden()
+
+    try:
+        event = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    if event.get('event') == 'charge.success':
+        data = event.get('data') or {}
+        payment = await record_paystack_status(data.get('reference'), data.get('status'), data)
+        if payment is not None:
+            if webhook_enabled():
+                # The bot's rate limiter may hold the message; answer Paystack first
+                application = await start_application()
+                application.create_task(notify_payment(payment, application.bot))
+            else:
+                # Under WSGI the loop ends with the request, so send it now
+                # (a short-lived Bot isn't rate limited)
+                await notify_payment(payment)
+    return HttpResponse()
+
+
+def metrics(request):
+    """
+    Serve the bot's metrics in the Prometheus text format.
+
+    In webhook mode the bot runs in this process. Otherwise they are
+    relayed from the polling bot's metrics server (BOT_METRICS_PORT).
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not secrets.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponseForbidden()
+    if webhook_enabled() or not settings.BOT_METRICS_PORT:
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+    try:
+        response = httpx.get(f"http://127.0.0.1:{settings.BOT_METRICS_PORT}/metrics", timeout=2)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        # Let the scrape fail, so a bot that is down shows as down
+        return HttpResponse(f"Bot metrics unavailable: {e}\n", status=503, content_type='text/plain')
+    return HttpResponse(response.content, content_type=CONTENT_TYPE)
@@ -0,0 +1,49 @@
+"""
+Webhook mode - run the bot inside the web app
+The ASGI app (EaglesViewTGBot/asgi.py) starts one Application per process;
+the webhook view (bot/views.py) checks Telegram's secret token and puts
+each update on that application's queue.
+"""
+import asyncio
+
+from django.conf import settings
+
+
+_application = None
+_lock = asyncio.Lock()
+
+
+async def start_application():
+    """Create, initialize and start the webhook Application (once per process)."""
+    global _application
+    from bot.bot import create_application
+
+    async with _lock:
+        if _application is None:
+            application = create_application(webhook=True)
+            await application.initialize()
+            # post_init is only called by run_polling/run_webhook
+            if application.post_init:
+                await application.post_init(application)
+            await application.start()
+            _application = application
+        return _application
+
+
+async def stop_application():
+    """Stop the webhook Application, finishing updates already queued."""
+    global _application
+
+    async with _lock:
+        if _application is not None:
+            application, _application = _application, None
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+            await application.shutdown()
+            if application.post_shutdown:
+                await application.post_shutdown(application)
+
+
+def webhook_enabled():
+    return settings.BOT_MODE == 'webhook'
@@ -1,8 +1,17 @@
 #!/usr/bin/env bash
-# Start script for Render — runs bot in background + gunicorn web server
+# Start script for Render — runs bot + gunicorn web server
 
-echo "🦅 Starting Eagles View Bot in background..."
-python manage.py runbot &
+if [ "$BOT_MODE" = "webhook" ]; then
+    echo "🦅 Registering Eagles View Bot webhook..."
+    python manage.py runbot --mode webhook
 
-echo "🌐 Starting Gunicorn web server..."
-gunicorn EaglesViewTGBot.wsgi:application --bind 0.0.0.0:$PORT --workers 2 --timeout 120
+    # The bot runs inside the ASGI app; one worker keeps per-chat update order
+    echo "🌐 Starting Gunicorn (ASGI) web server..."
+    gunicorn EaglesViewTGBot.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT --workers 1 --timeout 120
+else
+    echo "🦅 Starting Eagles View Bot in background..."
+    python manage.py runbot &
+
+    echo "🌐 Starting Gunicorn web server..."
+    gunicorn EaglesViewTGBot.wsgi:application --bind 0.0.0.0:$PORT --workers 2 --timeout 120
+fi